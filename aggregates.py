@@ -0,0 +1,262 @@
+import sys
+import threading
+import pandas as pd
+import repository
+from catalog import get_catalog
+from storage import partition_key, UNDATED_PARTITION
+
+# 입출고 일별 집계 저장소
+# 거래일 -> (유형 / 물품 / 카테고리) -> 유형 -> [건수, 수량] 형태로 보관하며,
+# 입출고 내역이 추가/삭제될 때마다 해당 날짜만 증감합니다.
+# 집계는 입출고 내역 파티션과 같은 월별 문서(transaction_aggregates_YYYY-MM)로 나누어 저장하므로
+# 쓰기는 바뀐 월만, 기간 조회는 기간에 걸친 월만 읽습니다. transaction_aggregates 문서에는 집계가 있는
+# 월 목록을 두며, 내역이 모두 사라진 월의 문서는 삭제합니다.
+AGGREGATES_DATASET = 'transaction_aggregates'
+SECTIONS = ('by_type', 'by_item', 'by_category')
+DEFAULT_CATEGORY = '기타'
+
+_lock = threading.Lock()
+
+
+def _category_of(catalog, item_id):
+    item = catalog.item(item_id)
+    return (item.get('category') if item else None) or DEFAULT_CATEGORY
+
+
+def _add(entries, transaction_type, count, quantity):
+    """유형별 [건수, 수량]에 증감 반영 (0건이 되면 제거)"""
+    current = entries.get(transaction_type, [0, 0])
+    updated = [current[0] + count, current[1] + quantity]
+    if updated[0] <= 0:
+        entries.pop(transaction_type, None)
+    else:
+        entries[transaction_type] = updated
+
+
+def _apply(aggregates, transactions, sign):
+    """집계에 입출고 내역 증감 반영 (sign: 추가 1, 삭제 -1)
+
+    바뀌는 날짜의 하위 딕셔너리만 복사하여 수정하므로 캐시된 원본은 변경되지 않습니다.
+    ([건수, 수량] 목록은 수정하지 않고 새 목록으로 바꾸므로 두 단계까지만 복사)
+    """
+    catalog = get_catalog()
+    sections = {name: dict(aggregates.get(name, {})) for name in SECTIONS}
+    copied_dates = set()
+
+    for t in transactions:
+        date = t.get('transaction_date') or ''
+        if date not in copied_dates:
+            for name, section in sections.items():
+                day = section.get(date, {})
+                section[date] = dict(day) if name == 'by_type' else {key: dict(entries) for key, entries in day.items()}
+            copied_dates.add(date)
+
+        transaction_type = t['transaction_type']
+        count, quantity = sign, sign * t['quantity']
+        _add(sections['by_type'][date], transaction_type, count, quantity)
+        for name, key in (('by_item', str(t['item_id'])), ('by_category', _category_of(catalog, t['item_id']))):
+            day = sections[name][date]
+            entries = day.setdefault(key, {})
+            _add(entries, transaction_type, count, quantity)
+            if not entries:
+                del day[key]
+
+    # 내역이 모두 사라진 날짜 정리
+    for date in copied_dates:
+        for section in sections.values():
+            if not section[date]:
+                del section[date]
+    return sections
+
+
+def _bucket_dataset(month):
+    return f"{AGGREGATES_DATASET}_{month}"
+
+
+def _load_index():
+    return repository.load(AGGREGATES_DATASET, default={})
+
+
+def _load_months():
+    """집계가 있는 월 목록 (아직 만든 적이 없거나 월별로 나누기 전 형식이면 None)"""
+    index = _load_index()
+    months = index.get('months') if isinstance(index, dict) else None
+    return None if months is None else set(months)
+
+
+def _save_months(months):
+    repository.save(AGGREGATES_DATASET, {'months': sorted(months)})
+
+
+def _save_all(aggregates):
+    """전체 집계를 월별 문서로 저장하고 내역이 없어진 월의 문서는 삭제"""
+    buckets = {}
+    for name in SECTIONS:
+        for date, day in aggregates[name].items():
+            bucket = buckets.setdefault(partition_key({'transaction_date': date}), {key: {} for key in SECTIONS})
+            bucket[name][date] = day
+
+    index = _load_index()
+    # 이전 형식(거래일별 문서)의 문서도 함께 정리
+    stale = set(index.get('months', [])) | set(index.get('days', [])) if isinstance(index, dict) else set()
+    for bucket_name in stale - set(buckets):
+        repository.drop(_bucket_dataset(bucket_name or UNDATED_PARTITION))
+    for month, bucket in buckets.items():
+        repository.save(_bucket_dataset(month), bucket)
+    _save_months(buckets)
+
+
+def _update(transactions, sign):
+    with _lock:
+        months = _load_months()
+        if months is None:
+            # 처음 만들 때는 이미 기록된 원본 내역으로 계산 (이번 변경분도 포함됨)
+            _save_all(build_aggregates(repository.load('inventory_transactions')))
+            return
+
+        groups = {}
+        for t in transactions:
+            groups.setdefault(partition_key(t), []).append(t)
+        known = set(months)
+        for month, group in groups.items():
+            bucket = _apply(repository.load(_bucket_dataset(month), default={}), group, sign)
+            if bucket['by_type']:
+                repository.save(_bucket_dataset(month), bucket)
+                months.add(month)
+            else:
+                repository.drop(_bucket_dataset(month))
+                months.discard(month)
+        if months != known:
+            _save_months(months)
+
+
+def record_transactions(transactions):
+    """입출고 내역 추가분을 집계에 반영 (내역을 기록한 뒤 호출)"""
+    if transactions:
+        _update(transactions, 1)
+
+
+def remove_transactions(transactions):
+    """입출고 내역 삭제분을 집계에서 차감 (내역을 삭제한 뒤 호출)"""
+    if transactions:
+        _update(transactions, -1)
+
+
+def build_aggregates(transactions):
+    """입출고 내역 전체로 집계를 새로 계산 (pandas 그룹 집계)"""
+    aggregates = {name: {} for name in SECTIONS}
+    if not transactions:
+        return aggregates
+
+    catalog = get_catalog()
+    df = pd.DataFrame(list(transactions), columns=['transaction_date', 'transaction_type', 'item_id', 'quantity'])
+    df['transaction_date'] = df['transaction_date'].fillna('')
+    df['item_key'] = df['item_id'].astype(str)
+    df['category'] = df['item_id'].map(lambda item_id: _category_of(catalog, item_id))
+
+    groupings = (('by_type', None), ('by_item', 'item_key'), ('by_category', 'category'))
+    for name, key_column in groupings:
+        keys = ['transaction_date'] + ([key_column] if key_column else []) + ['transaction_type']
+        grouped = df.groupby(keys, sort=True)['quantity'].agg(['count', 'sum'])
+        section = aggregates[name]
+        for index, (count, quantity) in grouped.iterrows():
+            date, *rest = index
+            node = section.setdefault(date, {})
+            if key_column:
+                node = node.setdefault(rest[0], {})
+            node[rest[-1]] = [int(count), float(quantity)]
+    return aggregates
+
+
+def rebuild_aggregates():
+    """원본 입출고 내역으로 집계를 다시 계산하여 저장 (집계와 원본이 어긋났을 때 사용)"""
+    with _lock:
+        aggregates = build_aggregates(repository.load('inventory_transactions'))
+        _save_all(aggregates)
+    days = len(aggregates['by_type'])
+    return True, f"집계를 다시 계산했습니다 ({days}일)"
+
+
+def _months_between(months, start_date=None, end_date=None):
+    """기간에 걸친 월 (거래일이 없는 내역은 기간 조건이 없을 때만 포함)"""
+    return sorted(
+        month for month in months
+        if month != UNDATED_PARTITION
+        and (not start_date or month >= start_date[:7]) and (not end_date or month <= end_date[:7])
+        or month == UNDATED_PARTITION and not (start_date or end_date)
+    )
+
+
+def _ensure_months():
+    """집계가 있는 월 목록 (아직 만든 적이 없으면 원본 내역으로 한 번 계산)"""
+    months = _load_months()
+    if months is None:
+        with _lock:
+            months = _load_months()
+            if months is None:
+                _save_all(build_aggregates(repository.load('inventory_transactions')))
+                months = _load_months()
+    return months
+
+
+def load_aggregates(start_date=None, end_date=None):
+    """기간에 걸친 월의 집계만 읽어 합친 집계 (기간 밖의 같은 달 날짜가 포함될 수 있음)"""
+    aggregates = {name: {} for name in SECTIONS}
+    for month in _months_between(_ensure_months(), start_date, end_date):
+        bucket = repository.load(_bucket_dataset(month), default={})
+        for name in SECTIONS:
+            aggregates[name].update(bucket.get(name, {}))
+    return aggregates
+
+
+def first_transaction_date():
+    """가장 이른 거래일 (거래일이 있는 내역이 없으면 None)"""
+    months = sorted(month for month in _ensure_months() if month != UNDATED_PARTITION)
+    if not months:
+        return None
+    bucket = repository.load(_bucket_dataset(months[0]), default={})
+    return min((day for day in bucket.get('by_type', {}) if day), default=None)
+
+
+def _frame(section, key_name, start_date=None, end_date=None):
+    rows = []
+    for date, day in section.items():
+        if (start_date and date < start_date) or (end_date and date > end_date):
+            continue
+        if key_name is None:
+            day = {None: day}
+        for key, entries in day.items():
+            for transaction_type, (count, quantity) in entries.items():
+                rows.append((date, key, transaction_type, count, quantity))
+    columns = ['transaction_date', key_name or 'key', 'transaction_type', 'count', 'quantity']
+    df = pd.DataFrame(rows, columns=columns)
+    if key_name is None:
+        df = df.drop(columns=['key'])
+    return df.sort_values('transaction_date').reset_index(drop=True)
+
+
+def daily_summary(start_date=None, end_date=None):
+    """일별/유형별 건수와 수량 (transaction_date, transaction_type, count, quantity)"""
+    return _frame(load_aggregates(start_date, end_date)['by_type'], None, start_date, end_date)
+
+
+def item_summary(start_date=None, end_date=None):
+    """일별/물품별/유형별 건수와 수량 (item_id는 문자열)"""
+    return _frame(load_aggregates(start_date, end_date)['by_item'], 'item_id', start_date, end_date)
+
+
+def category_summary(start_date=None, end_date=None):
+    """일별/카테고리별/유형별 건수와 수량"""
+    return _frame(load_aggregates(start_date, end_date)['by_category'], 'category', start_date, end_date)
+
+
+if __name__ == "__main__":
+    # 사용법: python aggregates.py rebuild
+    if len(sys.argv) >= 2 and sys.argv[1] == "rebuild":
+        # 집계로 만든 월말 체크포인트도 함께 무효화 (ledger가 이 모듈을 사용하므로 utils를 거침)
+        from utils import rebuild_transaction_summaries
+        success, message = rebuild_transaction_summaries()
+        print(message)
+        sys.exit(0 if success else 1)
+    print("사용법: python aggregates.py rebuild")
+    sys.exit(1)
@@ -1,8 +1,6 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import os
-import json
 from datetime import datetime
 
 # 모듈 임포트
@@ -12,6 +10,8 @@ from item_management import item_management_app
 from bom_management import bom_management_app
 from inventory_transaction import inventory_transaction_app
 from production_management import production_management_app
+from storage import get_storage
+from repository import cache_stats
 
 # 앱 설정
 st.set_page_config(
@@ -21,40 +21,15 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# 데이터 파일 경로 설정
-DATA_DIR = "data"
-SUPPLIERS_FILE = os.path.join(DATA_DIR, "suppliers.json")
-ITEMS_FILE = os.path.join(DATA_DIR, "items.json")
-BOM_FILE = os.path.join(DATA_DIR, "bom.json")
-INVENTORY_TRANSACTIONS_FILE = os.path.join(DATA_DIR, "inventory_transactions.json")
+# 저장소 초기화 (JSON 파일 또는 SQLite 테이블 생성)
+# 스크립트는 위젯을 조작할 때마다 다시 실행되므로 프로세스당 한 번만 실행
+@st.cache_resource
+def initialize_storage():
+    storage = get_storage()
+    storage.initialize()
+    return storage
 
-# 데이터 디렉터리 생성
-os.makedirs(DATA_DIR, exist_ok=True)
-
-# 데이터 파일 초기화 함수
-def initialize_data_files():
-    # 거래처 데이터 초기화
-    if not os.path.exists(SUPPLIERS_FILE):
-        with open(SUPPLIERS_FILE, 'w', encoding='utf-8') as f:
-            json.dump([], f, ensure_ascii=False)
-    
-    # 물품 데이터 초기화
-    if not os.path.exists(ITEMS_FILE):
-        with open(ITEMS_FILE, 'w', encoding='utf-8') as f:
-            json.dump([], f, ensure_ascii=False)
-    
-    # BOM 데이터 초기화
-    if not os.path.exists(BOM_FILE):
-        with open(BOM_FILE, 'w', encoding='utf-8') as f:
-            json.dump({}, f, ensure_ascii=False)
-    
-    # 입출고 내역 초기화
-    if not os.path.exists(INVENTORY_TRANSACTIONS_FILE):
-        with open(INVENTORY_TRANSACTIONS_FILE, 'w', encoding='utf-8') as f:
-            json.dump([], f, ensure_ascii=False)
-
-# 데이터 파일 초기화
-initialize_data_files()
+initialize_storage()
 
 # 사이드바 - 메뉴 선택
 st.sidebar.title("재고관리 시스템")
@@ -72,6 +47,17 @@ st.sidebar.info(
     """
 )
 
+# 데이터 캐시 상태
+with st.sidebar.expander("데이터 캐시 상태"):
+    stats = cache_stats()
+    if stats:
+        st.dataframe(pd.DataFrame([
+            {'데이터': dataset, '적중': counts['hits'], '실패': counts['misses']}
+            for dataset, counts in stats.items()
+        ]))
+    else:
+        st.write("아직 조회된 데이터가 없습니다.")
+
 # 페이지 하단 정보
 st.sidebar.markdown("---")
 st.sidebar.info(f"© {datetime.now().year} 재고관리 시스템")
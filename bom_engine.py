@@ -0,0 +1,357 @@
+import math
+import threading
+import pandas as pd
+import repository
+from catalog import get_catalog
+from storage import get_storage
+
+
+class BomCycleError(ValueError):
+    """BOM 순환 참조 (path: 순환 경로의 제품 ID 목록)"""
+
+    def __init__(self, path):
+        self.path = path
+        super().__init__("BOM 순환 참조: " + " -> ".join(path))
+
+
+def _normalize(components):
+    """BOM 라인 -> (자재 ID, 수량) 튜플 목록 (원본 dict가 나중에 수정되어도 영향받지 않도록 복사)"""
+    return [(component['material_id'], float(component['quantity'])) for component in components or []]
+
+
+class BomEngine:
+    """다단계 BOM 전개 엔진
+
+    자기 BOM이 있는 자재는 반제품으로 보고 최하위 자재까지 재귀적으로 전개합니다.
+    반제품 1단위당 최하위 자재 소요량을 메모해 두므로, 여러 제품이 함께 쓰는 반제품도 한 번만 전개합니다.
+    """
+
+    def __init__(self, bom):
+        self.bom = {}
+        for product_id_str, components in bom.items():
+            if components:
+                self.bom[str(product_id_str)] = _normalize(components)
+        self._unit = {}  # 제품 ID(문자열) -> {최하위 자재 ID: 1단위당 소요량}
+        self._depends = {}  # 제품 ID(문자열) -> 전개 중 거쳐 간 물품 ID(문자열) 집합
+        self._where_used = None  # 자재 ID(문자열) -> [(제품 ID(문자열), 수량)] (처음 조회할 때 구성)
+        self._costs = {}  # 제품 ID(문자열) -> 1단위 표준원가
+        self._cost_prices = {}  # 원가 계산에 사용한 물품 ID(문자열) -> 단가
+
+    def is_assembly(self, item_id):
+        return str(item_id) in self.bom
+
+    def components(self, product_id):
+        return self.bom.get(str(product_id), [])
+
+    def update(self, bom):
+        """저장된 BOM 반영 (구성이 바뀐 제품과 그 제품을 포함하는 전개 결과만 메모에서 제거)
+
+        반환값은 구성이 바뀐 제품 ID(문자열) 집합입니다.
+        """
+        new_bom = {str(key): _normalize(components) for key, components in bom.items() if components}
+        changed = {key for key in set(self.bom) | set(new_bom) if self.bom.get(key) != new_bom.get(key)}
+        if self._where_used is not None:
+            # 바뀐 제품의 기존 사용처를 빼고 새 구성으로 다시 등록
+            for key in changed:
+                for material_id, _ in self.bom.get(key, []):
+                    self._unindex_where_used(str(material_id), key)
+                for material_id, quantity in new_bom.get(key, []):
+                    self._where_used.setdefault(str(material_id), []).append((key, quantity))
+        self.bom = new_bom
+        stale = [key for key, depends in self._depends.items() if depends & changed]
+        for key in stale:
+            self._unit.pop(key, None)
+            self._depends.pop(key, None)
+        if self._costs:
+            self.invalidate_costs(changed)
+        return changed
+
+    def _explode(self, key, path):
+        cached = self._unit.get(key)
+        if cached is not None:
+            return cached
+        if key in path:
+            raise BomCycleError(path[path.index(key):] + [key])
+
+        path.append(key)
+        totals = {}
+        depends = {key}
+        for material_id, quantity in self.bom[key]:
+            material_key = str(material_id)
+            depends.add(material_key)
+            if material_key in self.bom:
+                for leaf_id, leaf_quantity in self._explode(material_key, path).items():
+                    totals[leaf_id] = totals.get(leaf_id, 0) + quantity * leaf_quantity
+                depends |= self._depends[material_key]
+            else:
+                totals[material_id] = totals.get(material_id, 0) + quantity
+        path.pop()
+
+        self._unit[key] = totals
+        self._depends[key] = depends
+        return totals
+
+    def unit_requirements(self, product_id):
+        """제품 1단위당 최하위 자재 소요량 {자재 ID: 수량} (순환 참조면 BomCycleError)"""
+        key = str(product_id)
+        if key not in self.bom:
+            return {}
+        return dict(self._explode(key, []))
+
+    def net_requirements(self, product_id, quantity, available):
+        """제품 quantity 단위 생산 시 실제로 출고할 물품별 수량 {물품 ID: 수량}
+
+        반제품은 가용 재고(available(물품 ID))에서 먼저 쓰고 모자란 수량만 하위 자재로 전개하며,
+        최하위 자재는 재고와 관계없이 소요량 전체를 담습니다. (순환 참조면 BomCycleError)
+        """
+        self.unit_requirements(product_id)
+        issued = {}
+
+        def walk(key, multiplier):
+            for material_id, unit_quantity in self.bom.get(key, []):
+                needed = unit_quantity * multiplier
+                material_key = str(material_id)
+                if material_key not in self.bom:
+                    issued[material_id] = issued.get(material_id, 0) + needed
+                    continue
+                # 같은 반제품이 여러 곳에 쓰이면 앞에서 쓴 수량을 뺀 재고만 사용
+                used = min(needed, max(available(material_id) - issued.get(material_id, 0), 0))
+                if used > 0:
+                    issued[material_id] = issued.get(material_id, 0) + used
+                if needed - used > 1e-9:
+                    walk(material_key, needed - used)
+
+        walk(str(product_id), quantity)
+        return issued
+
+    def tree(self, product_id, quantity=1):
+        """들여쓰기용 전개 구조 (깊이 우선 순서의 행 목록)
+
+        각 행은 level(1부터), material_id, unit_quantity(상위 1단위당), quantity(총 소요량),
+        is_assembly(하위 BOM 여부)를 담습니다.
+        """
+        # 순환 참조가 있으면 여기서 BomCycleError 발생
+        self.unit_requirements(product_id)
+
+        rows = []
+
+        def walk(key, multiplier, level):
+            for material_id, unit_quantity in self.bom.get(key, []):
+                material_key = str(material_id)
+                rows.append({
+                    'level': level,
+                    'material_id': material_id,
+                    'unit_quantity': unit_quantity,
+                    'quantity': unit_quantity * multiplier,
+                    'is_assembly': material_key in self.bom
+                })
+                walk(material_key, unit_quantity * multiplier, level + 1)
+
+        walk(str(product_id), quantity, 1)
+        return rows
+
+    # 사용처 (역방향 인덱스)
+    def _build_where_used(self):
+        self._where_used = {}
+        for product_key, components in self.bom.items():
+            for material_id, quantity in components:
+                self._where_used.setdefault(str(material_id), []).append((product_key, quantity))
+
+    def _unindex_where_used(self, material_key, product_key):
+        entries = [entry for entry in self._where_used.get(material_key, []) if entry[0] != product_key]
+        if entries:
+            self._where_used[material_key] = entries
+        else:
+            self._where_used.pop(material_key, None)
+
+    def where_used(self, material_id):
+        """자재를 직접 사용하는 제품 목록 [(제품 ID(문자열), 상위 1단위당 수량)]"""
+        if self._where_used is None:
+            self._build_where_used()
+        return list(self._where_used.get(str(material_id), []))
+
+    def used_in(self, material_id):
+        """자재가 직접/간접으로 들어가는 모든 상위 제품 {제품 ID(문자열): 제품 1단위당 총 사용량}"""
+        memo = {}
+
+        def ancestors(key):
+            if key in memo:
+                return memo[key]
+            usage = {}
+            memo[key] = usage
+            for product_key, quantity in self.where_used(key):
+                usage[product_key] = usage.get(product_key, 0) + quantity
+                for ancestor, ancestor_quantity in ancestors(product_key).items():
+                    usage[ancestor] = usage.get(ancestor, 0) + quantity * ancestor_quantity
+            return usage
+
+        return dict(ancestors(str(material_id)))
+
+    # 표준원가 롤업
+    def topological_order(self):
+        """하위 반제품부터 상위 제품 순서의 제품 ID(문자열) 목록 (순환 참조에 걸린 제품은 제외)"""
+        pending = {}
+        parents = {}
+        for key, components in self.bom.items():
+            children = {str(material_id) for material_id, _ in components if str(material_id) in self.bom}
+            pending[key] = len(children)
+            for child in children:
+                parents.setdefault(child, []).append(key)
+
+        ready = [key for key, count in pending.items() if count == 0]
+        order = []
+        while ready:
+            key = ready.pop()
+            order.append(key)
+            for parent in parents.get(key, []):
+                pending[parent] -= 1
+                if pending[parent] == 0:
+                    ready.append(parent)
+        return order
+
+    def invalidate_costs(self, item_ids):
+        """단가나 BOM이 바뀐 물품과 그 물품을 사용하는 모든 상위 제품의 원가 캐시 제거 (사용처 역추적)"""
+        for key in map(str, item_ids):
+            self._costs.pop(key, None)
+            for ancestor in self.used_in(key):
+                self._costs.pop(ancestor, None)
+
+    def standard_costs(self, prices):
+        """BOM이 있는 모든 제품의 1단위 표준원가 {제품 ID(문자열): 원가}
+
+        prices는 물품 ID -> 단가이며, 최하위 자재는 단가를, 반제품은 롤업한 원가를 사용합니다.
+        직전 계산과 단가가 달라진 물품의 상위 제품만 위상 순서로 다시 계산합니다.
+        """
+        prices = {str(item_id): float(price or 0) for item_id, price in prices.items()}
+        if self._costs:
+            changed = {
+                key for key in set(prices) | set(self._cost_prices)
+                if prices.get(key) != self._cost_prices.get(key)
+            }
+            self.invalidate_costs(changed)
+        self._cost_prices = prices
+
+        for key in self.topological_order():
+            if key in self._costs:
+                continue
+            self._costs[key] = sum(
+                quantity * (self._costs[str(material_id)] if str(material_id) in self.bom else prices.get(str(material_id), 0))
+                for material_id, quantity in self.bom[key]
+            )
+        return dict(self._costs)
+
+    def find_cycle(self, product_ids=None):
+        """순환 참조 경로 반환 (없으면 None, product_ids를 주면 해당 제품만 검사)"""
+        for key in (self.bom if product_ids is None else product_ids):
+            try:
+                self.unit_requirements(key)
+            except BomCycleError as e:
+                return e.path
+        return None
+
+
+# 프로세스 전역 전개 엔진 (BOM 데이터 버전이 바뀌면 다시 구성)
+_engine = None
+_engine_version = None
+_lock = threading.Lock()
+
+
+def get_bom_engine():
+    """현재 BOM 기준 전개 엔진 반환"""
+    global _engine, _engine_version
+    version = get_storage().version('bom')
+    with _lock:
+        if _engine is None or _engine_version != version:
+            _engine = BomEngine(repository.load('bom'))
+            _engine_version = version
+        return _engine
+
+
+def bom_saved(bom):
+    """save_bom 직후 호출: 구성이 바뀐 제품의 전개 결과만 무효화하고 엔진을 새 버전으로 유지"""
+    global _engine_version
+    version = get_storage().version('bom')
+    with _lock:
+        if _engine is None:
+            return set()
+        changed = _engine.update(bom)
+        _engine_version = version
+        return changed
+
+
+def standard_costs():
+    """현재 단가 기준 제품별 1단위 표준원가 (제품 ID -> 원가 Series)"""
+    engine = get_bom_engine()
+    catalog = get_catalog()
+    prices = {item_id: item.get('unit_price', 0) for item_id, item in catalog.items_by_id.items()}
+    with _lock:
+        costs = engine.standard_costs(prices)
+    series = pd.Series(costs, dtype=float)
+    series.index = series.index.astype('int64')
+    return series
+
+
+def cost_breakdown(product_id):
+    """제품 1단위 표준원가의 구성 자재별 내역 DataFrame (자재명, 수량, 단위원가, 금액, 원가 기준)"""
+    engine = get_bom_engine()
+    catalog = get_catalog()
+    costs = standard_costs()
+    rows = []
+    for material_id, quantity in engine.components(product_id):
+        material = catalog.item(material_id) or {}
+        assembly = engine.is_assembly(material_id)
+        unit_cost = costs.get(int(material_id), 0.0) if assembly else float(material.get('unit_price', 0) or 0)
+        rows.append({
+            '자재명': catalog.item_name(material_id),
+            '수량': quantity,
+            '단위원가': unit_cost,
+            '금액': quantity * unit_cost,
+            '원가 기준': "BOM 롤업" if assembly else "단가"
+        })
+    return pd.DataFrame(rows, columns=['자재명', '수량', '단위원가', '금액', '원가 기준'])
+
+
+def material_impact(material_id, unit_price=None, stock=None):
+    """자재 단가/재고 변경 시 영향받는 제품 분석
+
+    unit_price, stock을 생략하면 현재 값 기준입니다. 반환 DataFrame 컬럼:
+    product_id, name, direct(직접 사용 여부), usage_per_unit(제품 1단위당 사용량),
+    cost_per_unit(제품 1단위당 자재 원가), cost_change(현재 단가 대비 원가 증감),
+    buildable(이 자재 재고만으로 생산 가능한 수량)
+    """
+    engine = get_bom_engine()
+    catalog = get_catalog()
+    material = catalog.item(material_id) or {}
+    current_price = float(material.get('unit_price', 0) or 0)
+    unit_price = current_price if unit_price is None else float(unit_price)
+    stock = float(material.get('stock', 0) or 0) if stock is None else float(stock)
+
+    direct = {product_key for product_key, _ in engine.where_used(material_id)}
+    rows = []
+    for product_key, usage in engine.used_in(material_id).items():
+        product_id = int(product_key)
+        rows.append({
+            'product_id': product_id,
+            'name': catalog.item_name(product_id),
+            'direct': product_key in direct,
+            'usage_per_unit': usage,
+            'cost_per_unit': usage * unit_price,
+            'cost_change': usage * (unit_price - current_price),
+            'buildable': math.floor(stock / usage) if usage > 0 else None
+        })
+    columns = ['product_id', 'name', 'direct', 'usage_per_unit', 'cost_per_unit', 'cost_change', 'buildable']
+    return pd.DataFrame(rows, columns=columns).sort_values(['direct', 'name'], ascending=[False, True]).reset_index(drop=True)
+
+
+def where_used_table(material_id, unit_price=None, stock=None):
+    """사용처 조회 표시용 DataFrame"""
+    impact = material_impact(material_id, unit_price, stock)
+    table = impact.rename(columns={
+        'name': '제품명',
+        'usage_per_unit': '제품 1단위당 사용량',
+        'cost_per_unit': '제품 1단위당 원가',
+        'cost_change': '원가 증감',
+        'buildable': '자재 재고로 생산 가능'
+    })
+    table['구분'] = table['direct'].map({True: '직접', False: '간접'})
+    return table[['제품명', '구분', '제품 1단위당 사용량', '제품 1단위당 원가', '원가 증감', '자재 재고로 생산 가능']]
@@ -2,6 +2,8 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime
 from utils import load_items, load_bom, save_bom
+from catalog import get_catalog
+from bom_engine import get_bom_engine, where_used_table, standard_costs, cost_breakdown
 
 def bom_management_app():
     st.title("BOM 관리")
@@ -10,6 +12,8 @@ def bom_management_app():
     # 데이터 로드
     items = load_items()
     bom_data = load_bom()
+    catalog = get_catalog()
+    engine = get_bom_engine()
     
     # 제품 선택
     product_options = [item for item in items]
@@ -36,7 +40,7 @@ def bom_management_app():
     selected_product_name = st.selectbox("제품 선택", product_names)
     
     # 선택한 제품의 정보 가져오기
-    selected_product = next((item for item in items if item['name'] == selected_product_name), None)
+    selected_product = catalog.item_by_name(selected_product_name)
     
     if not selected_product:
         st.error("선택한 제품 정보를 찾을 수 없습니다.")
@@ -60,7 +64,7 @@ def bom_management_app():
         
         for component in components:
             material_id = component['material_id']
-            material = next((item for item in items if item['id'] == material_id), None)
+            material = catalog.item(material_id)
             
             if material:
                 components_data.append({
@@ -75,6 +79,13 @@ def bom_management_app():
             st.write("현재 BOM 구성:")
             components_df = pd.DataFrame(components_data)
             st.dataframe(components_df)
+            
+            # 하위 BOM까지 롤업한 표준원가
+            product_cost = standard_costs().get(selected_product['id'])
+            if product_cost is not None:
+                st.metric(label="표준원가 (1단위)", value=f"{product_cost:,.0f}원")
+                with st.expander("표준원가 구성"):
+                    st.dataframe(cost_breakdown(selected_product['id']))
     else:
         st.info(f"'{selected_product_name}' 제품의 BOM 정보가 아직 없습니다.")
     
@@ -85,9 +96,14 @@ def bom_management_app():
     if bom_option == "자재 추가":
         st.write("자재 추가")
         
-        # 추가할 자재 선택 (현재 BOM에 없는 아이템만 표시)
-        current_material_ids = [c['material_id'] for c in components]
-        available_materials = [item for item in items if item['id'] != selected_product['id'] and item['id'] not in current_material_ids]
+        # 추가할 자재 선택 (현재 BOM에 없고, 현재 제품을 직접/간접으로 사용하는 상위 제품이 아닌 아이템만 표시)
+        current_material_ids = {c['material_id'] for c in components}
+        ancestors = engine.used_in(selected_product['id'])
+        available_materials = [
+            item for item in items
+            if item['id'] != selected_product['id'] and item['id'] not in current_material_ids
+            and str(item['id']) not in ancestors
+        ]
         
         if not available_materials:
             st.warning("추가할 수 있는 자재가 없습니다. 모든 자재가 이미 BOM에 포함되어 있거나 자재가 등록되지 않았습니다.")
@@ -112,10 +128,13 @@ def bom_management_app():
                     bom_data[product_id_str] = []
                 
                 bom_data[product_id_str].append(new_component)
-                save_bom(bom_data)
+                success, message = save_bom(bom_data)
                 
-                st.success(f"자재 '{selected_material['name']}'이(가) BOM에 추가되었습니다.")
-                st.rerun()
+                if success:
+                    st.success(f"자재 '{selected_material['name']}'이(가) BOM에 추가되었습니다.")
+                    st.rerun()
+                else:
+                    st.error(message)
     
     elif bom_option == "자재 제거":
         st.write("자재 제거")
@@ -126,7 +145,7 @@ def bom_management_app():
             # 제거할 자재 선택
             component_materials = []
             for component in components:
-                material = next((item for item in items if item['id'] == component['material_id']), None)
+                material = catalog.item(component['material_id'])
                 if material:
                     component_materials.append(material)
             
@@ -142,10 +161,13 @@ def bom_management_app():
                 if not bom_data[product_id_str]:
                     del bom_data[product_id_str]
                 
-                save_bom(bom_data)
+                success, message = save_bom(bom_data)
                 
-                st.success(f"자재 '{selected_material_name}'이(가) BOM에서 제거되었습니다.")
-                st.rerun()
+                if success:
+                    st.success(f"자재 '{selected_material_name}'이(가) BOM에서 제거되었습니다.")
+                    st.rerun()
+                else:
+                    st.error(message)
     
     elif bom_option == "자재 수량 수정":
         st.write("자재 수량 수정")
@@ -156,7 +178,7 @@ def bom_management_app():
             # 수정할 자재 선택
             component_materials = []
             for component in components:
-                material = next((item for item in items if item['id'] == component['material_id']), None)
+                material = catalog.item(component['material_id'])
                 if material:
                     component_materials.append({
                         'material': material,
@@ -183,10 +205,13 @@ def bom_management_app():
                             component['note'] = new_note
                             break
                     
-                    save_bom(bom_data)
+                    success, message = save_bom(bom_data)
                     
-                    st.success(f"자재 '{selected_material_name}'의 수량이 {new_quantity}로 수정되었습니다.")
-                    st.rerun()
+                    if success:
+                        st.success(f"자재 '{selected_material_name}'의 수량이 {new_quantity}로 수정되었습니다.")
+                        st.rerun()
+                    else:
+                        st.error(message)
     
     # BOM 복사 기능
     st.subheader("BOM 복사")
@@ -195,7 +220,7 @@ def bom_management_app():
     # BOM이 존재하는 제품 목록
     products_with_bom = []
     for pid in bom_data.keys():
-        product = next((item for item in items if str(item['id']) == pid), None)
+        product = catalog.item(int(pid))
         if product and product['id'] != selected_product['id']:
             products_with_bom.append(product)
     
@@ -226,6 +251,34 @@ def bom_management_app():
                         if component['material_id'] not in existing_material_ids:
                             bom_data[product_id_str].append(component.copy())
                 
-                save_bom(bom_data)
-                st.success(f"'{source_product_name}'의 BOM이 '{selected_product_name}'으로 복사되었습니다.")
-                st.rerun() 
\ No newline at end of file
+                success, message = save_bom(bom_data)
+                if success:
+                    st.success(f"'{source_product_name}'의 BOM이 '{selected_product_name}'으로 복사되었습니다.")
+                    st.rerun()
+                else:
+                    st.error(message)
+    
+    # 사용처 조회 (자재 -> 사용 제품 역방향 인덱스)
+    st.subheader("사용처 조회")
+    st.write("자재가 직접 또는 반제품을 거쳐 사용되는 제품과, 자재 단가/재고 변경 시의 영향을 확인할 수 있습니다.")
+    
+    material_names = [item['name'] for item in items]
+    where_used_name = st.selectbox("조회할 자재 선택", material_names, key="where_used_material")
+    where_used_material = catalog.item_by_name(where_used_name)
+    
+    if where_used_material:
+        price_col, stock_col = st.columns(2)
+        with price_col:
+            new_unit_price = st.number_input(
+                "변경 단가", value=float(where_used_material.get('unit_price', 0) or 0), step=100.0, key="where_used_price"
+            )
+        with stock_col:
+            new_stock = st.number_input(
+                "변경 재고", value=float(where_used_material.get('stock', 0) or 0), step=1.0, key="where_used_stock"
+            )
+        
+        where_used_df = where_used_table(where_used_material['id'], new_unit_price, new_stock)
+        if where_used_df.empty:
+            st.info(f"'{where_used_name}'을(를) 사용하는 제품이 없습니다.")
+        else:
+            st.dataframe(where_used_df)
@@ -0,0 +1,184 @@
+import threading
+import numpy as np
+import repository
+from storage import get_storage
+
+
+def _csr(rows, cols, values, size):
+    """(행, 열, 값) 배열 -> CSR (indptr, indices, data), 행 순서를 유지하며 정렬"""
+    order = np.argsort(rows, kind='stable')
+    counts = np.bincount(rows, minlength=size)
+    indptr = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    return indptr, cols[order].astype(np.int32), values[order].astype(np.float64)
+
+
+def _gather(matrix, rows):
+    """CSR에서 여러 행을 한 번에 꺼냄 -> (rows 안의 순번, 열, 값) 배열"""
+    indptr, indices, data = matrix
+    rows = np.asarray(rows, dtype=np.int64)
+    starts = indptr[rows]
+    lengths = indptr[rows + 1] - starts
+    owner = np.repeat(np.arange(len(rows)), lengths)
+    entries = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths) + np.arange(lengths.sum())
+    return owner, indices[entries], data[entries]
+
+
+class CompiledBom:
+    """정수 인덱스 CSR 배열로 컴파일한 BOM
+
+    행과 열은 모두 물품 위치(ids 배열의 인덱스)이며, 행 p의 indptr[p]:indptr[p + 1] 구간이
+    제품 p의 구성입니다. direct는 BOM 그대로의 직접 구성, leaf는 최하위 자재까지 전개한
+    1단위당 소요량입니다. BOM 버전마다 한 번만 만들고 조회는 배열 연산으로 처리합니다.
+    """
+
+    def __init__(self, bom):
+        products, materials, quantities = [], [], []
+        for product_id_str, components in bom.items():
+            product_id = int(product_id_str)
+            for component in components or []:
+                products.append(product_id)
+                materials.append(int(component['material_id']))
+                quantities.append(float(component['quantity']))
+        products = np.array(products, dtype=np.int64)
+        materials = np.array(materials, dtype=np.int64)
+
+        self.ids = np.unique(np.concatenate([products, materials]))
+        self.size = len(self.ids)
+        rows = np.searchsorted(self.ids, products)
+        cols = np.searchsorted(self.ids, materials)
+        self.direct = _csr(rows, cols, np.array(quantities, dtype=np.float64), self.size)
+        self.is_assembly = np.diff(self.direct[0]) > 0
+        self.leaf, self.cyclic = self._explode_all()
+
+    # 위치 변환
+    def positions(self, item_ids):
+        """물품 ID 배열 -> 위치 배열 (BOM에 없는 물품은 -1)"""
+        item_ids = np.asarray(item_ids, dtype=np.int64)
+        if self.size == 0:
+            return np.full(len(item_ids), -1, dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self.ids, item_ids), self.size - 1)
+        return np.where(self.ids[positions] == item_ids, positions, -1)
+
+    # 전개
+    def levels(self):
+        """하위 반제품부터 상위 제품 순서의 단계별 위치 배열 목록 (순환 참조에 걸린 제품은 제외)
+
+        같은 단계의 제품은 서로 의존하지 않으므로 한 번의 배열 연산으로 함께 전개할 수 있습니다.
+        """
+        indptr, indices, _ = self.direct
+        entry_rows = np.repeat(np.arange(self.size), np.diff(indptr))
+        assembly_entries = self.is_assembly[indices]
+        pending = np.bincount(entry_rows[assembly_entries], minlength=self.size)
+        parents = _csr(
+            indices[assembly_entries].astype(np.int64), entry_rows[assembly_entries],
+            np.zeros(int(assembly_entries.sum())), self.size
+        )
+
+        levels = []
+        frontier = np.flatnonzero(self.is_assembly & (pending == 0))
+        while len(frontier):
+            levels.append(frontier)
+            _, parent_rows, _ = _gather(parents, frontier)
+            np.subtract.at(pending, parent_rows, 1)
+            frontier = np.unique(parent_rows[pending[parent_rows] == 0])
+        return levels
+
+    def _explode_all(self):
+        """모든 제품의 최하위 자재 소요량 CSR 계산
+
+        단계별로 직접 구성 중 최하위 자재는 그대로, 반제품은 이미 계산한 하위 단계의 행에
+        수량을 곱해 펼친 뒤, (행, 열) 키로 합산합니다.
+        """
+        leaf = _csr(np.zeros(0, np.int64), np.zeros(0, np.int64), np.zeros(0), self.size)
+        parts = []
+        levels = self.levels()
+        for frontier in levels:
+            owner, children, quantities = _gather(self.direct, frontier)
+            rows = frontier[owner]
+            is_leaf = ~self.is_assembly[children]
+
+            assembly_rows, assembly_children = rows[~is_leaf], children[~is_leaf]
+            assembly_quantities = quantities[~is_leaf]
+            expanded_owner, expanded_cols, expanded_data = _gather(leaf, assembly_children)
+
+            keys = np.concatenate([
+                rows[is_leaf].astype(np.int64) * self.size + children[is_leaf],
+                assembly_rows[expanded_owner].astype(np.int64) * self.size + expanded_cols
+            ])
+            values = np.concatenate([
+                quantities[is_leaf],
+                expanded_data * assembly_quantities[expanded_owner]
+            ])
+            merged, inverse = np.unique(keys, return_inverse=True)
+            parts.append((merged // self.size, merged % self.size, np.bincount(inverse, weights=values)))
+            leaf = _csr(
+                np.concatenate([part[0] for part in parts]),
+                np.concatenate([part[1] for part in parts]),
+                np.concatenate([part[2] for part in parts]),
+                self.size
+            )
+
+        done = np.concatenate(levels) if levels else np.zeros(0, dtype=np.int64)
+        cyclic = set(self.ids[self.is_assembly].tolist()) - set(self.ids[done].tolist())
+        return leaf, cyclic
+
+    def gross_requirements(self, product_ids, quantities):
+        """오더 벡터 -> 자재별 총소요량 (자재 ID 배열, 수량 배열)
+
+        leaf 행렬의 전치와 오더 벡터의 곱을 bincount 한 번으로 계산합니다.
+        """
+        indptr, indices, data = self.leaf
+        positions = self.positions(product_ids)
+        known = positions >= 0
+        demand = np.zeros(self.size)
+        np.add.at(demand, positions[known], np.asarray(quantities, dtype=np.float64)[known])
+        weights = data * np.repeat(demand, np.diff(indptr))
+        gross = np.bincount(indices, weights=weights, minlength=self.size)
+        needed = np.flatnonzero(gross)
+        return self.ids[needed], gross[needed]
+
+    def max_buildable(self, stock):
+        """물품 위치별 재고 배열 -> BOM이 있는 제품별 최대 생산 가능 수량 (제품 ID 배열, 수량 배열)
+
+        제품 행마다 floor(재고 / 1단위당 소요량)의 최솟값을 minimum.reduceat으로 구합니다.
+        """
+        indptr, indices, data = self.leaf
+        counts = np.diff(indptr)
+        rows = np.flatnonzero(counts)
+        if len(rows) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        with np.errstate(divide='ignore'):
+            # 부동소수점 오차로 정수 경계에서 1이 모자라지 않도록 작은 여유를 둠
+            ratio = np.where(data > 0, np.floor(np.clip(stock[indices], 0, None) / data + 1e-9), np.inf)
+        buildable = np.minimum.reduceat(ratio, indptr[rows])
+        buildable = np.where(np.isinf(buildable), 0, buildable)
+        return self.ids[rows], buildable.astype(np.int64)
+
+    def stock_vector(self, catalog, ledger=None):
+        """물품 위치별 현재 재고 배열 (예약 원장을 주면 예약 수량을 뺀 가용 재고)"""
+        ids = self.ids.tolist()
+        stock = np.array(
+            [float((catalog.item(item_id) or {}).get('stock', 0) or 0) for item_id in ids],
+            dtype=np.float64
+        )
+        if ledger is not None:
+            stock -= np.array([ledger.reserved(item_id) for item_id in ids], dtype=np.float64)
+        return stock
+
+
+# 프로세스 전역 컴파일 결과 (BOM 데이터 버전이 바뀔 때만 다시 컴파일)
+_compiled = None
+_compiled_version = None
+_lock = threading.Lock()
+
+
+def get_compiled_bom():
+    """현재 BOM 버전의 컴파일 결과 반환"""
+    global _compiled, _compiled_version
+    version = get_storage().version('bom')
+    with _lock:
+        if _compiled is None or _compiled_version != version:
+            _compiled = CompiledBom(repository.load('bom'))
+            _compiled_version = version
+        return _compiled
@@ -0,0 +1,167 @@
+import time
+import hashlib
+import streamlit as st
+import pandas as pd
+from datetime import datetime
+import repository
+from utils import allocate_ids, upsert_records
+
+# 대량 등록 설정
+IMPORT_CHUNK_SIZE = 1000      # 한 번에 읽고 검증/저장하는 행 수
+MAX_REPORTED_ERRORS = 100     # 화면에 표시하는 최대 오류 수 (전체 건수는 따로 집계)
+FINGERPRINT_BLOCK_SIZE = 1024 * 1024
+
+
+def file_fingerprint(uploaded_file):
+    """업로드 파일 내용의 해시 (같은 파일을 다시 올렸는지 확인용)"""
+    digest = hashlib.sha1()
+    uploaded_file.seek(0)
+    for block in iter(lambda: uploaded_file.read(FINGERPRINT_BLOCK_SIZE), b''):
+        digest.update(block)
+    uploaded_file.seek(0)
+    return digest.hexdigest()
+
+
+def count_data_rows(uploaded_file):
+    """진행률 표시용 데이터 행 수 (헤더 제외, 줄 수 기준 추정치)"""
+    data = uploaded_file.getvalue()
+    lines = data.count(b'\n')
+    if data and not data.endswith(b'\n'):
+        lines += 1
+    return max(lines - 1, 0)
+
+
+def _checkpoint_dataset(kind):
+    return f"import_checkpoint_{kind}"
+
+
+def load_checkpoint(kind, fingerprint):
+    """같은 파일에 대해 중단된 가져오기의 체크포인트 조회"""
+    checkpoint = repository.load(_checkpoint_dataset(kind), default={})
+    if checkpoint and checkpoint.get('fingerprint') == fingerprint:
+        return checkpoint
+    return None
+
+
+def save_checkpoint(kind, checkpoint):
+    """마지막으로 저장된 청크까지의 진행 상황 기록"""
+    repository.save(_checkpoint_dataset(kind), checkpoint)
+
+
+def clear_checkpoint(kind):
+    """체크포인트 삭제"""
+    repository.save(_checkpoint_dataset(kind), {})
+
+
+def run_chunked_import(uploaded_file, kind, process_chunk, read_csv_kwargs=None,
+                       chunk_size=IMPORT_CHUNK_SIZE, on_progress=None):
+    """CSV를 청크 단위로 읽어 검증/저장하고 청크마다 체크포인트를 남김
+
+    process_chunk(chunk)는 청크를 저장한 뒤 (성공 건수, 행별 오류 Series)를 반환해야 합니다.
+    청크의 인덱스는 파일 전체 기준 행 번호(0부터)로 맞춰서 전달합니다.
+    같은 파일로 다시 실행하면 마지막으로 저장된 청크 다음부터 이어서 처리합니다.
+    """
+    fingerprint = file_fingerprint(uploaded_file)
+    checkpoint = load_checkpoint(kind, fingerprint) or {
+        'fingerprint': fingerprint,
+        'committed_rows': 0,
+        'success_count': 0,
+        'error_count': 0,
+        'errors': []
+    }
+    start_row = checkpoint['committed_rows']
+
+    kwargs = dict(read_csv_kwargs or {})
+    if start_row:
+        # 이미 저장된 행은 파싱하지 않고 건너뜀 (헤더는 유지)
+        kwargs['skiprows'] = range(1, start_row + 1)
+
+    started_at = time.time()
+    processed_rows = 0
+    uploaded_file.seek(0)
+    # with 블록으로 읽어야 청크 처리 중 예외가 나도 업로드 파일이 닫히지 않음
+    with pd.read_csv(uploaded_file, chunksize=chunk_size, **kwargs) as reader:
+        for chunk in reader:
+            row_offset = start_row + processed_rows
+            chunk.index = pd.RangeIndex(row_offset, row_offset + len(chunk))
+
+            success_count, errors = process_chunk(chunk)
+            errors = errors.dropna()
+
+            # 저장이 끝난 청크까지 체크포인트 갱신
+            processed_rows += len(chunk)
+            checkpoint['committed_rows'] = start_row + processed_rows
+            checkpoint['success_count'] += success_count
+            checkpoint['error_count'] += len(errors)
+            room = MAX_REPORTED_ERRORS - len(checkpoint['errors'])
+            if room > 0:
+                checkpoint['errors'].extend(
+                    f"오류 (행 {idx+2}): {message}" for idx, message in errors.head(room).items()
+                )
+            checkpoint['updated_at'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            save_checkpoint(kind, checkpoint)
+
+            if on_progress:
+                elapsed = time.time() - started_at
+                on_progress(checkpoint['committed_rows'], processed_rows / elapsed if elapsed > 0 else 0)
+
+    clear_checkpoint(kind)
+    return checkpoint
+
+
+def import_record_chunk(dataset, candidates, errors):
+    """검증을 마친 후보 DataFrame 중 오류가 없는 행만 새 ID로 저장하고 (성공 건수, 행별 오류) 반환
+
+    candidates는 레코드 형태의 DataFrame, errors는 같은 인덱스의 오류 Series(유효한 행은 결측값)입니다.
+    물품/거래처 대량 등록이 공통으로 사용합니다.
+    """
+    new_records = candidates[errors.isna()].to_dict('records')
+    if new_records:
+        # 성공한 행 수만큼 ID를 한 번에 예약
+        new_ids = allocate_ids(dataset, len(new_records))
+        upsert_records(dataset, [
+            {'id': new_id, **record} for new_id, record in zip(new_ids, new_records)
+        ])
+    return len(new_records), errors + " - " + candidates['name']
+
+
+def chunked_import_ui(uploaded_file, kind, label, process_chunk, read_csv_kwargs=None):
+    """대량 등록 실행 버튼, 진행률 표시줄, 결과 표시 (세 대량 등록 탭 공용)"""
+    fingerprint = file_fingerprint(uploaded_file)
+    checkpoint = load_checkpoint(kind, fingerprint)
+
+    if checkpoint:
+        st.info(f"이전에 중단된 등록이 있습니다. {checkpoint['committed_rows']:,}행까지 저장되었으며, 실행하면 이어서 진행합니다.")
+        if st.button("처음부터 다시 등록", key=f"restart_import_{kind}"):
+            clear_checkpoint(kind)
+            st.rerun()
+
+    if not st.button("대량 등록 실행", key=f"run_import_{kind}"):
+        return
+
+    total_rows = count_data_rows(uploaded_file)
+    progress_bar = st.progress(0.0, text="등록 준비 중...")
+
+    def on_progress(done_rows, rows_per_second):
+        fraction = min(done_rows / total_rows, 1.0) if total_rows else 1.0
+        progress_bar.progress(
+            fraction,
+            text=f"{done_rows:,} / {total_rows:,}행 처리 ({rows_per_second:,.0f}행/초)"
+        )
+
+    try:
+        result = run_chunked_import(uploaded_file, kind, process_chunk, read_csv_kwargs, on_progress=on_progress)
+    except Exception as e:
+        st.error(f"등록 중 오류가 발생했습니다: {str(e)}")
+        st.info("다시 실행하면 마지막으로 저장된 지점부터 이어서 진행합니다.")
+        return
+
+    if result['success_count'] > 0:
+        st.success(f"{result['success_count']:,}개의 {label}이(가) 성공적으로 등록되었습니다.")
+
+    if result['error_count'] > 0:
+        st.error(f"{result['error_count']:,}개의 {label} 등록 중 오류가 발생했습니다.")
+        for msg in result['errors']:
+            st.warning(msg)
+        if result['error_count'] > len(result['errors']):
+            st.warning(f"외 {result['error_count'] - len(result['errors']):,}건의 오류는 표시하지 않았습니다.")
@@ -0,0 +1,208 @@
+import threading
+import repository
+from storage import get_storage
+from views import item_lookup_frame, supplier_lookup_frame
+
+
+class Catalog:
+    """물품/거래처 조회용 해시 인덱스
+
+    id, 물품명, 품번, 거래처명, 사업자등록번호로 O(1) 조회를 제공합니다.
+    같은 이름이 여러 개면 먼저 등록된 레코드를 반환합니다 (기존 next() 검색과 동일).
+    저장소에 레코드 단위로 쓰면 put/remove로 증분 갱신되고, 그 밖의 변경은 다시 구성합니다.
+    """
+
+    def __init__(self, items, suppliers):
+        self.items_by_id = {}
+        self.items_by_name = {}
+        self.items_by_code = {}
+        self.suppliers_by_id = {}
+        self.suppliers_by_name = {}
+        self.suppliers_by_business_number = {}
+        self._item_frame = None
+        self._supplier_frame = None
+        for item in items:
+            self.put_item(item)
+        for supplier in suppliers:
+            self.put_supplier(supplier)
+
+    def copy(self):
+        """인덱스 딕셔너리만 복사한 사본 (조회 중인 다른 스레드의 카탈로그는 바뀌지 않음)"""
+        clone = Catalog.__new__(Catalog)
+        for name in (
+            'items_by_id', 'items_by_name', 'items_by_code',
+            'suppliers_by_id', 'suppliers_by_name', 'suppliers_by_business_number'
+        ):
+            setattr(clone, name, dict(getattr(self, name)))
+        clone._item_frame = self._item_frame
+        clone._supplier_frame = self._supplier_frame
+        return clone
+
+    # 인덱스 유지
+    def put_item(self, item):
+        """물품 추가/수정 시 인덱스 갱신"""
+        self._item_frame = None
+        previous = self.items_by_id.get(item['id'])
+        if previous is not None:
+            self._unindex(self.items_by_name, previous.get('name'), previous)
+            self._unindex(self.items_by_code, previous.get('item_code'), previous)
+        self.items_by_id[item['id']] = item
+        self._index(self.items_by_name, item.get('name'), item)
+        self._index(self.items_by_code, item.get('item_code'), item)
+
+    def refresh_item(self, item):
+        """조회 키(물품명, 품번)가 그대로인 물품의 레코드만 교체
+
+        키를 지우고 다시 넣지 않고 기존 키에 새 레코드를 다시 연결하므로, 다른 스레드가
+        인덱스를 순회하는 중에도 크기가 바뀌거나 키가 잠시 사라지지 않습니다.
+        """
+        self._item_frame = None
+        previous = self.items_by_id.get(item['id'])
+        self.items_by_id[item['id']] = item
+        self._rebind(self.items_by_name, item.get('name'), previous, item)
+        self._rebind(self.items_by_code, item.get('item_code'), previous, item)
+
+    def remove_item(self, item_id):
+        """물품 삭제 시 인덱스 갱신"""
+        self._item_frame = None
+        item = self.items_by_id.pop(item_id, None)
+        if item is not None:
+            self._unindex(self.items_by_name, item.get('name'), item)
+            self._unindex(self.items_by_code, item.get('item_code'), item)
+
+    def put_supplier(self, supplier):
+        """거래처 추가/수정 시 인덱스 갱신"""
+        self._supplier_frame = None
+        previous = self.suppliers_by_id.get(supplier['id'])
+        if previous is not None:
+            self._unindex(self.suppliers_by_name, previous.get('name'), previous)
+            self._unindex(self.suppliers_by_business_number, previous.get('business_number'), previous)
+        self.suppliers_by_id[supplier['id']] = supplier
+        self._index(self.suppliers_by_name, supplier.get('name'), supplier)
+        self._index(self.suppliers_by_business_number, supplier.get('business_number'), supplier)
+
+    def refresh_supplier(self, supplier):
+        """조회 키(거래처명, 사업자등록번호)가 그대로인 거래처의 레코드만 교체 (refresh_item 참고)"""
+        self._supplier_frame = None
+        previous = self.suppliers_by_id.get(supplier['id'])
+        self.suppliers_by_id[supplier['id']] = supplier
+        self._rebind(self.suppliers_by_name, supplier.get('name'), previous, supplier)
+        self._rebind(self.suppliers_by_business_number, supplier.get('business_number'), previous, supplier)
+
+    def remove_supplier(self, supplier_id):
+        """거래처 삭제 시 인덱스 갱신"""
+        self._supplier_frame = None
+        supplier = self.suppliers_by_id.pop(supplier_id, None)
+        if supplier is not None:
+            self._unindex(self.suppliers_by_name, supplier.get('name'), supplier)
+            self._unindex(self.suppliers_by_business_number, supplier.get('business_number'), supplier)
+
+    @staticmethod
+    def _index(index, key, record):
+        if key:
+            index.setdefault(key, record)
+
+    @staticmethod
+    def _rebind(index, key, previous, record):
+        if key and index.get(key) is previous:
+            index[key] = record
+
+    @staticmethod
+    def _unindex(index, key, record):
+        if key and index.get(key) is record:
+            del index[key]
+
+    # 조회
+    def item(self, item_id):
+        return self.items_by_id.get(item_id)
+
+    def item_by_name(self, name):
+        return self.items_by_name.get(name)
+
+    def item_by_code(self, item_code):
+        return self.items_by_code.get(item_code)
+
+    def supplier(self, supplier_id):
+        return self.suppliers_by_id.get(supplier_id)
+
+    def supplier_by_name(self, name):
+        return self.suppliers_by_name.get(name)
+
+    def supplier_by_business_number(self, business_number):
+        return self.suppliers_by_business_number.get(business_number)
+
+    def item_name(self, item_id, default="알 수 없음"):
+        item = self.items_by_id.get(item_id)
+        return item['name'] if item else default
+
+    def supplier_name(self, supplier_id, default="알 수 없음"):
+        supplier = self.suppliers_by_id.get(supplier_id)
+        return supplier['name'] if supplier else default
+
+    # 조인용 DataFrame (인덱스가 바뀔 때까지 재사용)
+    def item_frame(self):
+        if self._item_frame is None:
+            self._item_frame = item_lookup_frame(self.items_by_id.values())
+        return self._item_frame
+
+    def supplier_frame(self):
+        if self._supplier_frame is None:
+            self._supplier_frame = supplier_lookup_frame(self.suppliers_by_id.values())
+        return self._supplier_frame
+
+
+# 프로세스 전역 카탈로그 (물품/거래처 데이터 버전이 바뀔 때만 다시 구성)
+_catalog = None
+_catalog_versions = None
+_lock = threading.Lock()
+_DATASETS = ('items', 'suppliers')
+_KEY_FIELDS = {'items': ('name', 'item_code'), 'suppliers': ('name', 'business_number')}
+
+
+def get_catalog():
+    """현재 데이터 기준 카탈로그 반환"""
+    global _catalog, _catalog_versions
+    storage = get_storage()
+    versions = (storage.version('items'), storage.version('suppliers'))
+    with _lock:
+        if _catalog is None or _catalog_versions != versions:
+            _catalog = Catalog(repository.load('items'), repository.load('suppliers'))
+            _catalog_versions = versions
+        return _catalog
+
+
+def _on_write(dataset, kind, payload, version_before, version_after):
+    """물품/거래처를 레코드 단위로 쓰면 카탈로그 사본에 증분 반영 (전체 저장은 다음 조회 때 다시 구성)"""
+    global _catalog, _catalog_versions
+    if dataset not in _DATASETS or kind not in ('upsert', 'append', 'delete'):
+        return
+    position = _DATASETS.index(dataset)
+    with _lock:
+        if _catalog is None or _catalog_versions[position] != version_before:
+            return
+        # 재고 변경처럼 기존 레코드의 조회 키가 그대로면 인덱스 키는 두고 레코드만 그 자리에서 교체
+        records_by_id = _catalog.items_by_id if dataset == 'items' else _catalog.suppliers_by_id
+        in_place = kind != 'delete' and all(
+            record['id'] in records_by_id
+            and all(records_by_id[record['id']].get(field) == record.get(field) for field in _KEY_FIELDS[dataset])
+            for record in payload
+        )
+        catalog = _catalog if in_place else _catalog.copy()
+        if kind == 'delete':
+            remove = catalog.remove_item if dataset == 'items' else catalog.remove_supplier
+            for record_id in payload:
+                remove(record_id)
+        elif in_place:
+            refresh = catalog.refresh_item if dataset == 'items' else catalog.refresh_supplier
+            for record in payload:
+                refresh(record)
+        else:
+            put = catalog.put_item if dataset == 'items' else catalog.put_supplier
+            for record in payload:
+                put(record)
+        versions = list(_catalog_versions)
+        versions[position] = version_after
+        _catalog, _catalog_versions = catalog, tuple(versions)
+
+
+repository.add_write_listener(_on_write)
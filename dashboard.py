@@ -3,7 +3,17 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
-from utils import load_items, load_suppliers, load_inventory_transactions
+from utils import (
+    load_items, load_suppliers, load_recent_inventory_transactions
+)
+from aggregates import daily_summary
+from ledger import stock_as_of_table
+from reconcile import reconcile_stock, reconcile_table, write_adjustments
+from catalog import get_catalog
+from mrp import max_buildable
+from bom_engine import standard_costs
+from reservations import get_reservation_ledger
+from views import build_transaction_view, DASHBOARD_VIEW_COLUMNS
 
 def dashboard_app():
     st.title("재고관리 시스템 대시보드")
@@ -11,7 +21,7 @@ def dashboard_app():
     # 데이터 로드
     items = load_items()
     suppliers = load_suppliers()
-    transactions = load_inventory_transactions()
+    catalog = get_catalog()
     
     # 주요 지표 계산
     total_items = len(items)
@@ -23,16 +33,14 @@ def dashboard_app():
         for item in items
     ])
     
-    # 최근 30일 거래 건수
+    # 최근 30일 거래 건수 (내역을 훑지 않고 일별 집계에서 합산)
     today = datetime.now().date()
     thirty_days_ago = (today - timedelta(days=30)).strftime("%Y-%m-%d")
-    recent_transactions = [
-        t for t in transactions 
-        if t.get('transaction_date', '') >= thirty_days_ago
-    ]
+    recent_daily = daily_summary(thirty_days_ago)
+    recent_counts = recent_daily.groupby('transaction_type')['count'].sum()
     
-    recent_inbound = len([t for t in recent_transactions if t['transaction_type'] == '입고'])
-    recent_outbound = len([t for t in recent_transactions if t['transaction_type'] == '출고'])
+    recent_inbound = int(recent_counts.get('입고', 0))
+    recent_outbound = int(recent_counts.get('출고', 0))
     
     # 대시보드 레이아웃
     st.markdown("### 주요 지표")
@@ -60,7 +68,10 @@ def dashboard_app():
     st.markdown("### 재고 현황")
     
     if items:
-        # 재고 데이터 준비
+        # 재고 데이터 준비 (BOM이 있는 제품은 최대 생산 가능 수량과 표준원가 기준 평가액도 표시)
+        buildable = max_buildable()
+        costs = standard_costs()
+        ledger = get_reservation_ledger()
         stock_data = []
         for item in items:
             stock_value = item.get('stock', 0) * item.get('unit_price', 0)
@@ -69,7 +80,7 @@ def dashboard_app():
             supplier_name = "없음"
             supplier_business_number = ""
             if item.get('supplier_id'):
-                supplier = next((s for s in suppliers if s['id'] == item['supplier_id']), None)
+                supplier = catalog.supplier(item['supplier_id'])
                 if supplier:
                     supplier_name = supplier['name']
                     supplier_business_number = supplier.get('business_number', '')
@@ -79,9 +90,14 @@ def dashboard_app():
                 '품번': item.get('item_code', ''),
                 '카테고리': item.get('category', '기타'),
                 '재고': item.get('stock', 0),
+                '예약': ledger.reserved(item['id']),
+                '가용': item.get('stock', 0) - ledger.reserved(item['id']),
                 '단위': item.get('unit', ''),
                 '단가': item.get('unit_price', 0),
                 '재고가치': stock_value,
+                '최대 생산 가능': int(buildable[item['id']]) if item['id'] in buildable.index else None,
+                '표준원가': costs[item['id']] if item['id'] in costs.index else None,
+                '표준원가 평가액': item.get('stock', 0) * costs[item['id']] if item['id'] in costs.index else None,
                 '거래처': supplier_name,
                 '사업자번호': supplier_business_number
             })
@@ -133,6 +149,34 @@ def dashboard_app():
     else:
         st.info("등록된 물품이 없습니다.")
     
+    # 기준일 재고 조회 (감사용, 입출고 내역으로 역산)
+    st.markdown("### 기준일 재고 조회")
+    
+    if items:
+        as_of_date = st.date_input("기준일", today, max_value=today)
+        st.dataframe(stock_as_of_table(as_of_date))
+    
+    # 재고 대사 (물품 재고와 입출고 내역 비교)
+    with st.expander("재고 대사"):
+        st.write("기초 재고 + 입출고 내역 순증감으로 계산한 예상 재고와 현재 재고를 비교합니다.")
+        if st.button("대사 실행"):
+            st.session_state['reconcile_report'] = reconcile_stock()
+        
+        if 'reconcile_report' in st.session_state:
+            report = st.session_state['reconcile_report']
+            if report.empty:
+                st.success("재고와 입출고 내역이 일치합니다.")
+            else:
+                st.warning(f"{len(report)}개 물품의 재고가 입출고 내역과 다릅니다.")
+                st.dataframe(reconcile_table(report))
+                if st.button("조정 내역 기록 (현재 재고 기준)"):
+                    success, message = write_adjustments(report)
+                    del st.session_state['reconcile_report']
+                    if success:
+                        st.success(message)
+                    else:
+                        st.error(message)
+    
     # 거래처 정보 섹션
     st.markdown("### 거래처 정보")
     
@@ -155,70 +199,28 @@ def dashboard_app():
     # 최근 입출고 내역
     st.markdown("### 최근 입출고 내역")
     
-    if transactions:
-        # 최근 20개 거래만 표시
-        recent_trans = transactions[-20:] if len(transactions) > 20 else transactions
+    # 최근 20개 거래만 표시 (최근 월 파티션 끝부분만 읽음)
+    recent_trans = load_recent_inventory_transactions(20)
+    
+    if recent_trans:
         recent_trans.reverse()  # 최신 항목을 상단에 표시
         
-        # 거래 데이터 변환
-        trans_data = []
-        for t in recent_trans:
-            # 물품 정보
-            item_name = "알 수 없음"
-            item_code = ""
-            item_unit = ""
-            item = next((i for i in items if i['id'] == t['item_id']), None)
-            if item:
-                item_name = item['name']
-                item_code = item.get('item_code', '')
-                item_unit = item.get('unit', '')
-            
-            # 거래처 정보
-            supplier_name = "없음"
-            supplier_business_number = ""
-            if t.get('supplier_id'):
-                supplier = next((s for s in suppliers if s['id'] == t['supplier_id']), None)
-                if supplier:
-                    supplier_name = supplier['name']
-                    supplier_business_number = supplier.get('business_number', '')
-            
-            trans_data.append({
-                '날짜': t.get('transaction_date', ''),
-                '유형': t['transaction_type'],
-                '물품명': item_name,
-                '품번': item_code,
-                '수량': t['quantity'],
-                '단위': item_unit,
-                '거래처': supplier_name,
-                '사업자번호': supplier_business_number,
-                '비고': t.get('note', '')
-            })
-        
-        trans_df = pd.DataFrame(trans_data)
+        # 거래 데이터 변환 (물품/거래처 조인)
+        trans_df = build_transaction_view(
+            recent_trans, catalog.item_frame(), catalog.supplier_frame(), DASHBOARD_VIEW_COLUMNS,
+            missing_supplier="없음"
+        ).drop(columns=['id']).rename(columns={'참고사항': '비고'})
         st.dataframe(trans_df)
         
-        # 일별 입출고 추이 차트
-        if len(transactions) > 0:
-            # 거래 날짜 데이터 변환
-            for t in transactions:
-                if 'transaction_date' not in t:
-                    t['transaction_date'] = datetime.now().strftime("%Y-%m-%d")
-            
-            # 날짜별 집계 데이터 만들기
-            transactions_df = pd.DataFrame(transactions)
-            transactions_df['transaction_date'] = pd.to_datetime(transactions_df['transaction_date'])
-            
-            # 날짜별, 유형별 거래 건수 집계
-            daily_trans = transactions_df.groupby([
-                pd.Grouper(key='transaction_date', freq='D'), 'transaction_type'
-            ]).size().reset_index(name='count')
-            
+        # 일별 입출고 추이 차트 (일별 집계 사용)
+        if not recent_daily.empty:
             # 피벗 테이블로 변환
-            pivot_df = daily_trans.pivot(
+            pivot_df = recent_daily.pivot(
                 index='transaction_date', 
                 columns='transaction_type', 
                 values='count'
             ).fillna(0).reset_index()
+            pivot_df['transaction_date'] = pd.to_datetime(pivot_df['transaction_date'])
             
             # 누락된 컬럼 추가
             if '입고' not in pivot_df.columns:
@@ -226,10 +228,6 @@ def dashboard_app():
             if '출고' not in pivot_df.columns:
                 pivot_df['출고'] = 0
             
-            # 최근 30일 데이터만 필터링
-            start_date = today - timedelta(days=30)
-            pivot_df = pivot_df[pivot_df['transaction_date'] >= pd.Timestamp(start_date)]
-            
             # 차트 그리기
             fig = go.Figure()
             
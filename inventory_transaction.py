@@ -1,11 +1,168 @@
 import streamlit as st
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta
 from utils import (
     load_items, save_items, 
-    load_inventory_transactions, save_inventory_transactions,
-    load_suppliers, generate_id, update_item_stock
+    record_stock_transactions, delete_transactions_with_reversal, query_inventory_transactions,
+    load_suppliers, allocate_ids, text_column
 )
+from catalog import get_catalog
+from bulk_import import chunked_import_ui
+from views import build_transaction_view, HISTORY_VIEW_COLUMNS
+
+# 재고 모의 계산에서 누적합을 다시 계산하는 최대 횟수 (넘으면 남은 물품만 순차 계산)
+MAX_SIMULATION_PASSES = 20
+
+# 입출고 내역 페이지 크기 선택지
+HISTORY_PAGE_SIZES = [20, 50, 100]
+
+def history_date_range(date_filter, today, custom_range=None):
+    """기간 필터 선택값을 조회 범위 ('YYYY-MM-DD' 시작일, 종료일)로 변환 (전체는 None, None)"""
+    if date_filter == "오늘":
+        start, end = today, today
+    elif date_filter == "이번 주":
+        start, end = today - timedelta(days=today.weekday()), today
+    elif date_filter == "이번 달":
+        start, end = today.replace(day=1), today
+    elif date_filter == "직접 입력" and custom_range:
+        # 종료일을 아직 고르지 않았으면 시작일 하루만 조회
+        start, end = custom_range[0], custom_range[-1]
+    else:
+        return None, None
+    return start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+
+def find_insufficient_rows(item_ids, signed_quantities, initial_stock):
+    """물품별 누적합으로 행 순서대로 재고를 모의 계산하여 재고 부족 행 찾기
+
+    재고 부족으로 거부된 행은 이후 행의 재고에 반영되지 않아야 하므로, 물품마다
+    첫 번째 부족 행을 거부하고 누적합을 다시 계산합니다 (한 줄씩 처리하는 것과 동일한 결과).
+    반환값은 (재고 부족 여부 Series, 각 행 처리 직전 재고 Series) 입니다.
+    """
+    accepted = pd.Series(True, index=item_ids.index)
+    rejected = pd.Series(False, index=item_ids.index)
+    is_outbound = signed_quantities < 0
+    
+    for _ in range(MAX_SIMULATION_PASSES):
+        applied = signed_quantities.where(accepted, 0)
+        running = initial_stock + applied.groupby(item_ids, sort=False).cumsum()
+        stock_before = running - applied
+        violation = accepted & is_outbound & (stock_before + signed_quantities < 0)
+        if not violation.any():
+            return rejected, stock_before
+        violating_items = item_ids[violation]
+        first_violations = violating_items[~violating_items.duplicated()].index
+        accepted[first_violations] = False
+        rejected[first_violations] = True
+    
+    # 부족 행이 아주 많은 물품은 해당 물품의 행만 순차 계산
+    applied = signed_quantities.where(accepted, 0)
+    running = initial_stock + applied.groupby(item_ids, sort=False).cumsum()
+    stock_before = running - applied
+    violation = accepted & is_outbound & (stock_before + signed_quantities < 0)
+    remaining = item_ids.isin(item_ids[violation].unique())
+    stock = {}
+    for idx in item_ids[remaining].index:
+        item_id = item_ids[idx]
+        current = stock.get(item_id, initial_stock[idx])
+        stock_before[idx] = current
+        if rejected[idx]:
+            continue
+        if current + signed_quantities[idx] < 0:
+            rejected[idx] = True
+        else:
+            stock[item_id] = current + signed_quantities[idx]
+    return rejected, stock_before
+
+def prepare_transaction_import(df, catalog):
+    """대량 등록 CSV를 한 번에 변환/검증하여 (신규 입출고 내역 DataFrame, 행별 오류 Series) 반환
+
+    물품명/거래처명은 카탈로그 인덱스로 한 번에 매핑하고, 수량과 날짜는 컬럼 단위로
+    변환합니다. 오류 Series는 df와 같은 인덱스이며 유효한 행은 결측값입니다.
+    """
+    now = datetime.now()
+    
+    def text(column):
+        return text_column(df, column)
+    
+    errors = pd.Series(None, index=df.index, dtype=object)
+    
+    def set_errors(condition, messages):
+        nonlocal errors
+        errors = errors.mask(condition & errors.isna(), messages)
+    
+    # 거래 유형
+    transaction_types = text('거래유형')
+    set_errors(~transaction_types.isin(['입고', '출고']), "'거래유형'은 '입고' 또는 '출고'만 가능합니다.")
+    
+    # 물품명 -> 물품 ID / 현재 재고
+    item_names = text('물품명')
+    name_to_id = {name: item['id'] for name, item in catalog.items_by_name.items()}
+    item_ids = item_names.map(name_to_id)
+    set_errors(item_ids.isna(), "물품 '" + item_names + "'을(를) 찾을 수 없습니다.")
+    
+    # 수량
+    quantities = pd.to_numeric(df['수량'], errors='coerce')
+    set_errors(quantities.isna(), "수량을 숫자로 변환할 수 없습니다.")
+    set_errors(quantities <= 0, "수량은 0보다 커야 합니다.")
+    
+    # 거래처명 -> 거래처 ID (없으면 None)
+    name_to_supplier_id = {name: supplier['id'] for name, supplier in catalog.suppliers_by_name.items()}
+    supplier_ids = text('거래처명').map(name_to_supplier_id).astype('Int64').astype(object)
+    supplier_ids = supplier_ids.where(supplier_ids.notna(), None)
+    
+    # 날짜 (YYYY-MM-DD는 빠른 경로로, 나머지는 여러 형식으로 변환. 잘못된 형식은 오늘 날짜로 대체)
+    raw_dates = text('거래일자')
+    parsed_dates = pd.to_datetime(raw_dates, errors='coerce', format="%Y-%m-%d")
+    retry = parsed_dates.isna() & (raw_dates != '')
+    if retry.any():
+        parsed_dates[retry] = pd.to_datetime(raw_dates[retry], errors='coerce', format='mixed')
+    transaction_dates = parsed_dates.dt.strftime("%Y-%m-%d").fillna(now.strftime("%Y-%m-%d"))
+    
+    # 재고 모의 계산 (형식 오류가 없는 행만 대상)
+    valid = errors.isna()
+    id_to_stock = {item_id: item.get('stock', 0) for item_id, item in catalog.items_by_id.items()}
+    valid_item_ids = item_ids[valid].astype('int64')
+    signed_quantities = quantities[valid].where(transaction_types[valid] == '입고', -quantities[valid])
+    insufficient, stock_before = find_insufficient_rows(
+        valid_item_ids, signed_quantities, valid_item_ids.map(id_to_stock).astype(float)
+    )
+    insufficient_index = insufficient[insufficient].index
+    errors[insufficient_index] = (
+        "재고 부족 - 물품 '" + item_names[insufficient_index]
+        + "', 현재 재고: " + stock_before[insufficient_index].astype(str)
+        + ", 필요 수량: " + quantities[insufficient_index].astype(str)
+    )
+    
+    valid = errors.isna()
+    new_transactions = pd.DataFrame({
+        'id': None,  # 저장 직전에 한 번에 할당
+        'transaction_type': transaction_types[valid],
+        'item_id': item_ids[valid].astype('int64'),
+        'quantity': quantities[valid].astype(float),
+        'supplier_id': supplier_ids[valid],
+        'transaction_date': transaction_dates[valid],
+        'note': text('참고사항')[valid],
+        'created_at': now.strftime("%Y-%m-%d %H:%M:%S")
+    })
+    return new_transactions, errors
+
+def import_transaction_chunk(chunk):
+    """대량 등록 청크 하나를 변환/검증 후 저장하고 (성공 건수, 행별 오류) 반환
+
+    재고 반영과 내역 추가는 청크마다 각각 한 번씩만 기록하며, 내역 기록에 실패하면 재고를 되돌립니다.
+    """
+    new_transactions, errors = prepare_transaction_import(chunk, get_catalog())
+    if new_transactions.empty:
+        return 0, errors
+    
+    # 성공한 행 수만큼 ID를 한 번에 예약
+    new_transactions['id'] = allocate_ids('inventory_transactions', len(new_transactions))
+    
+    success, message = record_stock_transactions(new_transactions.to_dict('records'))
+    if not success:
+        errors[new_transactions.index] = f"재고 업데이트 실패 - {message}"
+        return 0, errors
+    return len(new_transactions), errors
 
 def inventory_transaction_app():
     st.title("입출고 관리")
@@ -15,8 +172,8 @@ def inventory_transaction_app():
     
     # 데이터 로드
     items = load_items()
-    transactions = load_inventory_transactions()
     suppliers = load_suppliers()
+    catalog = get_catalog()
     
     # 입출고 내역 탭
     with tab1:
@@ -39,103 +196,113 @@ def inventory_transaction_app():
             )
         
         with col3:
-            # 날짜 범위 필터 (미구현 상태, 향후 기능 추가)
+            # 날짜 범위 필터
             date_filter = st.selectbox(
                 "기간",
                 ["전체", "오늘", "이번 주", "이번 달", "직접 입력"]
             )
         
-        # 거래 내역 필터링
-        filtered_transactions = transactions
-        
-        # 거래 유형 필터 적용
-        if transaction_type_filter != "전체":
-            filtered_transactions = [t for t in filtered_transactions if t['transaction_type'] == transaction_type_filter]
+        custom_range = None
+        if date_filter == "직접 입력":
+            today = datetime.now().date()
+            custom_range = st.date_input("조회 기간", (today - timedelta(days=30), today))
+        start_date, end_date = history_date_range(date_filter, datetime.now().date(), custom_range)
         
-        # 물품 필터 적용
+        # 필터 조건 구성
+        transaction_type = transaction_type_filter if transaction_type_filter != "전체" else None
+        item_id = None
         if item_name_filter != "전체":
-            item_id = next((item['id'] for item in items if item['name'] == item_name_filter), None)
-            if item_id:
-                filtered_transactions = [t for t in filtered_transactions if t['item_id'] == item_id]
+            filter_item = catalog.item_by_name(item_name_filter)
+            if filter_item:
+                item_id = filter_item['id']
         
-        # 날짜 필터 적용 (향후 구현)
+        page_size = st.selectbox("페이지당 표시 건수", HISTORY_PAGE_SIZES)
+        
+        # 필터가 바뀌면 첫 페이지부터 다시 조회
+        filter_key = (transaction_type, item_id, start_date, end_date, page_size)
+        if st.session_state.get('history_filter_key') != filter_key:
+            st.session_state['history_filter_key'] = filter_key
+            st.session_state['history_cursors'] = [None]
+        cursors = st.session_state['history_cursors']
+        
+        # 현재 페이지만 조회 (날짜 인덱스로 기간 범위만 탐색)
+        page_transactions, next_cursor, total_count = query_inventory_transactions(
+            start_date, end_date, transaction_type, item_id,
+            cursor=cursors[-1], limit=page_size
+        )
         
         # 필터링된 거래 내역 표시
-        if filtered_transactions:
-            # 데이터 변환 (ID를 이름으로 매핑)
-            display_transactions = []
-            
-            for t in filtered_transactions:
-                item_name = "알 수 없음"
-                supplier_name = "알 수 없음"
-                
-                # 물품명 찾기
-                item = next((i for i in items if i['id'] == t['item_id']), None)
-                if item:
-                    item_name = item['name']
-                
-                # 거래처명 찾기
-                if t.get('supplier_id'):
-                    supplier = next((s for s in suppliers if s['id'] == t['supplier_id']), None)
-                    if supplier:
-                        supplier_name = supplier['name']
-                
-                display_transactions.append({
-                    'id': t['id'],
-                    '날짜': t.get('transaction_date', ''),
-                    '유형': t['transaction_type'],
-                    '물품명': item_name,
-                    '수량': t['quantity'],
-                    '단위': item.get('unit', '') if item else '',
-                    '거래처': supplier_name,
-                    '참고사항': t.get('note', '')
-                })
+        if page_transactions:
+            # 데이터 변환 (물품/거래처 조인)
+            display_df = build_transaction_view(
+                page_transactions, catalog.item_frame(), catalog.supplier_frame(), HISTORY_VIEW_COLUMNS
+            )
             
-            # DataFrame으로 변환하여 표시
-            df = pd.DataFrame(display_transactions)
             # ID 컬럼은 표시하지 않음
-            if 'id' in df.columns:
-                df = df.drop(columns=['id'])
+            df = display_df.drop(columns=['id'])
             
             st.dataframe(df)
             
+            # 페이지 이동
+            page_number = len(cursors)
+            page_count = max((total_count + page_size - 1) // page_size, 1)
+            prev_col, info_col, next_col = st.columns([1, 2, 1])
+            with prev_col:
+                if st.button("이전 페이지", disabled=page_number == 1):
+                    cursors.pop()
+                    st.rerun()
+            with info_col:
+                st.write(f"{page_number} / {page_count} 페이지 (총 {total_count:,}건)")
+            with next_col:
+                if st.button("다음 페이지", disabled=next_cursor is None):
+                    cursors.append(next_cursor)
+                    st.rerun()
+            
             # 거래 삭제 기능
             st.subheader("거래 내역 삭제")
             
-            # 거래 ID 선택 (날짜와 물품명으로 구분)
-            transaction_options = [f"{t['날짜']} - {t['물품명']} ({t['유형']}, {t['수량']})" for t in display_transactions]
-            if transaction_options:
-                selected_transaction_idx = st.selectbox(
-                    "삭제할 거래 내역 선택",
-                    options=range(len(transaction_options)),
-                    format_func=lambda x: transaction_options[x]
+            # 거래 ID 선택 (현재 페이지의 내역만, 날짜와 물품명으로 구분)
+            transaction_options = (
+                display_df['날짜'] + " - " + display_df['물품명']
+                + " (" + display_df['유형'] + ", " + display_df['수량'].astype(str) + ")"
+            ).tolist()
+            selected_indices = st.multiselect(
+                "삭제할 거래 내역 선택 (현재 페이지)",
+                options=range(len(transaction_options)),
+                format_func=lambda x: transaction_options[x]
+            )
+            
+            if st.button(f"선택한 거래 내역 삭제 ({len(selected_indices)}건)", disabled=not selected_indices):
+                # 재고 수량 복원 (입고 삭제 -> 재고 감소, 출고 삭제 -> 재고 증가)
+                success, message = delete_transactions_with_reversal(
+                    [page_transactions[idx] for idx in selected_indices]
                 )
+                if success:
+                    st.success(message)
+                    st.rerun()
+                else:
+                    st.error(f"재고 업데이트 실패: {message}")
+            
+            # 조회 조건에 해당하는 내역 일괄 삭제 (잘못된 대량 등록 정리용)
+            with st.expander(f"조회 조건에 해당하는 내역 전체 삭제 ({total_count:,}건)"):
+                st.warning("현재 유형/물품/기간 조건에 해당하는 모든 페이지의 내역을 삭제하고 재고를 되돌립니다.")
+                confirm_delete_all = st.checkbox(f"{total_count:,}건을 모두 삭제합니다.")
                 
-                selected_transaction = display_transactions[selected_transaction_idx]
-                selected_transaction_id = selected_transaction['id']
-                
-                if st.button("선택한 거래 내역 삭제"):
-                    # 선택한 거래 내역 찾기
-                    transaction_to_delete = next((t for t in transactions if t['id'] == selected_transaction_id), None)
-                    
-                    if transaction_to_delete:
-                        # 재고 수량 복원
-                        item_id = transaction_to_delete['item_id']
-                        quantity = transaction_to_delete['quantity']
-                        trans_type = transaction_to_delete['transaction_type']
-                        
-                        # 입고 삭제 -> 재고 감소, 출고 삭제 -> 재고 증가
-                        reverse_type = "출고" if trans_type == "입고" else "입고"
-                        success, message = update_item_stock(item_id, quantity, transaction_type=reverse_type)
-                        
-                        if success:
-                            # 거래 내역에서 삭제
-                            transactions = [t for t in transactions if t['id'] != selected_transaction_id]
-                            save_inventory_transactions(transactions)
-                            st.success("거래 내역이 삭제되었습니다.")
-                            st.rerun()
-                        else:
-                            st.error(f"재고 업데이트 실패: {message}")
+                if st.button("조회 조건 전체 삭제", disabled=not confirm_delete_all):
+                    matched_transactions, _, _ = query_inventory_transactions(
+                        start_date, end_date, transaction_type, item_id, limit=total_count
+                    )
+                    success, message = delete_transactions_with_reversal(matched_transactions)
+                    if success:
+                        st.session_state['history_cursors'] = [None]
+                        st.success(message)
+                        st.rerun()
+                    else:
+                        st.error(f"재고 업데이트 실패: {message}")
+        elif len(cursors) > 1:
+            # 삭제 등으로 현재 페이지가 비면 첫 페이지로 돌아감
+            st.session_state['history_cursors'] = [None]
+            st.rerun()
         else:
             st.info("조회된 입출고 내역이 없습니다.")
     
@@ -175,7 +342,7 @@ def inventory_transaction_app():
                 # 거래처 ID 설정
                 supplier_id = None
                 if selected_supplier != "선택 안함":
-                    supplier = next((s for s in suppliers if s['name'] == selected_supplier), None)
+                    supplier = catalog.supplier_by_name(selected_supplier)
                     if supplier:
                         supplier_id = supplier['id']
                 
@@ -186,30 +353,22 @@ def inventory_transaction_app():
                         st.error(f"재고 부족! 현재 재고: {current_stock} {selected_item.get('unit', '')}")
                         st.stop()
                 
-                # 재고 업데이트
-                success, message = update_item_stock(
-                    selected_item['id'], 
-                    quantity, 
-                    transaction_type=transaction_type
-                )
+                # 새로운 거래 내역 데이터 생성
+                new_transaction = {
+                    'id': allocate_ids('inventory_transactions')[0],
+                    'transaction_type': transaction_type,
+                    'item_id': selected_item['id'],
+                    'quantity': quantity,
+                    'supplier_id': supplier_id,
+                    'transaction_date': transaction_date.strftime("%Y-%m-%d"),
+                    'note': note,
+                    'created_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                }
+                
+                # 재고 업데이트와 거래 내역 추가 (내역 기록에 실패하면 재고를 되돌림)
+                success, message = record_stock_transactions([new_transaction])
                 
                 if success:
-                    # 새로운 거래 내역 데이터 생성
-                    new_transaction = {
-                        'id': generate_id(transactions),
-                        'transaction_type': transaction_type,
-                        'item_id': selected_item['id'],
-                        'quantity': quantity,
-                        'supplier_id': supplier_id,
-                        'transaction_date': transaction_date.strftime("%Y-%m-%d"),
-                        'note': note,
-                        'created_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    }
-                    
-                    # 거래 내역 추가
-                    transactions.append(new_transaction)
-                    save_inventory_transactions(transactions)
-                    
                     st.success(f"{transaction_type} 내역이 등록되었습니다.")
                     st.rerun()
                 else:
@@ -260,118 +419,20 @@ def inventory_transaction_app():
         
         if uploaded_file:
             try:
-                df = pd.read_csv(uploaded_file)
+                read_csv_kwargs = {'dtype': {'거래유형': str, '물품명': str, '거래처명': str, '참고사항': str}}
+                preview_df = pd.read_csv(uploaded_file, nrows=5, **read_csv_kwargs)
                 st.write("업로드된 데이터 미리보기:")
-                st.dataframe(df.head())
+                st.dataframe(preview_df)
                 
-                if st.button("대량 등록 실행"):
-                    # 필수 컬럼 확인
-                    required_columns = ['거래유형', '물품명', '수량']
-                    missing_columns = [col for col in required_columns if col not in df.columns]
-                    
-                    if missing_columns:
-                        st.error(f"CSV 파일에 다음 필수 컬럼이 없습니다: {', '.join(missing_columns)}")
-                    else:
-                        # 데이터 처리
-                        success_count = 0
-                        error_count = 0
-                        error_messages = []
-                        
-                        for idx, row in df.iterrows():
-                            # 필수 데이터 확인
-                            transaction_type = row['거래유형']
-                            if transaction_type not in ['입고', '출고']:
-                                error_count += 1
-                                error_messages.append(f"오류 (행 {idx+2}): '거래유형'은 '입고' 또는 '출고'만 가능합니다.")
-                                continue
-                            
-                            # 물품 찾기
-                            item_name = row['물품명']
-                            item = next((i for i in items if i['name'] == item_name), None)
-                            
-                            if not item:
-                                error_count += 1
-                                error_messages.append(f"오류 (행 {idx+2}): 물품 '{item_name}'을(를) 찾을 수 없습니다.")
-                                continue
-                            
-                            # 수량 확인
-                            try:
-                                quantity = float(row['수량'])
-                                if quantity <= 0:
-                                    error_count += 1
-                                    error_messages.append(f"오류 (행 {idx+2}): 수량은 0보다 커야 합니다.")
-                                    continue
-                            except:
-                                error_count += 1
-                                error_messages.append(f"오류 (행 {idx+2}): 수량을 숫자로 변환할 수 없습니다.")
-                                continue
-                            
-                            # 거래처 찾기
-                            supplier_id = None
-                            if pd.notna(row.get('거래처명', '')) and row.get('거래처명', '') != '':
-                                supplier = next((s for s in suppliers if s['name'] == row['거래처명']), None)
-                                if supplier:
-                                    supplier_id = supplier['id']
-                            
-                            # 날짜 처리
-                            transaction_date = datetime.now().strftime("%Y-%m-%d")
-                            if pd.notna(row.get('거래일자', '')) and row.get('거래일자', '') != '':
-                                try:
-                                    # 여러 날짜 형식 지원
-                                    parsed_date = pd.to_datetime(row['거래일자'])
-                                    transaction_date = parsed_date.strftime("%Y-%m-%d")
-                                except:
-                                    # 날짜 형식이 잘못된 경우 현재 날짜로 대체
-                                    pass
-                            
-                            # 출고 시 재고 확인
-                            if transaction_type == "출고":
-                                current_stock = item.get('stock', 0)
-                                if quantity > current_stock:
-                                    error_count += 1
-                                    error_messages.append(f"오류 (행 {idx+2}): 재고 부족 - 물품 '{item_name}', 현재 재고: {current_stock}, 필요 수량: {quantity}")
-                                    continue
-                            
-                            # 재고 업데이트
-                            success, message = update_item_stock(
-                                item['id'], 
-                                quantity, 
-                                transaction_type=transaction_type
-                            )
-                            
-                            if success:
-                                # 새로운 거래 내역 데이터 생성
-                                new_transaction = {
-                                    'id': generate_id(transactions),
-                                    'transaction_type': transaction_type,
-                                    'item_id': item['id'],
-                                    'quantity': quantity,
-                                    'supplier_id': supplier_id,
-                                    'transaction_date': transaction_date,
-                                    'note': row.get('참고사항', ''),
-                                    'created_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                                }
-                                
-                                # 거래 내역 추가
-                                transactions.append(new_transaction)
-                                success_count += 1
-                            else:
-                                error_count += 1
-                                error_messages.append(f"오류 (행 {idx+2}): 재고 업데이트 실패 - {message}")
-                        
-                        # 결과 저장 및 표시
-                        if success_count > 0:
-                            save_inventory_transactions(transactions)
-                            st.success(f"{success_count}개의 입출고 내역이 성공적으로 등록되었습니다.")
-                        
-                        if error_count > 0:
-                            st.error(f"{error_count}개의 입출고 내역 등록 중 오류가 발생했습니다.")
-                            for msg in error_messages:
-                                st.warning(msg)
-                        
-                        # 페이지 리로드
-                        if success_count > 0:
-                            st.rerun()
+                # 필수 컬럼 확인
+                required_columns = ['거래유형', '물품명', '수량']
+                missing_columns = [col for col in required_columns if col not in preview_df.columns]
+                
+                if missing_columns:
+                    st.error(f"CSV 파일에 다음 필수 컬럼이 없습니다: {', '.join(missing_columns)}")
+                else:
+                    # 청크 단위로 검증/저장하며 진행률 표시
+                    chunked_import_ui(uploaded_file, 'inventory_transactions', '입출고 내역', import_transaction_chunk, read_csv_kwargs)
                             
             except Exception as e:
                 st.error(f"파일 처리 중 오류가 발생했습니다: {str(e)}") 
\ No newline at end of file
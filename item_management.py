@@ -1,7 +1,56 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-from utils import load_items, save_items, load_suppliers, generate_id, validate_item_data
+from utils import (
+    load_items, load_suppliers, allocate_ids, validate_item_data, validate_items_batch,
+    upsert_records, delete_records, text_column
+)
+from catalog import get_catalog
+from bulk_import import chunked_import_ui, import_record_chunk
+
+# 대량 등록 CSV의 문자열 컬럼 (품번 등이 숫자로 읽히지 않도록 함)
+ITEM_TEXT_COLUMNS = ['물품명', '품번', '카테고리', '거래처명', '단위', '설명']
+
+def build_item_candidates(df, catalog):
+    """대량 등록 CSV를 물품 레코드 형태의 DataFrame으로 변환"""
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    
+    def text(column):
+        return text_column(df, column)
+    
+    def number(column):
+        if column not in df.columns:
+            return pd.Series(0.0, index=df.index)
+        return pd.to_numeric(df[column], errors='coerce').fillna(0).astype(float)
+    
+    # 거래처명 -> 거래처 ID (없으면 None)
+    supplier_ids = pd.Series(
+        [
+            supplier['id'] if supplier else None
+            for supplier in map(catalog.supplier_by_name, text('거래처명'))
+        ],
+        index=df.index,
+        dtype=object
+    )
+    
+    return pd.DataFrame({
+        'name': text('물품명'),
+        'item_code': text('품번'),
+        'category': text('카테고리'),
+        'supplier_id': supplier_ids,
+        'unit': text('단위'),
+        'stock': number('초기재고'),
+        'opening_stock': number('초기재고'),
+        'unit_price': number('단가'),
+        'description': text('설명'),
+        'created_at': now,
+        'updated_at': now
+    }, index=df.index)
+
+def import_item_chunk(chunk):
+    """대량 등록 청크 하나를 일괄 검증 후 저장하고 (성공 건수, 행별 오류) 반환"""
+    candidates = build_item_candidates(chunk, get_catalog())
+    return import_record_chunk('items', candidates, validate_items_batch(candidates))
 
 def item_management_app():
     st.title("물품 관리")
@@ -12,6 +61,7 @@ def item_management_app():
     # 물품 데이터 로드
     items = load_items()
     suppliers = load_suppliers()
+    catalog = get_catalog()
     
     # 물품 목록 표시 탭
     with tab1:
@@ -53,8 +103,7 @@ def item_management_app():
                 with delete_col:
                     if st.button("선택한 물품 삭제"):
                         # 물품 삭제 프로세스
-                        items = [item for item in items if item['id'] != selected_item_data['id']]
-                        save_items(items)
+                        delete_records('items', [selected_item_data['id']])
                         st.success(f"물품 '{selected_item}'이(가) 삭제되었습니다.")
                         st.rerun()
         else:
@@ -73,7 +122,7 @@ def item_management_app():
                 
                 # 거래처 선택 옵션
                 supplier_options = ["선택 안함"] + [s['name'] for s in suppliers]
-                current_supplier = next((s['name'] for s in suppliers if s['id'] == edit_data.get('supplier_id')), "선택 안함")
+                current_supplier = catalog.supplier_name(edit_data.get('supplier_id'), "선택 안함")
                 selected_supplier = st.selectbox("거래처", options=supplier_options, index=supplier_options.index(current_supplier) if current_supplier in supplier_options else 0)
                 
                 unit = st.text_input("단위", edit_data.get('unit', ''))
@@ -87,7 +136,7 @@ def item_management_app():
                     # 거래처 ID 설정
                     supplier_id = None
                     if selected_supplier != "선택 안함":
-                        supplier_data = next((s for s in suppliers if s['name'] == selected_supplier), None)
+                        supplier_data = catalog.supplier_by_name(selected_supplier)
                         if supplier_data:
                             supplier_id = supplier_data['id']
                     
@@ -110,15 +159,17 @@ def item_management_app():
                     
                     if is_valid:
                         # 물품 정보 업데이트
-                        for i, item in enumerate(items):
+                        for item in items:
                             if item['id'] == edit_data['id']:
-                                items[i] = updated_item
                                 # created_at 값 보존
                                 if 'created_at' in item:
-                                    items[i]['created_at'] = item['created_at']
+                                    updated_item['created_at'] = item['created_at']
+                                # 재고 대사 기준인 기초 재고 보존
+                                if 'opening_stock' in item:
+                                    updated_item['opening_stock'] = item['opening_stock']
                                 break
                         
-                        save_items(items)
+                        upsert_records('items', [updated_item])
                         st.success(f"물품 '{name}'의 정보가 수정되었습니다.")
                         
                         # 세션 상태 초기화
@@ -155,19 +206,19 @@ def item_management_app():
                 # 거래처 ID 설정
                 supplier_id = None
                 if selected_supplier != "선택 안함":
-                    supplier_data = next((s for s in suppliers if s['name'] == selected_supplier), None)
+                    supplier_data = catalog.supplier_by_name(selected_supplier)
                     if supplier_data:
                         supplier_id = supplier_data['id']
                 
                 # 새 물품 데이터 구성
                 new_item = {
-                    'id': generate_id(items),
                     'name': name,
                     'item_code': item_code,
                     'category': category,
                     'supplier_id': supplier_id,
                     'unit': unit,
                     'stock': stock,
+                    'opening_stock': stock,  # 재고 대사 기준 (입출고 내역 없이 등록된 초기 재고)
                     'unit_price': unit_price,
                     'description': description,
                     'created_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
@@ -178,8 +229,8 @@ def item_management_app():
                 is_valid, message = validate_item_data(new_item)
                 
                 if is_valid:
-                    items.append(new_item)
-                    save_items(items)
+                    new_item = {'id': allocate_ids('items')[0], **new_item}
+                    upsert_records('items', [new_item])
                     st.success(f"물품 '{name}'이(가) 등록되었습니다.")
                     # 폼 초기화를 위한 페이지 리로드
                     st.rerun()
@@ -217,76 +268,17 @@ def item_management_app():
         
         if uploaded_file:
             try:
-                df = pd.read_csv(uploaded_file)
+                read_csv_kwargs = {'dtype': {column: str for column in ITEM_TEXT_COLUMNS}}
+                preview_df = pd.read_csv(uploaded_file, nrows=5, **read_csv_kwargs)
                 st.write("업로드된 데이터 미리보기:")
-                st.dataframe(df.head())
+                st.dataframe(preview_df)
                 
-                if st.button("대량 등록 실행"):
-                    # 필수 컬럼 확인
-                    if '물품명' not in df.columns:
-                        st.error("CSV 파일에 '물품명' 컬럼이 없습니다.")
-                    else:
-                        # 데이터 변환 및 저장
-                        success_count = 0
-                        error_count = 0
-                        error_messages = []
-                        
-                        for idx, row in df.iterrows():
-                            # 거래처 ID 찾기
-                            supplier_id = None
-                            if pd.notna(row.get('거래처명', '')) and row.get('거래처명', '') != '':
-                                supplier_data = next((s for s in suppliers if s['name'] == row.get('거래처명')), None)
-                                if supplier_data:
-                                    supplier_id = supplier_data['id']
-                            
-                            try:
-                                stock = float(row.get('초기재고', 0))
-                            except:
-                                stock = 0
-                                
-                            try:
-                                unit_price = float(row.get('단가', 0))
-                            except:
-                                unit_price = 0
-                                
-                            # 새 물품 데이터 구성
-                            new_item = {
-                                'id': generate_id(items),
-                                'name': row.get('물품명', ''),
-                                'item_code': row.get('품번', ''),
-                                'category': row.get('카테고리', ''),
-                                'supplier_id': supplier_id,
-                                'unit': row.get('단위', ''),
-                                'stock': stock,
-                                'unit_price': unit_price,
-                                'description': row.get('설명', ''),
-                                'created_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                                'updated_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                            }
-                            
-                            # 데이터 유효성 검사
-                            is_valid, message = validate_item_data(new_item)
-                            
-                            if is_valid:
-                                items.append(new_item)
-                                success_count += 1
-                            else:
-                                error_count += 1
-                                error_messages.append(f"오류 (행 {idx+2}): {message} - {row.get('물품명', '')}")
-                        
-                        # 결과 저장 및 표시
-                        if success_count > 0:
-                            save_items(items)
-                            st.success(f"{success_count}개의 물품이 성공적으로 등록되었습니다.")
-                        
-                        if error_count > 0:
-                            st.error(f"{error_count}개의 물품 등록 중 오류가 발생했습니다.")
-                            for msg in error_messages:
-                                st.warning(msg)
-                        
-                        # 페이지 리로드
-                        if success_count > 0:
-                            st.rerun()
+                # 필수 컬럼 확인
+                if '물품명' not in preview_df.columns:
+                    st.error("CSV 파일에 '물품명' 컬럼이 없습니다.")
+                else:
+                    # 청크 단위로 검증/저장하며 진행률 표시
+                    chunked_import_ui(uploaded_file, 'items', '물품', import_item_chunk, read_csv_kwargs)
                             
             except Exception as e:
                 st.error(f"파일 처리 중 오류가 발생했습니다: {str(e)}") 
\ No newline at end of file
@@ -0,0 +1,160 @@
+import threading
+from datetime import date as date_type, datetime, timedelta
+import pandas as pd
+import repository
+from aggregates import item_summary, first_transaction_date
+from catalog import get_catalog
+
+# 월말 재고 체크포인트
+# 체크포인트 날짜('YYYY-MM-DD', 월말) -> 물품 ID(문자열) -> 그날까지의 누적 순증감
+# 기준일 재고 조회는 가장 가까운 이전 체크포인트 이후의 내역만 다시 계산합니다.
+CHECKPOINTS_DATASET = 'stock_checkpoints'
+
+_lock = threading.Lock()
+
+
+def _to_date_string(value):
+    if isinstance(value, (datetime, date_type)):
+        return value.strftime("%Y-%m-%d")
+    return str(value)
+
+
+def _next_day(date_string):
+    return (datetime.strptime(date_string, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+
+
+def _month_ends(first_date, before_month):
+    """first_date가 속한 월부터 before_month('YYYY-MM') 직전 월까지의 월말 날짜 목록"""
+    month_ends = []
+    month = pd.Period(first_date[:7], freq='M')
+    last = pd.Period(before_month, freq='M')
+    while month < last:
+        month_ends.append(month.end_time.strftime("%Y-%m-%d"))
+        month += 1
+    return month_ends
+
+
+def signed_item_net(transactions):
+    """입출고 내역 -> 물품별 순증감 Series (입고 +, 출고 -)"""
+    df = pd.DataFrame(list(transactions), columns=['transaction_type', 'item_id', 'quantity'])
+    if df.empty:
+        return pd.Series(dtype=float)
+    signed = df['quantity'].astype(float).where(df['transaction_type'] == '입고', -df['quantity'].astype(float))
+    return signed.groupby(df['item_id'].astype('int64')).sum()
+
+
+def build_checkpoints(month_ends):
+    """일별 물품 집계로 월말 누적 순증감을 한 번에 계산 (물품 x 월 피벗 후 누적합)"""
+    summary = item_summary()
+    if summary.empty or not month_ends:
+        return {}
+    summary = summary[summary['item_id'].str.fullmatch(r'\d+')].copy()
+    summary['net'] = summary['quantity'].where(summary['transaction_type'] == '입고', -summary['quantity'])
+    # 각 거래일을 그날 이후 첫 월말 체크포인트에 배정 (거래일이 없는 내역은 가장 처음)
+    checkpoint_dates = pd.Series(sorted(month_ends))
+    positions = checkpoint_dates.searchsorted(summary['transaction_date'], side='left')
+    in_range = positions < len(checkpoint_dates)
+    summary = summary[in_range]
+    summary['checkpoint'] = checkpoint_dates.to_numpy()[positions[in_range]]
+
+    monthly = summary.pivot_table(index='item_id', columns='checkpoint', values='net', aggfunc='sum', fill_value=0)
+    monthly = monthly.reindex(columns=checkpoint_dates, fill_value=0)
+    cumulative = monthly.cumsum(axis=1)
+    return {
+        checkpoint: {item_id: float(value) for item_id, value in cumulative[checkpoint].items() if value != 0}
+        for checkpoint in cumulative.columns
+    }
+
+
+def load_checkpoints():
+    """월말 체크포인트 로드 (지난 월 중 빠진 체크포인트는 한 번에 계산하여 저장)"""
+    checkpoints = repository.load(CHECKPOINTS_DATASET, default={})
+    first_date = first_transaction_date()
+    if first_date is None:
+        return checkpoints
+    expected = _month_ends(first_date, datetime.now().strftime("%Y-%m"))
+    if all(checkpoint in checkpoints for checkpoint in expected):
+        return checkpoints
+    with _lock:
+        checkpoints = build_checkpoints(expected)
+        repository.save(CHECKPOINTS_DATASET, checkpoints)
+    return checkpoints
+
+
+def invalidate_checkpoints(from_date):
+    """from_date 이후 체크포인트 삭제 (과거 날짜 내역이 추가/삭제되었을 때, 다음 조회 시 다시 계산)"""
+    with _lock:
+        checkpoints = repository.load(CHECKPOINTS_DATASET, default={})
+        stale = [checkpoint for checkpoint in checkpoints if not from_date or checkpoint >= from_date]
+        if stale:
+            repository.save(
+                CHECKPOINTS_DATASET,
+                {checkpoint: values for checkpoint, values in checkpoints.items() if checkpoint not in stale}
+            )
+
+
+def cumulative_net_as_of(as_of, checkpoints):
+    """as_of 일자까지의 물품별 누적 순증감 (가장 가까운 이전 체크포인트 + 이후 내역만 재계산)"""
+    base_dates = [checkpoint for checkpoint in checkpoints if checkpoint <= as_of]
+    if base_dates:
+        base = max(base_dates)
+        base_net = pd.Series(checkpoints[base], dtype=float)
+        base_net.index = base_net.index.astype('int64')
+        replay = repository.load_transactions_between(_next_day(base), as_of)
+    else:
+        base_net = pd.Series(dtype=float)
+        # 거래일이 없는 내역은 가장 오래된 것으로 취급
+        replay = [
+            t for t in repository.load('inventory_transactions')
+            if (t.get('transaction_date') or '') <= as_of
+        ]
+    return base_net.add(signed_item_net(replay), fill_value=0)
+
+
+def implied_opening_stock(current, total_net):
+    """기초 재고 = 현재 재고 - 전체 내역 순증감 (물품 ID -> 수량 Series)
+
+    기준일 재고 역산과 재고 대사(opening_stock이 없는 기존 물품의 기초 재고)가 함께 쓰는 정의입니다.
+    """
+    return current - total_net.reindex(current.index, fill_value=0)
+
+
+def stock_as_of(as_of):
+    """기준일 마감 시점의 전체 물품 재고 (물품 ID -> 재고 Series)
+
+    기준일 재고 = 기초 재고(implied_opening_stock) + 기준일까지 누적 순증감으로 계산합니다.
+    """
+    as_of = _to_date_string(as_of)
+    catalog = get_catalog()
+    current = pd.Series(
+        {item_id: float(item.get('stock', 0) or 0) for item_id, item in catalog.items_by_id.items()},
+        dtype=float
+    )
+    checkpoints = load_checkpoints()
+    latest = max(checkpoints) if checkpoints else None
+    # 전체 누적 순증감 (가장 최근 체크포인트 이후 내역만 읽음)
+    if latest:
+        total_net = pd.Series(checkpoints[latest], dtype=float)
+        total_net.index = total_net.index.astype('int64')
+        total_net = total_net.add(
+            signed_item_net(repository.load_transactions_between(_next_day(latest))), fill_value=0
+        )
+    else:
+        total_net = signed_item_net(repository.load('inventory_transactions'))
+    opening = implied_opening_stock(current, total_net)
+    return opening + cumulative_net_as_of(as_of, checkpoints).reindex(current.index, fill_value=0)
+
+
+def stock_as_of_table(as_of):
+    """기준일 재고 표시용 DataFrame (물품명, 품번, 단위, 기준일 재고, 현재 재고)"""
+    catalog = get_catalog()
+    stock = stock_as_of(as_of)
+    items = catalog.item_frame().set_index('item_id')
+    table = pd.DataFrame({
+        '물품명': items['item_name'],
+        '품번': items['item_code'].fillna(''),
+        '단위': items['unit'].fillna(''),
+        '기준일 재고': stock.reindex(items.index).fillna(0),
+        '현재 재고': pd.Series({i: catalog.item(i).get('stock', 0) for i in items.index}, dtype=float),
+    })
+    return table.reset_index(drop=True)
@@ -0,0 +1,125 @@
+import threading
+import numpy as np
+import pandas as pd
+from bom_matrix import get_compiled_bom
+from catalog import get_catalog
+from storage import get_storage
+from reservations import get_reservation_ledger, RESERVATIONS_DATASET
+
+# 일괄 소요량 계획 (MRP)
+# 여러 생산 오더를 제품별로 합친 뒤, 컴파일된 제품 x 최하위 자재 소요량 CSR 행렬과 곱해
+# 자재별 총소요량을 한 번에 구하고 가용 재고(재고 - 예약)와 비교하여 부족 수량을 계산합니다.
+PLAN_COLUMNS = [
+    'material_id', 'name', 'unit', 'gross_requirement', 'stock', 'reserved', 'available', 'shortage', 'sufficient'
+]
+
+
+# 최대 생산 가능 수량 캐시 ((물품 버전, BOM 버전, 예약 버전), 제품 ID -> 수량 Series)
+_buildable = None
+_buildable_versions = None
+_lock = threading.Lock()
+
+
+def order_vector(orders):
+    """(제품 ID, 수량) 오더 목록 -> 제품별 합계 수량 Series (index: 제품 ID)"""
+    df = pd.DataFrame(list(orders), columns=['product_id', 'quantity'])
+    df['quantity'] = pd.to_numeric(df['quantity'], errors='coerce').fillna(0)
+    df = df[df['quantity'] > 0]
+    return df.groupby(df['product_id'].astype('int64'))['quantity'].sum()
+
+
+def current_stock(catalog):
+    """물품 ID -> 현재 재고 Series"""
+    return pd.Series(
+        {item_id: float(item.get('stock', 0) or 0) for item_id, item in catalog.items_by_id.items()},
+        dtype=float
+    )
+
+
+def plan_orders(orders):
+    """여러 생산 오더의 자재별 총소요량과 부족 수량 계산
+
+    orders는 (제품 ID, 수량) 목록이며, 반환값은 (계획 DataFrame, 메시지)입니다.
+    BOM이 없거나 순환 참조가 있는 제품이 있으면 (None, 오류 메시지)를 반환합니다.
+    """
+    compiled = get_compiled_bom()
+    catalog = get_catalog()
+    demand = order_vector(orders)
+    if demand.empty:
+        return None, "계획할 생산 오더가 없습니다."
+
+    positions = compiled.positions(demand.index)
+    # 컴파일 결과에 없는 제품(-1)은 인덱싱하지 않음 (BOM이 비어 있으면 is_assembly 길이가 0)
+    known = positions >= 0
+    assembly = np.zeros(len(positions), dtype=bool)
+    assembly[known] = compiled.is_assembly[positions[known]]
+    missing = demand.index[~assembly]
+    if len(missing):
+        names = ", ".join(catalog.item_name(product_id, str(product_id)) for product_id in missing)
+        return None, f"BOM 정보가 없는 제품이 있습니다: {names}"
+    cyclic = [product_id for product_id in demand.index if product_id in compiled.cyclic]
+    if cyclic:
+        names = ", ".join(catalog.item_name(product_id, str(product_id)) for product_id in cyclic)
+        return None, f"BOM 순환 참조가 있는 제품이 있습니다: {names}"
+
+    # 소요량 행렬 x 오더 벡터
+    material_ids, quantities = compiled.gross_requirements(demand.index.to_numpy(), demand.to_numpy())
+    gross = pd.Series(quantities, index=material_ids)
+
+    materials = catalog.item_frame().set_index('item_id')
+    stock = current_stock(catalog)
+    ledger = get_reservation_ledger()
+    plan = pd.DataFrame({
+        'material_id': gross.index,
+        'name': materials['item_name'].reindex(gross.index).fillna("알 수 없음").to_numpy(),
+        'unit': materials['unit'].reindex(gross.index).fillna('').to_numpy(),
+        'gross_requirement': gross.to_numpy(),
+        'stock': stock.reindex(gross.index).fillna(0).to_numpy(),
+        'reserved': [ledger.reserved(material_id) for material_id in gross.index.tolist()],
+    }, columns=PLAN_COLUMNS[:6])
+    plan['available'] = plan['stock'] - plan['reserved']
+    plan['shortage'] = (plan['gross_requirement'] - plan['available']).clip(lower=0)
+    plan['sufficient'] = plan['shortage'] <= 0
+    plan = plan.sort_values(['sufficient', 'name']).reset_index(drop=True)
+
+    shortages = int((~plan['sufficient']).sum())
+    return plan, f"{len(demand)}개 제품, 자재 {len(plan)}종 중 {shortages}종 부족"
+
+
+def compute_max_buildable():
+    """BOM이 있는 모든 제품의 최대 생산 가능 수량을 한 번에 계산 (제품 ID -> 수량 Series)
+
+    제품별로 최하위 자재마다 floor(가용 재고 / 1단위당 소요량)를 구해 그 최솟값을 취합니다.
+    가용 재고는 다른 생산 오더가 예약한 수량을 뺀 값이며, 순환 참조에 걸린 제품은 제외됩니다.
+    """
+    compiled = get_compiled_bom()
+    product_ids, buildable = compiled.max_buildable(
+        compiled.stock_vector(get_catalog(), get_reservation_ledger())
+    )
+    return pd.Series(buildable, index=product_ids, dtype='int64')
+
+
+def max_buildable():
+    """최대 생산 가능 수량 (물품 재고, BOM, 재고 예약이 바뀔 때까지 캐시)"""
+    global _buildable, _buildable_versions
+    storage = get_storage()
+    versions = (storage.version('items'), storage.version('bom'), storage.version(RESERVATIONS_DATASET))
+    with _lock:
+        if _buildable is None or _buildable_versions != versions:
+            _buildable = compute_max_buildable()
+            _buildable_versions = versions
+        return _buildable
+
+
+def plan_table(plan):
+    """일괄 계획 표시용 DataFrame"""
+    return plan.rename(columns={
+        'name': '자재명',
+        'unit': '단위',
+        'gross_requirement': '총소요량',
+        'stock': '현재재고',
+        'reserved': '예약',
+        'available': '가용재고',
+        'shortage': '부족수량',
+        'sufficient': '재고충분'
+    })[['자재명', '단위', '총소요량', '현재재고', '예약', '가용재고', '부족수량', '재고충분']]
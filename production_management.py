@@ -1,24 +1,32 @@
+import time
 import streamlit as st
 import pandas as pd
 from datetime import datetime
 from utils import (
-    load_items, load_bom, load_inventory_transactions, save_inventory_transactions,
-    generate_id, update_item_stock, calculate_materials_for_production
+    load_bom, calculate_materials_for_production, explode_bom_tree, execute_production
 )
+from catalog import get_catalog
+from mrp import plan_orders, plan_table, max_buildable
+from production_orders import (
+    STATUS_LABELS, STATUS_PLANNED, STATUS_RELEASED, STATUS_FAILED,
+    load_orders, create_orders, release_orders, delete_orders, start_worker
+)
+
+# 생산 오더 상태 자동 새로고침 주기 (초)
+ORDER_REFRESH_SECONDS = 2
 
 def production_management_app():
     st.title("생산 관리")
     st.write("BOM 기반으로 생산에 필요한 자재 목록을 생성할 수 있습니다.")
     
     # 데이터 로드
-    items = load_items()
     bom_data = load_bom()
-    transactions = load_inventory_transactions()
+    catalog = get_catalog()
     
     # BOM이 설정된 제품만 필터링
     products_with_bom = []
     for product_id_str in bom_data.keys():
-        product = next((item for item in items if str(item['id']) == product_id_str), None)
+        product = catalog.item(int(product_id_str))
         if product:
             products_with_bom.append(product)
     
@@ -26,8 +34,11 @@ def production_management_app():
         st.warning("BOM이 설정된 제품이 없습니다. 먼저 물품과 BOM을 등록해주세요.")
         return
     
-    # 탭 분리 (생산 계획/생산 실행)
-    tab1, tab2 = st.tabs(["생산 계획", "생산 실행"])
+    # 릴리스된 생산 오더를 처리하는 백그라운드 작업 스레드 (프로세스당 하나)
+    worker = start_worker()
+    
+    # 탭 분리 (생산 계획/생산 실행/일괄 계획/생산 오더)
+    tab1, tab2, tab3, tab4 = st.tabs(["생산 계획", "생산 실행", "일괄 계획", "생산 오더"])
     
     # 생산 계획 탭
     with tab1:
@@ -43,6 +54,11 @@ def production_management_app():
         
         selected_product = products_with_bom[selected_product_idx]
         
+        # 현재 재고로 생산 가능한 최대 수량 (다단계 BOM 전개 기준)
+        buildable = max_buildable()
+        if selected_product['id'] in buildable.index:
+            st.info(f"최대 생산 가능 수량: {int(buildable[selected_product['id']])}{selected_product.get('unit', '')}")
+        
         # 생산 수량 입력
         production_quantity = st.number_input(
             "생산 수량", 
@@ -68,8 +84,11 @@ def production_management_app():
                 materials_df = materials_df.rename(columns={
                     'id': '자재ID',
                     'name': '자재명',
+                    'is_assembly': '반제품',
                     'required_quantity': '필요수량',
                     'current_stock': '현재재고',
+                    'reserved': '예약',
+                    'available': '가용재고',
                     'sufficient': '재고충분'
                 })
                 
@@ -84,6 +103,12 @@ def production_management_app():
                 styled_df = materials_df.style.applymap(highlight_sufficient, subset=['재고충분'])
                 st.dataframe(styled_df)
                 
+                # 반제품을 포함한 다단계 전개 구조
+                bom_tree, _ = explode_bom_tree(selected_product['id'], production_quantity)
+                if bom_tree is not None:
+                    with st.expander("다단계 BOM 전개 구조"):
+                        st.dataframe(bom_tree)
+                
                 # 세션 상태에 생산 계획 저장 (생산 실행 탭에서 사용)
                 st.session_state['production_plan'] = {
                     'product': selected_product,
@@ -102,7 +127,8 @@ def production_management_app():
                             '자재명': m['name'],
                             '필요수량': m['required_quantity'],
                             '현재재고': m['current_stock'],
-                            '부족수량': m['required_quantity'] - m['current_stock']
+                            '가용재고': m['available'],
+                            '부족수량': m['required_quantity'] - m['available']
                         } for m in insufficient_materials
                     ])
                     st.dataframe(insufficient_df)
@@ -136,7 +162,8 @@ def production_management_app():
                         '자재명': m['name'],
                         '필요수량': m['required_quantity'],
                         '현재재고': m['current_stock'],
-                        '부족수량': m['required_quantity'] - m['current_stock']
+                        '가용재고': m['available'],
+                        '부족수량': m['required_quantity'] - m['available']
                     } for m in insufficient_materials
                 ])
                 st.dataframe(insufficient_df)
@@ -149,66 +176,162 @@ def production_management_app():
                 production_note = st.text_area("생산 비고", "")
                 
                 if st.button("생산 실행"):
-                    # 자재 출고 처리
-                    material_errors = []
+                    # 최신 재고로 다시 확인한 뒤 자재 출고와 제품 입고를 한 번에 반영
+                    success, message = execute_production(
+                        product['id'], quantity, production_date, production_note
+                    )
                     
-                    for material in materials:
-                        # 자재 재고 감소 (출고 처리)
-                        success, message = update_item_stock(
-                            material['id'], 
-                            material['required_quantity'], 
-                            transaction_type="출고"
-                        )
+                    if success:
+                        st.success(message)
                         
-                        if not success:
-                            material_errors.append(f"자재 '{material['name']}' 출고 실패: {message}")
+                        # 세션 상태 초기화
+                        del st.session_state['production_plan']
+                        st.rerun()
+                    else:
+                        st.error(f"생산 실행 실패: {message}")
+    
+    # 일괄 계획 탭 (여러 생산 오더의 자재 소요량을 한 번에 계산)
+    with tab3:
+        st.subheader("일괄 계획")
+        st.write("여러 제품의 생산 오더를 입력하면 자재별 총소요량을 합산하여 현재 재고와 비교합니다.")
+        
+        product_names = [p['name'] for p in products_with_bom]
+        orders_df = st.data_editor(
+            pd.DataFrame({'제품': pd.Series(dtype=str), '수량': pd.Series(dtype=float)}),
+            num_rows="dynamic",
+            column_config={
+                '제품': st.column_config.SelectboxColumn("제품", options=product_names, required=True),
+                '수량': st.column_config.NumberColumn("수량", min_value=1, step=1, required=True)
+            },
+            key="batch_orders"
+        )
+        
+        orders = [
+            (catalog.item_by_name(name)['id'], quantity)
+            for name, quantity in zip(orders_df['제품'], orders_df['수량'])
+            if name and catalog.item_by_name(name) and pd.notna(quantity)
+        ]
+        
+        calculate_col, queue_col = st.columns(2)
+        with queue_col:
+            batch_date = st.date_input("생산 일자", datetime.now().date(), key="batch_production_date")
+            if st.button("생산 오더로 등록 및 릴리스"):
+                # 입력한 오더를 대기열에 올리면 백그라운드에서 실행됨
+                success, message = create_orders([
+                    {
+                        'product_id': product_id,
+                        'quantity': float(quantity),
+                        'production_date': batch_date.strftime("%Y-%m-%d"),
+                        'note': "일괄 계획"
+                    } for product_id, quantity in orders
+                ], release=True)
+                if success:
+                    st.success(f"{message} '생산 오더' 탭에서 진행 상태를 확인하세요.")
+                else:
+                    st.error(message)
+        
+        with calculate_col:
+            calculate_clicked = st.button("일괄 소요량 계산")
+        
+        if calculate_clicked:
+            plan, message = plan_orders(orders)
+            
+            if plan is not None:
+                st.success(message)
+                st.dataframe(plan_table(plan))
+                
+                shortage_df = plan_table(plan[~plan['sufficient']])
+                if not shortage_df.empty:
+                    st.warning("재고가 부족한 자재가 있습니다.")
+                    st.download_button(
+                        label="부족 자재 CSV 다운로드",
+                        data=shortage_df.to_csv(index=False).encode('utf-8'),
+                        file_name='mrp_shortages.csv',
+                        mime='text/csv'
+                    )
+            else:
+                st.error(message)
+    
+    # 생산 오더 탭 (대기열에 올린 오더는 백그라운드에서 묶음 단위로 실행)
+    with tab4:
+        st.subheader("생산 오더")
+        
+        # 작업 스레드의 마지막 처리 실패 (릴리스된 오더는 다음 주기에 다시 처리)
+        if worker.last_error:
+            st.error(f"생산 오더 처리 중 오류가 발생했습니다. 잠시 후 다시 시도합니다: {worker.last_error}")
+        
+        with st.form("add_production_order_form"):
+            order_product_name = st.selectbox("제품", [p['name'] for p in products_with_bom])
+            order_quantity = st.number_input("수량", min_value=1, value=1, step=1)
+            order_date = st.date_input("생산 일자", datetime.now().date())
+            order_note = st.text_input("비고")
+            release_now = st.checkbox("바로 릴리스", value=True)
+            
+            if st.form_submit_button("오더 등록"):
+                order_product = catalog.item_by_name(order_product_name)
+                success, message = create_orders([{
+                    'product_id': order_product['id'],
+                    'quantity': order_quantity,
+                    'production_date': order_date.strftime("%Y-%m-%d"),
+                    'note': order_note
+                }], release=release_now)
+                if success:
+                    st.success(message)
+                else:
+                    st.error(message)
+        
+        orders = load_orders()
+        if not orders:
+            st.info("등록된 생산 오더가 없습니다.")
+        else:
+            orders_table = pd.DataFrame([
+                {
+                    '오더ID': order['id'],
+                    '제품': catalog.item_name(order['product_id']),
+                    '수량': order['quantity'],
+                    '생산일자': order['production_date'],
+                    '상태': STATUS_LABELS.get(order['status'], order['status']),
+                    '결과': order.get('message', ''),
+                    '수정일시': order.get('updated_at', '')
+                } for order in sorted(orders, key=lambda order: order['id'], reverse=True)
+            ])
+            st.dataframe(orders_table)
+            
+            # 계획/실패 상태의 오더만 릴리스 또는 삭제 가능
+            editable = [order for order in orders if order['status'] in (STATUS_PLANNED, STATUS_FAILED)]
+            if editable:
+                selected_order_ids = st.multiselect(
+                    "릴리스/삭제할 오더 선택",
+                    [order['id'] for order in editable],
+                    format_func=lambda order_id: next(
+                        f"#{order['id']} {catalog.item_name(order['product_id'])} x {order['quantity']}"
+                        for order in editable if order['id'] == order_id
+                    )
+                )
+                release_col, delete_col = st.columns(2)
+                with release_col:
+                    if st.button("선택한 오더 릴리스"):
+                        success, message = release_orders(selected_order_ids)
+                        if success:
+                            st.success(message)
+                            st.rerun()
                         else:
-                            # 출고 내역 기록
-                            new_transaction = {
-                                'id': generate_id(transactions),
-                                'transaction_type': "출고",
-                                'item_id': material['id'],
-                                'quantity': material['required_quantity'],
-                                'supplier_id': None,
-                                'transaction_date': production_date.strftime("%Y-%m-%d"),
-                                'note': f"{product['name']} 생산을 위한 자재 출고",
-                                'created_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                            }
-                            transactions.append(new_transaction)
-                    
-                    # 오류가 없으면 제품 입고 처리
-                    if not material_errors:
-                        # 제품 재고 증가 (입고 처리)
-                        success, message = update_item_stock(
-                            product['id'], 
-                            quantity, 
-                            transaction_type="입고"
-                        )
-                        
+                            st.error(message)
+                with delete_col:
+                    if st.button("선택한 오더 삭제"):
+                        success, message = delete_orders(selected_order_ids)
                         if success:
-                            # 입고 내역 기록
-                            new_transaction = {
-                                'id': generate_id(transactions),
-                                'transaction_type': "입고",
-                                'item_id': product['id'],
-                                'quantity': quantity,
-                                'supplier_id': None,
-                                'transaction_date': production_date.strftime("%Y-%m-%d"),
-                                'note': f"생산 완료: {production_note}",
-                                'created_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                            }
-                            transactions.append(new_transaction)
-                            
-                            # 거래 내역 저장
-                            save_inventory_transactions(transactions)
-                            
-                            st.success(f"{product['name']} {quantity}{product.get('unit', '')} 생산이 완료되었습니다.")
-                            
-                            # 세션 상태 초기화
-                            del st.session_state['production_plan']
+                            st.success(message)
                             st.rerun()
                         else:
-                            st.error(f"제품 입고 처리 실패: {message}")
-                    else:
-                        for error in material_errors:
-                            st.error(error) 
\ No newline at end of file
+                            st.error(message)
+            
+            pending = sum(1 for order in orders if order['status'] == STATUS_RELEASED)
+            if pending:
+                st.info(f"{pending}건의 오더가 실행 대기 중입니다.")
+                if st.checkbox("진행 상태 자동 새로고침", value=False):
+                    time.sleep(ORDER_REFRESH_SECONDS)
+                    st.rerun()
+            
+            if st.button("상태 새로고침"):
+                st.rerun()
@@ -0,0 +1,185 @@
+import threading
+from datetime import datetime
+import repository
+from utils import allocate_ids, execute_production_batch
+from reservations import reserve_orders, release_reservations
+
+# 생산 오더
+# 계획(planned) -> 릴리스(released) -> 완료(completed) / 실패(failed)
+# 릴리스할 때 자재를 예약하고, 릴리스된 오더는 백그라운드 작업 스레드가 묶음 단위로 실행한 뒤 예약을 해제합니다.
+ORDERS_DATASET = 'production_orders'
+STATUS_PLANNED = 'planned'
+STATUS_RELEASED = 'released'
+STATUS_COMPLETED = 'completed'
+STATUS_FAILED = 'failed'
+STATUS_LABELS = {
+    STATUS_PLANNED: "계획",
+    STATUS_RELEASED: "릴리스",
+    STATUS_COMPLETED: "완료",
+    STATUS_FAILED: "실패",
+}
+WORKER_BATCH_SIZE = 20  # 한 번의 저장으로 실행할 최대 오더 수
+WORKER_POLL_SECONDS = 5.0  # 깨우는 신호가 없을 때 릴리스 오더를 확인하는 주기
+
+_lock = threading.RLock()
+_worker = None
+_wake = threading.Event()
+
+
+def _now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def load_orders(statuses=None):
+    """생산 오더 목록 (statuses를 주면 해당 상태만)"""
+    orders = repository.load(ORDERS_DATASET, default=[])
+    if statuses is None:
+        return orders
+    return [order for order in orders if order['status'] in statuses]
+
+
+def _update_orders(changes):
+    """오더 ID -> 변경할 필드 딕셔너리를 한 번의 저장으로 반영"""
+    with _lock:
+        orders = repository.load(ORDERS_DATASET, default=[])
+        now = _now()
+        updated = [
+            dict(order, **changes[order['id']], updated_at=now) if order['id'] in changes else order
+            for order in orders
+        ]
+        repository.save(ORDERS_DATASET, updated)
+
+
+def create_orders(orders, release=False):
+    """생산 오더 등록 (orders: product_id, quantity, production_date('YYYY-MM-DD'), note dict 목록)"""
+    orders = [order for order in orders if order.get('quantity', 0) > 0]
+    if not orders:
+        return False, "등록할 생산 오더가 없습니다."
+
+    now = _now()
+    new_ids = allocate_ids(ORDERS_DATASET, len(orders))
+    new_orders = [
+        {
+            'id': new_id,
+            'product_id': order['product_id'],
+            'quantity': order['quantity'],
+            'production_date': order['production_date'],
+            'note': order.get('note', ''),
+            'status': STATUS_PLANNED,
+            'message': '',
+            'created_at': now,
+            'updated_at': now
+        }
+        for new_id, order in zip(new_ids, orders)
+    ]
+    with _lock:
+        repository.save(ORDERS_DATASET, repository.load(ORDERS_DATASET, default=[]) + new_orders)
+    message = f"{len(new_orders)}건의 생산 오더가 등록되었습니다."
+    if release:
+        _, release_message = release_orders(new_ids)
+        message = f"{message} {release_message}"
+    return True, message
+
+
+def release_orders(order_ids):
+    """계획 상태의 오더를 릴리스하여 작업 대기열에 올림 (실패한 오더도 다시 릴리스 가능)
+
+    릴리스하면서 자재를 예약하며, 가용 재고가 부족하여 예약하지 못한 오더는 계획 상태로 남습니다.
+    """
+    order_ids = set(order_ids)
+    with _lock:
+        # 다른 세션이 같은 오더를 먼저 릴리스했을 수 있으므로 예약과 같은 잠금 안에서 상태를 다시 확인
+        targets = sorted(
+            (order for order in load_orders([STATUS_PLANNED, STATUS_FAILED]) if order['id'] in order_ids),
+            key=lambda order: order['id']
+        )
+        if not targets:
+            return False, "릴리스할 생산 오더가 없습니다."
+        reserved = reserve_orders(targets)
+        _update_orders({
+            order['id']: (
+                {'status': STATUS_RELEASED, 'message': ''} if reserved[order['id']][0]
+                else {'status': STATUS_PLANNED, 'message': reserved[order['id']][1]}
+            )
+            for order in targets
+        })
+    released = sum(1 for success, _ in reserved.values() if success)
+    if not released:
+        return False, f"생산 오더를 릴리스하지 못했습니다: {next(iter(reserved.values()))[1]}"
+    _wake.set()
+    if released < len(targets):
+        return True, f"{released}건을 릴리스했고, {len(targets) - released}건은 자재를 예약하지 못해 계획 상태로 남겼습니다."
+    return True, f"{released}건의 생산 오더를 릴리스했습니다."
+
+
+def delete_orders(order_ids):
+    """계획/실패 상태의 오더 삭제 (릴리스/완료된 오더는 삭제하지 않음)"""
+    order_ids = set(order_ids)
+    with _lock:
+        orders = repository.load(ORDERS_DATASET, default=[])
+        remaining = [
+            order for order in orders
+            if not (order['id'] in order_ids and order['status'] in (STATUS_PLANNED, STATUS_FAILED))
+        ]
+        deleted = len(orders) - len(remaining)
+        if deleted:
+            repository.save(ORDERS_DATASET, remaining)
+    if not deleted:
+        return False, "삭제할 수 있는 생산 오더가 없습니다."
+    return True, f"{deleted}건의 생산 오더가 삭제되었습니다."
+
+
+def process_released(batch_size=WORKER_BATCH_SIZE):
+    """릴리스된 오더를 등록 순서대로 한 묶음 실행하고 처리한 오더 수 반환
+
+    묶음 전체의 재고 반영과 입출고 내역은 각각 한 번씩 기록되고, 오더 상태도 한 번에 저장됩니다.
+    """
+    batch = sorted(load_orders([STATUS_RELEASED]), key=lambda order: order['id'])[:batch_size]
+    if not batch:
+        return 0
+    # 릴리스된 오더는 화면에서 수정/삭제할 수 없으므로 실행 중에는 오더 잠금을 잡지 않음
+    results = execute_production_batch(batch)
+    _update_orders({
+        order['id']: {
+            'status': STATUS_COMPLETED if success else STATUS_FAILED,
+            'message': message
+        }
+        for order, (success, message) in zip(batch, results)
+    })
+    # 실행한 오더는 자재를 소비했고 실패한 오더는 다시 릴리스할 때 새로 예약하므로 예약 해제
+    release_reservations([order['id'] for order in batch])
+    return len(batch)
+
+
+class ProductionWorker(threading.Thread):
+    """릴리스된 생산 오더를 처리하는 백그라운드 작업 스레드 (프로세스당 하나)"""
+
+    def __init__(self, batch_size=WORKER_BATCH_SIZE, poll_seconds=WORKER_POLL_SECONDS):
+        super().__init__(name="production-worker", daemon=True)
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.last_error = None
+
+    def run(self):
+        while True:
+            _wake.wait(self.poll_seconds)
+            _wake.clear()
+            try:
+                while process_released(self.batch_size):
+                    pass
+                self.last_error = None
+            except Exception as e:
+                # 오류가 나도 스레드는 유지하고 다음 주기에 다시 시도
+                self.last_error = str(e)
+
+
+def start_worker():
+    """백그라운드 작업 스레드 시작 (이미 실행 중이면 그대로 반환)"""
+    global _worker
+    with _lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = ProductionWorker()
+            _worker.start()
+            # 시작 전에 쌓여 있던 릴리스 오더도 바로 처리
+            _wake.set()
+        return _worker
@@ -0,0 +1,108 @@
+import sys
+from datetime import datetime
+import pandas as pd
+from storage import get_storage
+from catalog import get_catalog
+from utils import add_inventory_transactions, allocate_ids, upsert_records, stock_lock
+from ledger import implied_opening_stock
+
+# 재고 대사 설정
+RECONCILE_NOTE = "재고 대사 조정"
+RECONCILE_TOLERANCE = 1e-6  # 부동소수점 오차 허용 범위
+
+
+def backfill_opening_stock(ledger_net):
+    """기초 재고(opening_stock)가 없는 기존 물품에 한 번 채워 넣고 채운 물품 수 반환
+
+    기준일 재고 역산과 같은 정의(현재 재고 - 전체 내역 순증감)를 사용하므로,
+    채운 시점에는 일치하고 그 이후에 생긴 차이부터 대사에서 찾아냅니다.
+    """
+    with stock_lock():
+        missing = [item for item in get_catalog().items_by_id.values() if item.get('opening_stock') is None]
+        if not missing:
+            return 0
+        current = pd.Series({item['id']: float(item.get('stock', 0) or 0) for item in missing}, dtype=float)
+        opening = implied_opening_stock(current, ledger_net)
+        upsert_records('items', [dict(item, opening_stock=float(opening[item['id']])) for item in missing])
+    return len(missing)
+
+
+def reconcile_stock(tolerance=RECONCILE_TOLERANCE):
+    """물품 재고와 입출고 내역을 대사하여 차이가 나는 물품 목록 반환
+
+    예상 재고 = 기초 재고(opening_stock) + 입출고 내역 순증감이며,
+    순증감은 저장소에서 물품별 그룹 집계로 한 번에 계산합니다 (SQLite는 SQL 집계).
+    기초 재고가 없는 기존 물품은 먼저 backfill_opening_stock으로 채웁니다.
+    반환값은 차이가 있는 물품만 담은 DataFrame입니다.
+    """
+    ledger_net = pd.Series(get_storage().ledger_net_by_item(), dtype=float)
+    backfill_opening_stock(ledger_net)
+    catalog = get_catalog()
+    items = pd.DataFrame(
+        list(catalog.items_by_id.values()),
+        columns=['id', 'name', 'item_code', 'stock', 'opening_stock']
+    ).set_index('id')
+
+    report = pd.DataFrame({
+        'name': items['name'],
+        'item_code': items['item_code'].fillna(''),
+        'opening_stock': pd.to_numeric(items['opening_stock'], errors='coerce').fillna(0),
+        'ledger_net': ledger_net.reindex(items.index).fillna(0),
+        'stock': pd.to_numeric(items['stock'], errors='coerce').fillna(0),
+    })
+    report['expected_stock'] = report['opening_stock'] + report['ledger_net']
+    report['difference'] = report['stock'] - report['expected_stock']
+    mismatched = report[report['difference'].abs() > tolerance]
+    return mismatched.rename_axis('item_id').reset_index()
+
+
+def write_adjustments(report):
+    """대사 차이를 메우는 조정 입출고 내역 기록 (현재 재고를 기준으로 내역을 맞추며 재고는 바꾸지 않음)"""
+    if report.empty:
+        return True, "조정할 차이가 없습니다."
+
+    now = datetime.now()
+    new_ids = allocate_ids('inventory_transactions', len(report))
+    adjustments = [
+        {
+            'id': new_id,
+            'transaction_type': "입고" if difference > 0 else "출고",
+            'item_id': int(item_id),
+            'quantity': float(abs(difference)),
+            'supplier_id': None,
+            'transaction_date': now.strftime("%Y-%m-%d"),
+            'note': RECONCILE_NOTE,
+            'created_at': now.strftime("%Y-%m-%d %H:%M:%S")
+        }
+        for new_id, item_id, difference in zip(new_ids, report['item_id'], report['difference'])
+    ]
+    add_inventory_transactions(adjustments)
+    return True, f"{len(adjustments)}건의 재고 대사 조정 내역을 기록했습니다."
+
+
+def reconcile_table(report):
+    """대사 결과 표시용 DataFrame"""
+    return report.drop(columns=['item_id']).rename(columns={
+        'name': '물품명',
+        'item_code': '품번',
+        'opening_stock': '기초재고',
+        'ledger_net': '내역 순증감',
+        'expected_stock': '예상재고',
+        'stock': '현재재고',
+        'difference': '차이'
+    })[['물품명', '품번', '기초재고', '내역 순증감', '예상재고', '현재재고', '차이']]
+
+
+if __name__ == "__main__":
+    # 사용법: python reconcile.py [--fix]
+    get_storage().initialize()
+    report = reconcile_stock()
+    if report.empty:
+        print("재고와 입출고 내역이 일치합니다.")
+        sys.exit(0)
+    print(reconcile_table(report).to_string(index=False))
+    if "--fix" in sys.argv[1:]:
+        success, message = write_adjustments(report)
+        print(message)
+        sys.exit(0 if success else 1)
+    sys.exit(1)
@@ -0,0 +1,185 @@
+import heapq
+import threading
+from storage import get_storage
+
+# 프로세스 전역 데이터셋 캐시
+# Streamlit은 위젯을 조작할 때마다 스크립트를 다시 실행하지만 모듈은 프로세스에 한 번만
+# 로드되므로, 여기에 보관한 데이터는 재실행과 세션 사이에서 공유됩니다.
+_cache = {}  # dataset -> (version, data)
+_stats = {}  # dataset -> {'hits': n, 'misses': n}
+_window_cache = {}  # (start_date, end_date) -> (version, transactions)
+MAX_CACHED_WINDOWS = 8
+TRANSACTIONS_DATASET = 'inventory_transactions'
+_lock = threading.RLock()
+_listeners = []  # 쓰기 후 호출할 함수 (메모리 인덱스 증분 갱신용)
+
+
+def _count(dataset, key):
+    stats = _stats.setdefault(dataset, {'hits': 0, 'misses': 0})
+    stats[key] += 1
+
+
+def _copy(data):
+    """캐시 원본이 호출자의 추가/삭제로 바뀌지 않도록 컨테이너만 복사
+
+    레코드(dict) 자체는 공유되므로, 레코드를 수정했다면 반드시 저장해야 합니다.
+    """
+    if isinstance(data, dict):
+        return {key: list(value) if isinstance(value, list) else value for key, value in data.items()}
+    return list(data)
+
+
+def _row_id(row):
+    return row.get('id') or 0
+
+
+def load(dataset, default=None):
+    """데이터셋 로드 (버전이 바뀌지 않았으면 캐시에서 반환)"""
+    storage = get_storage()
+    version = storage.version(dataset)
+    with _lock:
+        cached = _cache.get(dataset)
+        if cached is not None and cached[0] == version:
+            _count(dataset, 'hits')
+            return _copy(cached[1])
+        _count(dataset, 'misses')
+        data = storage.load(dataset, default)
+        _cache[dataset] = (version, data)
+        return _copy(data)
+
+
+def add_write_listener(listener):
+    """쓰기 후 호출할 함수 등록
+
+    listener(dataset, kind, payload, version_before, version_after)로 호출되며 kind는
+    'save', 'upsert', 'append', 'delete' 중 하나입니다. 캐시 잠금을 푼 뒤 호출하므로
+    version_before가 자신이 알고 있는 버전과 같을 때만 증분 반영해야 합니다.
+    """
+    with _lock:
+        if listener not in _listeners:
+            _listeners.append(listener)
+
+
+def _write(dataset, kind, payload, update_cached):
+    """저장소에 기록한 뒤, 그 사이에 다른 변경이 없었다면 캐시도 같이 갱신"""
+    storage = get_storage()
+    with _lock:
+        version_before = storage.version(dataset)
+        getattr(storage, kind)(dataset, payload)
+        version_after = storage.version(dataset)
+        cached = _cache.get(dataset)
+        if cached is not None and cached[0] == version_before:
+            _cache[dataset] = (version_after, update_cached(cached[1]))
+        else:
+            _cache.pop(dataset, None)
+        listeners = list(_listeners)
+    for listener in listeners:
+        listener(dataset, kind, payload, version_before, version_after)
+
+
+def save(dataset, data):
+    """데이터셋 전체 저장"""
+    _write(dataset, 'save', data, lambda cached: _copy(data))
+
+
+def upsert(dataset, records):
+    """레코드 추가 또는 수정 (id 기준)"""
+    def update_cached(cached):
+        positions = {row.get('id'): idx for idx, row in enumerate(cached)}
+        rows = list(cached)
+        for record in records:
+            idx = positions.get(record['id'])
+            if idx is None:
+                positions[record['id']] = len(rows)
+                rows.append(record)
+            else:
+                rows[idx] = record
+        return rows
+
+    _write(dataset, 'upsert', records, update_cached)
+
+
+def append(dataset, records):
+    """새 레코드 추가"""
+    _write(dataset, 'append', records, lambda cached: list(cached) + list(records))
+
+
+def delete(dataset, ids):
+    """레코드 삭제 (id 기준)"""
+    ids = set(ids)
+    _write(dataset, 'delete', ids, lambda cached: [row for row in cached if row.get('id') not in ids])
+
+
+def drop(dataset):
+    """문서형 데이터셋 삭제 (캐시도 함께 제거)"""
+    storage = get_storage()
+    with _lock:
+        storage.drop(dataset)
+        _cache.pop(dataset, None)
+
+
+def tail(dataset, limit):
+    """id 기준 최근 레코드 limit개 조회 (오래된 순, 캐시되어 있으면 디스크를 읽지 않음)"""
+    storage = get_storage()
+    version = storage.version(dataset)
+    with _lock:
+        cached = _cache.get(dataset)
+        if cached is not None and cached[0] == version:
+            _count(dataset, 'hits')
+            if limit <= 0:
+                return []
+            # JSON 저장소의 전체 로드는 월 파티션 순서이므로 저장소 tail과 같은 id 순서로 맞춤
+            return sorted(heapq.nlargest(limit, cached[1], key=_row_id), key=_row_id)
+    return storage.tail(dataset, limit)
+
+
+def load_transactions_between(start_date=None, end_date=None):
+    """기간 안의 입출고 내역 로드 (전체 내역이 캐시되어 있으면 캐시에서, 아니면 필요한 파티션만 읽음)"""
+    storage = get_storage()
+    version = storage.version(TRANSACTIONS_DATASET)
+    key = (start_date, end_date)
+    with _lock:
+        cached = _window_cache.get(key)
+        if cached is not None and cached[0] == version:
+            _count(TRANSACTIONS_DATASET, 'hits')
+            return list(cached[1])
+        full = _cache.get(TRANSACTIONS_DATASET)
+    if full is not None and full[0] == version:
+        _count(TRANSACTIONS_DATASET, 'hits')
+        rows = [
+            t for t in full[1]
+            if (not start_date or (t.get('transaction_date') or '') >= start_date)
+            and (not end_date or (t.get('transaction_date') or '') <= end_date)
+        ]
+    else:
+        _count(TRANSACTIONS_DATASET, 'misses')
+        rows = storage.load_transactions_between(start_date, end_date)
+    with _lock:
+        # 조회한 기간 종류가 많아지면 기간 캐시를 비움
+        if len(_window_cache) >= MAX_CACHED_WINDOWS:
+            _window_cache.clear()
+        _window_cache[key] = (version, rows)
+    return list(rows)
+
+
+def allocate_ids(dataset, count=1):
+    """새 ID 블록 예약 (첫 번째 ID 반환)"""
+    return get_storage().allocate_ids(dataset, count)
+
+
+def invalidate(dataset=None):
+    """캐시 비우기 (dataset을 생략하면 전체)"""
+    with _lock:
+        if dataset is None:
+            _cache.clear()
+            _window_cache.clear()
+        else:
+            _cache.pop(dataset, None)
+            if dataset == TRANSACTIONS_DATASET:
+                _window_cache.clear()
+
+
+def cache_stats():
+    """데이터셋별 캐시 적중/실패 횟수"""
+    with _lock:
+        return {dataset: dict(stats) for dataset, stats in _stats.items()}
@@ -0,0 +1,151 @@
+import threading
+from datetime import datetime
+import repository
+from storage import get_storage
+from catalog import get_catalog
+from bom_engine import get_bom_engine, BomCycleError
+
+# 재고 예약 원장
+# 생산 오더를 릴리스할 때 출고 예정 수량(반제품 재고 우선 사용)을 예약하고, 실행(또는 실패) 시 해제합니다.
+# 물품별 예약 합계는 메모리에 유지하므로 가용 재고(재고 - 예약) 조회는 O(1)입니다.
+RESERVATIONS_DATASET = 'stock_reservations'
+
+
+class ReservationLedger:
+    """예약 레코드와 물품별/오더별 예약 합계"""
+
+    def __init__(self, reservations):
+        self.reservations = list(reservations)
+        self.totals = {}  # 물품 ID -> 예약 수량 합계
+        self.by_order = {}  # 오더 ID -> {물품 ID: 예약 수량}
+        for reservation in self.reservations:
+            self._add(reservation)
+
+    def _add(self, reservation):
+        item_id, quantity = reservation['item_id'], reservation['quantity']
+        self.totals[item_id] = self.totals.get(item_id, 0) + quantity
+        order = self.by_order.setdefault(reservation['order_id'], {})
+        order[item_id] = order.get(item_id, 0) + quantity
+
+    def add(self, reservations):
+        self.reservations.extend(reservations)
+        for reservation in reservations:
+            self._add(reservation)
+
+    def remove_orders(self, order_ids):
+        """오더들의 예약 제거 (제거한 레코드 수 반환)"""
+        order_ids = set(order_ids)
+        for order_id in order_ids:
+            for item_id, quantity in self.by_order.pop(order_id, {}).items():
+                remaining = self.totals.get(item_id, 0) - quantity
+                if remaining > 1e-9:
+                    self.totals[item_id] = remaining
+                else:
+                    self.totals.pop(item_id, None)
+        kept = [reservation for reservation in self.reservations if reservation['order_id'] not in order_ids]
+        removed = len(self.reservations) - len(kept)
+        self.reservations = kept
+        return removed
+
+    def reserved(self, item_id):
+        return self.totals.get(item_id, 0)
+
+    def reserved_for_orders(self, order_ids):
+        """오더들이 잡아 둔 물품별 예약 수량"""
+        totals = {}
+        for order_id in order_ids:
+            for item_id, quantity in self.by_order.get(order_id, {}).items():
+                totals[item_id] = totals.get(item_id, 0) + quantity
+        return totals
+
+
+# 프로세스 전역 예약 원장 (예약 데이터 버전이 바뀌면 다시 구성)
+_ledger = None
+_ledger_version = None
+_lock = threading.RLock()
+
+
+def get_reservation_ledger():
+    """현재 예약 데이터 기준 원장 반환"""
+    global _ledger, _ledger_version
+    version = get_storage().version(RESERVATIONS_DATASET)
+    with _lock:
+        if _ledger is None or _ledger_version != version:
+            _ledger = ReservationLedger(repository.load(RESERVATIONS_DATASET, default=[]))
+            _ledger_version = version
+        return _ledger
+
+
+def _save(ledger):
+    """원장 레코드를 저장하고 메모리 원장을 새 버전으로 유지"""
+    global _ledger_version
+    repository.save(RESERVATIONS_DATASET, ledger.reservations)
+    _ledger_version = get_storage().version(RESERVATIONS_DATASET)
+
+
+def available_quantity(item_id, catalog, ledger):
+    """물품의 가용 재고 (재고 - 예약, 호출하는 쪽에서 한 번 불러온 카탈로그와 예약 원장 사용)"""
+    item = catalog.item(item_id)
+    stock = float(item.get('stock', 0) or 0) if item else 0.0
+    return stock - ledger.reserved(item_id)
+
+
+def reserve_orders(orders):
+    """생산 오더들의 출고 예정 수량을 예약 (반제품은 가용 재고를 먼저 쓰고 모자란 만큼 하위 자재로 전개)
+
+    오더 순서대로 가용 재고(앞선 오더의 예약 포함)를 확인하며, 예약할 수 없는 오더는 건너뜁니다.
+    orders는 id, product_id, quantity를 가진 dict 목록이고, 반환값은 {오더 ID: (성공 여부, 메시지)}입니다.
+    """
+    engine = get_bom_engine()
+    catalog = get_catalog()
+    results = {}
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    with _lock:
+        ledger = get_reservation_ledger()
+        new_reservations = []
+        pending = {}  # 이번 호출에서 앞선 오더가 예약한 물품별 수량
+        for order in orders:
+            if not engine.is_assembly(order['product_id']):
+                results[order['id']] = (False, "해당 제품의 BOM 정보가 없습니다.")
+                continue
+            try:
+                requirements = engine.net_requirements(
+                    order['product_id'], order['quantity'],
+                    lambda item_id: available_quantity(item_id, catalog, ledger) - pending.get(item_id, 0)
+                )
+            except BomCycleError as e:
+                results[order['id']] = (False, str(e))
+                continue
+
+            shortages = []
+            for item_id, quantity in requirements.items():
+                available = available_quantity(item_id, catalog, ledger) - pending.get(item_id, 0)
+                if available < quantity:
+                    shortages.append(f"{catalog.item_name(item_id)} (필요: {quantity}, 가용: {available})")
+            if shortages:
+                results[order['id']] = (False, "가용 재고가 부족합니다: " + ", ".join(shortages))
+                continue
+
+            for item_id, quantity in requirements.items():
+                pending[item_id] = pending.get(item_id, 0) + quantity
+                new_reservations.append({
+                    'order_id': order['id'],
+                    'item_id': item_id,
+                    'quantity': quantity,
+                    'created_at': now
+                })
+            results[order['id']] = (True, "예약 완료")
+
+        if new_reservations:
+            ledger.add(new_reservations)
+            _save(ledger)
+    return results
+
+
+def release_reservations(order_ids):
+    """오더들의 예약 해제 (생산 실행 또는 실패 시)"""
+    with _lock:
+        ledger = get_reservation_ledger()
+        if ledger.remove_orders(order_ids):
+            _save(ledger)
@@ -0,0 +1,1134 @@
+import os
+import sys
+import gzip
+import json
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+import pandas as pd
+
+# 데이터 디렉토리 및 저장소 엔진 설정
+DATA_DIR = "data"
+SQLITE_FILE = os.path.join(DATA_DIR, "inventory.db")
+STORAGE_BACKEND_ENV = "INVENTORY_STORAGE_BACKEND"
+DEFAULT_BACKEND = "json"
+
+# 입출고 저널 설정 (JSON 저장소)
+JOURNAL_DATASET = 'inventory_transactions'
+JOURNAL_DELETE_KEY = '$delete'
+JOURNAL_COMPACT_MIN_DEAD_LINES = 1000
+JOURNAL_TAIL_BLOCK_SIZE = 64 * 1024
+
+# 입출고 내역 월별 파티션 설정 (JSON 저장소)
+PARTITION_DIR_NAME = "transactions"
+PARTITION_MANIFEST_NAME = "manifest.json"
+UNDATED_PARTITION = "undated"
+COMPRESS_CLOSED_PARTITIONS_ENV = "INVENTORY_COMPRESS_CLOSED_MONTHS"
+LEDGER_COLUMNS = ['transaction_type', 'item_id', 'quantity']
+
+# ID 시퀀스 설정 (JSON 저장소는 잠금 파일로 프로세스 간 동시 할당을 막음)
+SEQUENCES_FILE_NAME = "sequences.json"
+LOCK_TIMEOUT_SECONDS = 10
+LOCK_STALE_SECONDS = 30
+
+# 데이터셋별 기본값 (파일이 없거나 비어 있을 때 사용)
+DATASET_DEFAULTS = {
+    'suppliers': list,
+    'items': list,
+    'bom': dict,
+    'inventory_transactions': list,
+    'production_orders': list,
+    'stock_reservations': list,
+}
+
+# SQLite 테이블별 인덱스 컬럼 (레코드 전체는 data 컬럼에 JSON으로 저장)
+TABLE_COLUMNS = {
+    'suppliers': ('name', 'business_number'),
+    'items': ('name', 'item_code', 'category', 'supplier_id', 'stock'),
+    'inventory_transactions': ('transaction_type', 'item_id', 'supplier_id', 'quantity', 'transaction_date'),
+}
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS suppliers (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    business_number TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_suppliers_name ON suppliers(name);
+CREATE INDEX IF NOT EXISTS idx_suppliers_business_number ON suppliers(business_number);
+
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    item_code TEXT,
+    category TEXT,
+    supplier_id INTEGER,
+    stock REAL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_items_name ON items(name);
+CREATE INDEX IF NOT EXISTS idx_items_item_code ON items(item_code);
+CREATE INDEX IF NOT EXISTS idx_items_supplier_id ON items(supplier_id);
+
+CREATE TABLE IF NOT EXISTS bom_lines (
+    product_id INTEGER NOT NULL,
+    line_no INTEGER NOT NULL,
+    material_id INTEGER NOT NULL,
+    quantity REAL NOT NULL,
+    note TEXT,
+    PRIMARY KEY (product_id, line_no)
+);
+CREATE INDEX IF NOT EXISTS idx_bom_lines_material_id ON bom_lines(material_id);
+
+CREATE TABLE IF NOT EXISTS inventory_transactions (
+    id INTEGER PRIMARY KEY,
+    transaction_type TEXT,
+    item_id INTEGER,
+    supplier_id INTEGER,
+    quantity REAL,
+    transaction_date TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_date ON inventory_transactions(transaction_date);
+CREATE INDEX IF NOT EXISTS idx_transactions_item_id ON inventory_transactions(item_id);
+CREATE INDEX IF NOT EXISTS idx_transactions_item_net ON inventory_transactions(item_id, transaction_type, quantity);
+
+CREATE TABLE IF NOT EXISTS documents (
+    name TEXT PRIMARY KEY,
+    body TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS sequences (
+    name TEXT PRIMARY KEY,
+    next_id INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS dataset_versions (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+"""
+
+
+@contextmanager
+def file_lock(lock_path):
+    """잠금 파일을 이용한 프로세스 간 배타 잠금"""
+    deadline = time.time() + LOCK_TIMEOUT_SECONDS
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            # 비정상 종료로 남은 잠금 파일은 제거
+            try:
+                if time.time() - os.path.getmtime(lock_path) > LOCK_STALE_SECONDS:
+                    os.remove(lock_path)
+                    continue
+            except FileNotFoundError:
+                continue
+            if time.time() > deadline:
+                raise TimeoutError(f"잠금을 얻지 못했습니다: {lock_path}")
+            time.sleep(0.01)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        os.remove(lock_path)
+
+
+def _max_id(records):
+    """레코드 목록의 최대 id (시퀀스 초기값 계산용)"""
+    return max((record.get('id', 0) for record in records), default=0)
+
+
+def _net_by_item(frame):
+    """입출고 내역 DataFrame의 물품별 순증감 (pandas 그룹 집계)"""
+    if frame.empty:
+        return {}
+    quantity = pd.to_numeric(frame['quantity'], errors='coerce').fillna(0)
+    signed = quantity.where(frame['transaction_type'] == "입고", -quantity)
+    net = signed.groupby(frame['item_id']).sum()
+    return {int(item_id): float(value) for item_id, value in net.items()}
+
+
+def _default_for(dataset, default=None):
+    """데이터셋 기본값 생성"""
+    if default is not None:
+        return default
+    factory = DATASET_DEFAULTS.get(dataset, list)
+    return factory()
+
+
+class StorageBackend:
+    """저장소 엔진 공통 인터페이스
+
+    load/save는 데이터셋 전체 단위, upsert/delete는 레코드(id) 단위로 동작합니다.
+    'suppliers', 'items', 'inventory_transactions'는 id를 가진 레코드 리스트,
+    'bom'은 제품 ID(문자열) -> 자재 목록 딕셔너리입니다.
+    """
+
+    name = None
+
+    def initialize(self):
+        """저장소 초기화 (파일/테이블 생성)"""
+        raise NotImplementedError
+
+    def load(self, dataset, default=None):
+        """데이터셋 전체 로드"""
+        raise NotImplementedError
+
+    def save(self, dataset, data):
+        """데이터셋 전체 저장"""
+        raise NotImplementedError
+
+    def upsert(self, dataset, records):
+        """id 기준으로 레코드 추가 또는 수정"""
+        raise NotImplementedError
+
+    def delete(self, dataset, ids):
+        """id 기준으로 레코드 삭제"""
+        raise NotImplementedError
+
+    def append(self, dataset, records):
+        """새 레코드 추가 (기존 레코드는 다시 기록하지 않음)"""
+        self.upsert(dataset, records)
+
+    def drop(self, dataset):
+        """문서형 데이터셋 삭제 (더 이상 쓰지 않는 집계 문서 정리용, 다음 로드는 기본값)"""
+        raise NotImplementedError
+
+    def version(self, dataset):
+        """데이터셋 버전 (데이터가 바뀌면 값이 달라짐, 캐시 무효화용)"""
+        raise NotImplementedError
+
+    def allocate_ids(self, dataset, count=1):
+        """데이터셋의 새 ID를 count개 연속으로 예약하고 첫 번째 ID 반환
+
+        시퀀스는 데이터와 함께 저장되며, 처음 사용할 때 기존 최대 ID로 초기화됩니다.
+        """
+        raise NotImplementedError
+
+    def tail(self, dataset, limit):
+        """마지막으로 추가된 레코드 limit개 조회 (오래된 순)"""
+        rows = self.load(dataset)
+        return rows[-limit:] if limit > 0 else []
+
+    def ledger_net_by_item(self):
+        """입출고 내역 전체의 물품별 순증감 (입고 +, 출고 -) -> {item_id: 순증감}"""
+        return _net_by_item(pd.DataFrame(self.load(JOURNAL_DATASET), columns=LEDGER_COLUMNS))
+
+    def load_transactions_between(self, start_date=None, end_date=None):
+        """거래일이 기간(양 끝 포함, 'YYYY-MM-DD') 안에 있는 입출고 내역 조회"""
+        return [
+            t for t in self.load(JOURNAL_DATASET)
+            if (not start_date or (t.get('transaction_date') or '') >= start_date)
+            and (not end_date or (t.get('transaction_date') or '') <= end_date)
+        ]
+
+
+class TransactionJournal:
+    """입출고 내역 추가 전용 저널 (한 줄에 레코드 하나, JSONL)
+
+    추가/수정은 레코드를 한 줄로 덧붙이고, 삭제는 {"$delete": id} 줄을 덧붙입니다.
+    같은 id가 다시 기록되면 마지막 줄이 유효하며, 무효 줄이 유효 레코드 수를
+    넘어서면 전체 로드 시 파일을 다시 써서 압축합니다.
+    """
+
+    def __init__(self, path, legacy_path=None):
+        self.path = path
+        self.legacy_path = legacy_path
+        self._lock = threading.RLock()
+
+    def _write_lines(self, entries):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        payload = ''.join(json.dumps(entry, ensure_ascii=False) + '\n' for entry in entries)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(payload)
+
+    def migrate_legacy(self):
+        """기존 JSON 배열 파일이 있으면 저널로 한 번 변환"""
+        if os.path.exists(self.path) or not self.legacy_path or not os.path.exists(self.legacy_path):
+            return
+        with self._lock:
+            if os.path.exists(self.path):
+                return
+            with open(self.legacy_path, 'r', encoding='utf-8') as f:
+                records = json.load(f)
+            self.rewrite(records)
+            os.replace(self.legacy_path, f"{self.legacy_path}.bak")
+
+    def append(self, records):
+        """레코드 추가 (전체 내역 크기와 무관하게 한 번의 쓰기)"""
+        if records:
+            self.migrate_legacy()
+            self._write_lines(records)
+
+    def delete(self, ids):
+        """삭제 표시 줄 추가"""
+        if ids:
+            self.migrate_legacy()
+            self._write_lines([{JOURNAL_DELETE_KEY: record_id} for record_id in ids])
+
+    def read_all(self):
+        """저널 전체를 재생하여 유효 레코드 목록 반환"""
+        self.migrate_legacy()
+        if not os.path.exists(self.path):
+            return []
+        records = {}
+        line_count = 0
+        with self._lock:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    line_count += 1
+                    entry = json.loads(line)
+                    if JOURNAL_DELETE_KEY in entry:
+                        records.pop(entry[JOURNAL_DELETE_KEY], None)
+                    else:
+                        records[entry['id']] = entry
+            live = list(records.values())
+            dead_lines = line_count - len(live)
+            if dead_lines > max(JOURNAL_COMPACT_MIN_DEAD_LINES, len(live)):
+                self.rewrite(live)
+        return live
+
+    def rewrite(self, records):
+        """유효 레코드만으로 저널을 다시 작성 (압축)"""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with self._lock:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            os.replace(tmp_path, self.path)
+
+    def compact(self):
+        """저널 압축"""
+        with self._lock:
+            self.rewrite(self.read_all())
+
+    def tail(self, limit):
+        """파일 끝에서부터 블록 단위로 읽어 최근 레코드 limit개 반환 (오래된 순)"""
+        self.migrate_legacy()
+        if limit <= 0 or not os.path.exists(self.path):
+            return []
+
+        result = []
+        seen_ids = set()
+        deleted_ids = set()
+
+        def consume(line):
+            if not line.strip():
+                return
+            entry = json.loads(line)
+            if JOURNAL_DELETE_KEY in entry:
+                deleted_ids.add(entry[JOURNAL_DELETE_KEY])
+                return
+            record_id = entry['id']
+            if record_id in seen_ids or record_id in deleted_ids:
+                return
+            seen_ids.add(record_id)
+            result.append(entry)
+
+        with open(self.path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            buffer = b''
+            while position > 0 and len(result) < limit:
+                read_size = min(JOURNAL_TAIL_BLOCK_SIZE, position)
+                position -= read_size
+                f.seek(position)
+                buffer = f.read(read_size) + buffer
+                lines = buffer.split(b'\n')
+                # 블록 앞부분은 잘린 줄일 수 있으므로 다음 블록과 합쳐서 처리
+                buffer = lines.pop(0)
+                for line in reversed(lines):
+                    consume(line.decode('utf-8'))
+                    if len(result) >= limit:
+                        break
+            if position == 0 and len(result) < limit:
+                consume(buffer.decode('utf-8'))
+
+        result.reverse()
+        return result
+
+
+def partition_key(record):
+    """입출고 내역이 속하는 월 파티션 이름 ('YYYY-MM', 거래일이 없으면 'undated')"""
+    date = str(record.get('transaction_date') or '')
+    if len(date) >= 7 and date[:4].isdigit() and date[4] == '-' and date[5:7].isdigit():
+        return date[:7]
+    return UNDATED_PARTITION
+
+
+class TransactionPartitions:
+    """입출고 내역 월별 파티션 (data/transactions/YYYY-MM.jsonl + manifest.json)
+
+    진행 중인 월은 TransactionJournal로 추가만 하고, 지난 월은 close()로 닫아
+    읽기 전용(선택적으로 gzip 압축)으로 보관합니다. 매니페스트에는 파티션별
+    최소/최대 거래일, id 범위, 건수를 기록하여 기간 조회 시 필요한 파티션만 엽니다.
+    닫힌 월에 뒤늦은 등록/삭제가 들어오면 그 월만 다시 열어 기록합니다.
+    """
+
+    def __init__(self, directory, legacy_journal=None, compress_closed=True):
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, PARTITION_MANIFEST_NAME)
+        self.legacy_journal = legacy_journal
+        self.compress_closed = compress_closed
+        self._lock = threading.RLock()
+        self._journals = {}  # 파티션 이름 -> TransactionJournal (파일마다 잠금을 하나만 쓰도록 재사용)
+
+    # 매니페스트
+    def read_manifest(self):
+        """파티션 이름 -> 통계 정보"""
+        if not os.path.exists(self.manifest_path):
+            return {}
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _write_manifest(self, manifest):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(dict(sorted(manifest.items())), f, indent=4, ensure_ascii=False)
+        os.replace(tmp_path, self.manifest_path)
+
+    @contextmanager
+    def _updating(self):
+        """매니페스트를 잠그고 읽은 뒤 블록이 끝나면 저장"""
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock, file_lock(f"{self.manifest_path}.lock"):
+            manifest = self.read_manifest()
+            yield manifest
+            self._write_manifest(manifest)
+
+    @staticmethod
+    def _stats(records, closed=False, compressed=False):
+        dates = [r['transaction_date'] for r in records if r.get('transaction_date')]
+        ids = [r['id'] for r in records]
+        return {
+            'min_date': min(dates) if dates else None,
+            'max_date': max(dates) if dates else None,
+            'min_id': min(ids) if ids else None,
+            'max_id': max(ids) if ids else None,
+            'rows': len(records),
+            'closed': closed,
+            'compressed': compressed
+        }
+
+    # 파티션 파일
+    def journal(self, name):
+        with self._lock:
+            journal = self._journals.get(name)
+            if journal is None:
+                journal = self._journals[name] = TransactionJournal(os.path.join(self.directory, f"{name}.jsonl"))
+            return journal
+
+    def _compressed_path(self, name):
+        return os.path.join(self.directory, f"{name}.jsonl.gz")
+
+    def _read_partition(self, name, info):
+        if info.get('compressed'):
+            with gzip.open(self._compressed_path(name), 'rt', encoding='utf-8') as f:
+                return [json.loads(line) for line in f if line.strip()]
+        return self.journal(name).read_all()
+
+    def _reopen(self, name, manifest):
+        """닫힌 월 파티션을 다시 쓰기 가능한 저널로 되돌림"""
+        info = manifest.get(name)
+        if info is None or not info.get('closed'):
+            return
+        if info.get('compressed'):
+            self.journal(name).rewrite(self._read_partition(name, info))
+            os.remove(self._compressed_path(name))
+        if os.path.exists(self._net_path(name)):
+            os.remove(self._net_path(name))
+        info['closed'] = False
+        info['compressed'] = False
+
+    def _locate(self, ids, manifest):
+        """id 범위로 후보 파티션을 좁혀 id가 실제로 들어 있는 파티션과 그 레코드 반환"""
+        ids = set(ids)
+        if not ids:
+            return {}
+        low, high = min(ids), max(ids)
+        found = {}
+        for name, info in manifest.items():
+            if not info.get('rows') or info['max_id'] < low or info['min_id'] > high:
+                continue
+            records = self._read_partition(name, info)
+            if any(r['id'] in ids for r in records):
+                found[name] = records
+        return found
+
+    # 읽기
+    def _partitions_between(self, manifest, start_date=None, end_date=None):
+        """기간과 겹치는 파티션 이름 (거래일이 없는 내역은 기간 조건이 없을 때만 포함)"""
+        names = []
+        for name in sorted(manifest):
+            info = manifest[name]
+            if not info.get('rows'):
+                continue
+            if start_date or end_date:
+                if info['min_date'] is None:
+                    continue
+                if start_date and info['max_date'] < start_date:
+                    continue
+                if end_date and info['min_date'] > end_date:
+                    continue
+            names.append(name)
+        # 거래일이 없는 내역은 가장 오래된 것으로 취급
+        names.sort(key=lambda n: (n != UNDATED_PARTITION, n))
+        return names
+
+    def read(self, start_date=None, end_date=None):
+        """기간과 겹치는 파티션만 읽어 유효 레코드 반환 (월 순서, 월 안에서는 기록 순서)"""
+        self.migrate_legacy()
+        with self._lock:
+            manifest = self.read_manifest()
+            records = []
+            for name in self._partitions_between(manifest, start_date, end_date):
+                records.extend(self._read_partition(name, manifest[name]))
+        if start_date or end_date:
+            records = [
+                r for r in records
+                if (not start_date or (r.get('transaction_date') or '') >= start_date)
+                and (not end_date or (r.get('transaction_date') or '') <= end_date)
+            ]
+        return records
+
+    def _net_path(self, name):
+        return os.path.join(self.directory, f"{name}.net.json")
+
+    def _write_net_summary(self, name, net):
+        tmp_path = f"{self._net_path(name)}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({str(item_id): value for item_id, value in net.items()}, f, ensure_ascii=False)
+        os.replace(tmp_path, self._net_path(name))
+
+    def net_by_item(self):
+        """전체 파티션의 물품별 순증감 (입고 +, 출고 -) -> {item_id: 순증감}
+
+        닫힌 월은 닫을 때 계산해 둔 물품별 순증감 요약(YYYY-MM.net.json)을 사용하고
+        (닫힌 파티션은 바뀌지 않으며 다시 열리면 요약도 지워짐), 열린 월만 내역을 다시 집계합니다.
+        """
+        self.migrate_legacy()
+        # 읽는 중 저널 압축(rewrite)이 같은 파일에 대한 추가와 겹치지 않도록 쓰기와 같은 잠금 안에서 읽음
+        with self._lock:
+            manifest = self.read_manifest()
+            totals = pd.Series(dtype=float)
+            for name in self._partitions_between(manifest):
+                info = manifest[name]
+                if info.get('closed') and os.path.exists(self._net_path(name)):
+                    with open(self._net_path(name), 'r', encoding='utf-8') as f:
+                        summary = json.load(f)
+                    net = {int(item_id): value for item_id, value in summary.items()}
+                else:
+                    net = _net_by_item(pd.DataFrame(self._read_partition(name, info), columns=LEDGER_COLUMNS))
+                    if info.get('closed'):
+                        self._write_net_summary(name, net)
+                totals = totals.add(pd.Series(net, dtype=float), fill_value=0)
+        return {int(item_id): float(value) for item_id, value in totals.items()}
+
+    def tail(self, limit):
+        """id(등록 순서) 기준 마지막 레코드 limit개 반환 (오래된 순, SQLite 저장소와 같은 순서)
+
+        거래일을 소급해 등록한 내역도 포함되도록, 매니페스트의 최대 id가 큰 파티션부터
+        끝부분을 읽고 남은 파티션의 최대 id가 이미 모은 limit번째 id보다 작아지면 멈춥니다.
+        """
+        self.migrate_legacy()
+        if limit <= 0:
+            return []
+        manifest = self.read_manifest()
+        names = sorted(
+            (name for name, info in manifest.items() if info.get('rows')),
+            key=lambda name: manifest[name]['max_id'],
+            reverse=True
+        )
+        result = []
+        for name in names:
+            info = manifest[name]
+            if len(result) >= limit and info['max_id'] < result[-limit]['id']:
+                break
+            if info.get('compressed'):
+                rows = self._read_partition(name, info)[-limit:]
+            else:
+                rows = self.journal(name).tail(limit)
+            result = sorted(result + rows, key=lambda r: r['id'])
+        return result[-limit:]
+
+    # 쓰기
+    def append(self, records):
+        """새 레코드를 월별로 나누어 해당 파티션 저널에만 추가"""
+        if not records:
+            return
+        self.migrate_legacy()
+        groups = {}
+        for record in records:
+            groups.setdefault(partition_key(record), []).append(record)
+        with self._updating() as manifest:
+            for name, group in groups.items():
+                self._reopen(name, manifest)
+                self.journal(name).append(group)
+                info = manifest.get(name) or self._stats([])
+                added = self._stats(group)
+                for key, pick in (('min_date', min), ('min_id', min), ('max_date', max), ('max_id', max)):
+                    values = [v for v in (info[key], added[key]) if v is not None]
+                    info[key] = pick(values) if values else None
+                info['rows'] += len(group)
+                manifest[name] = info
+
+    def upsert(self, records):
+        """기존 레코드는 원래 파티션에서 지운 뒤 (거래일이 바뀌었을 수 있음) 다시 추가"""
+        self.delete([record['id'] for record in records])
+        self.append(records)
+
+    def delete(self, ids):
+        """id가 들어 있는 파티션에만 삭제 표시 추가"""
+        ids = set(ids)
+        if not ids:
+            return
+        self.migrate_legacy()
+        with self._updating() as manifest:
+            for name, records in self._locate(ids, manifest).items():
+                self._reopen(name, manifest)
+                targets = [r['id'] for r in records if r['id'] in ids]
+                self.journal(name).delete(targets)
+                remaining = [r for r in records if r['id'] not in ids]
+                manifest[name] = self._stats(remaining)
+
+    def rewrite(self, records):
+        """전체 내역으로 파티션을 다시 구성"""
+        groups = {}
+        for record in records:
+            groups.setdefault(partition_key(record), []).append(record)
+        with self._updating() as manifest:
+            for name, info in manifest.items():
+                if info.get('compressed'):
+                    os.remove(self._compressed_path(name))
+                elif name not in groups and os.path.exists(self.journal(name).path):
+                    os.remove(self.journal(name).path)
+                if os.path.exists(self._net_path(name)):
+                    os.remove(self._net_path(name))
+            manifest.clear()
+            for name, group in groups.items():
+                self.journal(name).rewrite(group)
+                manifest[name] = self._stats(group)
+
+    def close(self, before_partition):
+        """before_partition보다 이전 월의 열린 파티션을 정리하여 읽기 전용으로 닫음"""
+        manifest = self.read_manifest()
+        pending = [
+            name for name, info in manifest.items()
+            if name != UNDATED_PARTITION and name < before_partition and not info.get('closed')
+        ]
+        if not pending:
+            return
+        with self._updating() as manifest:
+            for name in pending:
+                info = manifest.get(name)
+                if info is None or info.get('closed'):
+                    continue
+                journal = self.journal(name)
+                records = journal.read_all()
+                if self.compress_closed:
+                    tmp_path = f"{self._compressed_path(name)}.tmp"
+                    with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+                        for record in records:
+                            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                    os.replace(tmp_path, self._compressed_path(name))
+                    if os.path.exists(journal.path):
+                        os.remove(journal.path)
+                else:
+                    journal.rewrite(records)
+                # 대사용 물품별 순증감 요약 (닫힌 월은 바뀌지 않으므로 한 번만 계산)
+                self._write_net_summary(name, _net_by_item(pd.DataFrame(records, columns=LEDGER_COLUMNS)))
+                manifest[name] = self._stats(records, closed=True, compressed=self.compress_closed)
+
+    def migrate_legacy(self):
+        """단일 저널(또는 그 이전의 JSON 배열) 파일이 있으면 월별 파티션으로 한 번 분할"""
+        if os.path.exists(self.manifest_path) or self.legacy_journal is None:
+            return
+        with self._lock:
+            if os.path.exists(self.manifest_path):
+                return
+            legacy = self.legacy_journal
+            has_legacy = os.path.exists(legacy.path) or (legacy.legacy_path and os.path.exists(legacy.legacy_path))
+            self.rewrite(legacy.read_all() if has_legacy else [])
+            if os.path.exists(legacy.path):
+                os.replace(legacy.path, f"{legacy.path}.bak")
+
+
+class JsonStorage(StorageBackend):
+    """data/*.json 파일 기반 저장소 (소규모 설치용)"""
+
+    name = "json"
+
+    def __init__(self, data_dir=DATA_DIR, compress_closed=None):
+        self.data_dir = data_dir
+        self._lock = threading.RLock()
+        self._write_counts = {}
+        if compress_closed is None:
+            compress_closed = os.environ.get(COMPRESS_CLOSED_PARTITIONS_ENV, "1") != "0"
+        self.partitions = TransactionPartitions(
+            os.path.join(data_dir, PARTITION_DIR_NAME),
+            legacy_journal=TransactionJournal(
+                os.path.join(data_dir, f"{JOURNAL_DATASET}.jsonl"),
+                legacy_path=os.path.join(data_dir, f"{JOURNAL_DATASET}.json")
+            ),
+            compress_closed=compress_closed
+        )
+
+    def path(self, dataset):
+        """데이터셋 파일 경로 (입출고 내역은 파티션 매니페스트)"""
+        if dataset == JOURNAL_DATASET:
+            return self.partitions.manifest_path
+        return os.path.join(self.data_dir, f"{dataset}.json")
+
+    def initialize(self):
+        os.makedirs(self.data_dir, exist_ok=True)
+        self.partitions.migrate_legacy()
+        for dataset in DATASET_DEFAULTS:
+            if not os.path.exists(self.path(dataset)):
+                self.save(dataset, _default_for(dataset))
+        # 지난 월 파티션은 읽기 전용으로 닫음
+        self.partitions.close(time.strftime("%Y-%m"))
+
+    def _touch(self, dataset):
+        """프로세스 내 쓰기 횟수 증가 (파일 mtime 해상도가 낮아도 변경을 감지하기 위함)"""
+        with self._lock:
+            self._write_counts[dataset] = self._write_counts.get(dataset, 0) + 1
+
+    def version(self, dataset):
+        try:
+            stat = os.stat(self.path(dataset))
+        except FileNotFoundError:
+            return (self._write_counts.get(dataset, 0), None)
+        return (self._write_counts.get(dataset, 0), stat.st_mtime_ns, stat.st_size)
+
+    def sequences(self):
+        """저장된 ID 시퀀스 {데이터셋: 다음 ID}"""
+        sequences_path = os.path.join(self.data_dir, SEQUENCES_FILE_NAME)
+        if not os.path.exists(sequences_path):
+            return {}
+        with open(sequences_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def allocate_ids(self, dataset, count=1):
+        os.makedirs(self.data_dir, exist_ok=True)
+        sequences_path = os.path.join(self.data_dir, SEQUENCES_FILE_NAME)
+        with self._lock, file_lock(f"{sequences_path}.lock"):
+            sequences = self.sequences()
+            next_id = sequences.get(dataset)
+            if next_id is None:
+                next_id = _max_id(self.load(dataset)) + 1
+            sequences[dataset] = next_id + count
+            tmp_path = f"{sequences_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(sequences, f, indent=4, ensure_ascii=False)
+            os.replace(tmp_path, sequences_path)
+        return next_id
+
+    def load(self, dataset, default=None):
+        if dataset == JOURNAL_DATASET:
+            return self.partitions.read()
+        path = self.path(dataset)
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return _default_for(dataset, default)
+
+    def save(self, dataset, data):
+        self._touch(dataset)
+        if dataset == JOURNAL_DATASET:
+            self.partitions.rewrite(data)
+            return
+        os.makedirs(self.data_dir, exist_ok=True)
+        path = self.path(dataset)
+        # 임시 파일에 기록 후 교체하여 저장 도중 파일이 깨지지 않도록 함
+        tmp_path = f"{path}.tmp"
+        with self._lock:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=4, ensure_ascii=False)
+            os.replace(tmp_path, path)
+
+    def drop(self, dataset):
+        self._touch(dataset)
+        with self._lock:
+            if os.path.exists(self.path(dataset)):
+                os.remove(self.path(dataset))
+
+    def upsert(self, dataset, records):
+        if dataset == JOURNAL_DATASET:
+            self._touch(dataset)
+            self.partitions.upsert(records)
+            return
+        with self._lock:
+            rows = self.load(dataset)
+            positions = {row.get('id'): idx for idx, row in enumerate(rows)}
+            for record in records:
+                idx = positions.get(record['id'])
+                if idx is None:
+                    positions[record['id']] = len(rows)
+                    rows.append(record)
+                else:
+                    rows[idx] = record
+            self.save(dataset, rows)
+
+    def delete(self, dataset, ids):
+        if dataset == JOURNAL_DATASET:
+            self._touch(dataset)
+            self.partitions.delete(ids)
+            return
+        ids = set(ids)
+        with self._lock:
+            rows = self.load(dataset)
+            self.save(dataset, [row for row in rows if row.get('id') not in ids])
+
+    def tail(self, dataset, limit):
+        if dataset == JOURNAL_DATASET:
+            return self.partitions.tail(limit)
+        return super().tail(dataset, limit)
+
+    def append(self, dataset, records):
+        if dataset == JOURNAL_DATASET:
+            self._touch(dataset)
+            self.partitions.append(records)
+            return
+        super().append(dataset, records)
+
+    def load_transactions_between(self, start_date=None, end_date=None):
+        return self.partitions.read(start_date, end_date)
+
+    def ledger_net_by_item(self):
+        return self.partitions.net_by_item()
+
+
+class SqliteStorage(StorageBackend):
+    """SQLite 기반 저장소 (인덱스 테이블 + 행 단위 추가/수정)"""
+
+    name = "sqlite"
+
+    def __init__(self, db_path=SQLITE_FILE):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._initialized = False
+
+    def connection(self):
+        """스레드별 연결 반환 (Streamlit 세션은 서로 다른 스레드에서 실행됨)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            db_dir = os.path.dirname(self.db_path)
+            if db_dir:
+                os.makedirs(db_dir, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        if not self._initialized:
+            conn.executescript(SQLITE_SCHEMA)
+            self._initialized = True
+        return conn
+
+    def initialize(self):
+        self.connection()
+
+    def _row_values(self, dataset, record):
+        """레코드를 테이블 행 값으로 변환"""
+        columns = TABLE_COLUMNS[dataset]
+        return (record['id'],) + tuple(record.get(col) for col in columns) + (
+            json.dumps(record, ensure_ascii=False),
+        )
+
+    def _upsert_sql(self, dataset):
+        columns = ('id',) + TABLE_COLUMNS[dataset] + ('data',)
+        placeholders = ', '.join('?' for _ in columns)
+        return f"INSERT OR REPLACE INTO {dataset} ({', '.join(columns)}) VALUES ({placeholders})"
+
+    def _bump_version(self, conn, dataset):
+        """쓰기와 같은 트랜잭션 안에서 데이터셋 버전 증가"""
+        conn.execute(
+            "INSERT INTO dataset_versions (name, version) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET version = version + 1",
+            (dataset,)
+        )
+
+    def version(self, dataset):
+        row = self.connection().execute(
+            "SELECT version FROM dataset_versions WHERE name = ?", (dataset,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def allocate_ids(self, dataset, count=1):
+        conn = self.connection()
+        # BEGIN IMMEDIATE로 쓰기 잠금을 먼저 잡아 다른 세션과 같은 ID를 받지 않도록 함
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT next_id FROM sequences WHERE name = ?", (dataset,)).fetchone()
+            if row is not None:
+                next_id = row[0]
+            elif dataset in TABLE_COLUMNS:
+                next_id = conn.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {dataset}").fetchone()[0]
+            else:
+                next_id = _max_id(self.load(dataset)) + 1
+            conn.execute(
+                "INSERT OR REPLACE INTO sequences (name, next_id) VALUES (?, ?)",
+                (dataset, next_id + count)
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return next_id
+
+    def load(self, dataset, default=None):
+        conn = self.connection()
+        if dataset == 'bom':
+            return self._load_bom(conn)
+        if dataset in TABLE_COLUMNS:
+            cursor = conn.execute(f"SELECT data FROM {dataset} ORDER BY id")
+            return [json.loads(row[0]) for row in cursor]
+        row = conn.execute("SELECT body FROM documents WHERE name = ?", (dataset,)).fetchone()
+        if row is None:
+            return _default_for(dataset, default)
+        return json.loads(row[0])
+
+    def save(self, dataset, data):
+        conn = self.connection()
+        with conn:
+            self._bump_version(conn, dataset)
+            if dataset == 'bom':
+                self._save_bom(conn, data)
+            elif dataset in TABLE_COLUMNS:
+                self._save_records(conn, dataset, data)
+            else:
+                conn.execute(
+                    "INSERT OR REPLACE INTO documents (name, body) VALUES (?, ?)",
+                    (dataset, json.dumps(data, ensure_ascii=False))
+                )
+
+    def drop(self, dataset):
+        conn = self.connection()
+        with conn:
+            self._bump_version(conn, dataset)
+            conn.execute("DELETE FROM documents WHERE name = ?", (dataset,))
+
+    def upsert(self, dataset, records):
+        conn = self.connection()
+        with conn:
+            self._bump_version(conn, dataset)
+            conn.executemany(
+                self._upsert_sql(dataset),
+                [self._row_values(dataset, record) for record in records]
+            )
+
+    def delete(self, dataset, ids):
+        conn = self.connection()
+        with conn:
+            self._bump_version(conn, dataset)
+            conn.executemany(f"DELETE FROM {dataset} WHERE id = ?", [(i,) for i in ids])
+
+    def append(self, dataset, records):
+        if dataset not in TABLE_COLUMNS:
+            return super().append(dataset, records)
+        conn = self.connection()
+        columns = ('id',) + TABLE_COLUMNS[dataset] + ('data',)
+        placeholders = ', '.join('?' for _ in columns)
+        with conn:
+            self._bump_version(conn, dataset)
+            conn.executemany(
+                f"INSERT INTO {dataset} ({', '.join(columns)}) VALUES ({placeholders})",
+                [self._row_values(dataset, record) for record in records]
+            )
+
+    def tail(self, dataset, limit):
+        if dataset not in TABLE_COLUMNS:
+            return super().tail(dataset, limit)
+        cursor = self.connection().execute(
+            f"SELECT data FROM {dataset} ORDER BY id DESC LIMIT ?", (limit,)
+        )
+        rows = [json.loads(row[0]) for row in cursor]
+        rows.reverse()
+        return rows
+
+    def load_transactions_between(self, start_date=None, end_date=None):
+        conditions, params = [], []
+        if start_date:
+            conditions.append("transaction_date >= ?")
+            params.append(start_date)
+        if end_date:
+            conditions.append("transaction_date <= ?")
+            params.append(end_date)
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        cursor = self.connection().execute(f"SELECT data FROM inventory_transactions{where} ORDER BY id", params)
+        return [json.loads(row[0]) for row in cursor]
+
+    def ledger_net_by_item(self):
+        cursor = self.connection().execute(
+            "SELECT item_id, SUM(CASE WHEN transaction_type = '입고' THEN quantity ELSE -quantity END) "
+            "FROM inventory_transactions GROUP BY item_id"
+        )
+        return {item_id: net for item_id, net in cursor}
+
+    def query_transactions(self, start_date=None, end_date=None, transaction_type=None, item_id=None,
+                           cursor=None, limit=20):
+        """입출고 내역 기간 조회 (거래일 인덱스 사용, 최신순 한 페이지)
+
+        반환값은 (페이지 행, 다음 커서, 전체 건수)이며 커서는 마지막 행의 (거래일, id)입니다.
+        """
+        conditions, params = [], []
+        if start_date:
+            conditions.append("transaction_date >= ?")
+            params.append(start_date)
+        if end_date:
+            conditions.append("transaction_date <= ?")
+            params.append(end_date)
+        if transaction_type:
+            conditions.append("transaction_type = ?")
+            params.append(transaction_type)
+        if item_id is not None:
+            conditions.append("item_id = ?")
+            params.append(item_id)
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+
+        conn = self.connection()
+        total = conn.execute(f"SELECT COUNT(*) FROM inventory_transactions{where}", params).fetchone()[0]
+
+        page_conditions, page_params = list(conditions), list(params)
+        if cursor:
+            page_conditions.append("(COALESCE(transaction_date, ''), id) < (?, ?)")
+            page_params.extend(cursor)
+        page_where = " WHERE " + " AND ".join(page_conditions) if page_conditions else ""
+        cursor_rows = conn.execute(
+            f"SELECT data FROM inventory_transactions{page_where} "
+            "ORDER BY transaction_date DESC, id DESC LIMIT ?",
+            page_params + [limit + 1]
+        )
+        page = [json.loads(row[0]) for row in cursor_rows]
+
+        next_cursor = None
+        if len(page) > limit:
+            page = page[:limit]
+            next_cursor = (page[-1].get('transaction_date') or '', page[-1]['id'])
+        return page, next_cursor, total
+
+    def _save_records(self, conn, dataset, records):
+        """변경된 행만 추가/수정하고 사라진 행은 삭제"""
+        existing = {row[0]: row[1] for row in conn.execute(f"SELECT id, data FROM {dataset}")}
+        changed = []
+        for record in records:
+            values = self._row_values(dataset, record)
+            if existing.pop(record['id'], None) != values[-1]:
+                changed.append(values)
+        if changed:
+            conn.executemany(self._upsert_sql(dataset), changed)
+        if existing:
+            conn.executemany(f"DELETE FROM {dataset} WHERE id = ?", [(i,) for i in existing])
+
+    def _load_bom(self, conn):
+        bom = {}
+        cursor = conn.execute(
+            "SELECT product_id, material_id, quantity, note FROM bom_lines ORDER BY product_id, line_no"
+        )
+        for product_id, material_id, quantity, note in cursor:
+            bom.setdefault(str(product_id), []).append({
+                'material_id': material_id,
+                'quantity': quantity,
+                'note': note or ''
+            })
+        return bom
+
+    def _save_bom(self, conn, bom):
+        """구성이 바뀐 제품의 BOM 라인만 교체"""
+        current = self._load_bom(conn)
+        for product_id_str in set(current) - set(bom):
+            conn.execute("DELETE FROM bom_lines WHERE product_id = ?", (int(product_id_str),))
+        for product_id_str, components in bom.items():
+            if current.get(product_id_str) == components:
+                continue
+            product_id = int(product_id_str)
+            conn.execute("DELETE FROM bom_lines WHERE product_id = ?", (product_id,))
+            conn.executemany(
+                "INSERT INTO bom_lines (product_id, line_no, material_id, quantity, note) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (product_id, line_no, c['material_id'], c['quantity'], c.get('note', ''))
+                    for line_no, c in enumerate(components)
+                ]
+            )
+
+
+# 저장소 엔진 선택
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def create_storage(backend=None):
+    """이름으로 저장소 엔진 생성 ('json' 또는 'sqlite')"""
+    backend = (backend or os.environ.get(STORAGE_BACKEND_ENV) or DEFAULT_BACKEND).lower()
+    if backend == "json":
+        return JsonStorage()
+    if backend == "sqlite":
+        return SqliteStorage()
+    raise ValueError(f"지원하지 않는 저장소 엔진입니다: {backend}")
+
+
+def get_storage():
+    """현재 프로세스에서 사용하는 저장소 엔진 반환"""
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _storage = create_storage()
+    return _storage
+
+
+def set_storage(storage):
+    """저장소 엔진 교체 (설정 변경 및 마이그레이션용)"""
+    global _storage
+    with _storage_lock:
+        _storage = storage
+
+
+def migrate_json_to_sqlite(data_dir=DATA_DIR, db_path=SQLITE_FILE, overwrite=False):
+    """기존 data/*.json 파일을 SQLite 저장소로 일괄 이전"""
+    source = JsonStorage(data_dir)
+    target = SqliteStorage(db_path)
+    target.initialize()
+
+    if not overwrite:
+        conn = target.connection()
+        for table in list(TABLE_COLUMNS) + ['bom_lines']:
+            if conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone():
+                return False, "SQLite 저장소에 이미 데이터가 있습니다. 덮어쓰려면 overwrite=True로 실행하세요."
+
+    counts = {}
+    for dataset in DATASET_DEFAULTS:
+        data = source.load(dataset)
+        target.save(dataset, data)
+        counts[dataset] = len(data)
+
+    # 삭제된 레코드의 ID가 다시 발급되지 않도록 JSON 저장소의 ID 시퀀스도 이전 (더 큰 값 유지)
+    conn = target.connection()
+    with conn:
+        conn.executemany(
+            "INSERT INTO sequences (name, next_id) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET next_id = MAX(next_id, excluded.next_id)",
+            list(source.sequences().items())
+        )
+
+    summary = ", ".join(f"{name} {count}건" for name, count in counts.items())
+    return True, f"마이그레이션 완료 ({summary})"
+
+
+if __name__ == "__main__":
+    # 사용법: python storage.py migrate [--overwrite]
+    if len(sys.argv) >= 2 and sys.argv[1] == "migrate":
+        success, message = migrate_json_to_sqlite(overwrite="--overwrite" in sys.argv[2:])
+        print(message)
+        sys.exit(0 if success else 1)
+    print("사용법: python storage.py migrate [--overwrite]")
+    sys.exit(1)
@@ -1,7 +1,34 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-from utils import load_suppliers, save_suppliers, generate_id, validate_supplier_data
+from utils import (
+    load_suppliers, allocate_ids, validate_supplier_data, validate_suppliers_batch,
+    upsert_records, delete_records, text_column
+)
+from bulk_import import chunked_import_ui, import_record_chunk
+
+def build_supplier_candidates(df):
+    """대량 등록 CSV를 거래처 레코드 형태의 DataFrame으로 변환"""
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    
+    def text(column):
+        return text_column(df, column)
+    
+    return pd.DataFrame({
+        'name': text('거래처명'),
+        'business_number': text('사업자등록번호'),
+        'address': text('주소'),
+        'phone': text('연락처'),
+        'email': text('이메일'),
+        'note': text('비고'),
+        'created_at': now,
+        'updated_at': now
+    }, index=df.index)
+
+def import_supplier_chunk(chunk):
+    """대량 등록 청크 하나를 일괄 검증 후 저장하고 (성공 건수, 행별 오류) 반환"""
+    candidates = build_supplier_candidates(chunk)
+    return import_record_chunk('suppliers', candidates, validate_suppliers_batch(candidates))
 
 def supplier_management_app():
     st.title("거래처 관리")
@@ -50,8 +77,7 @@ def supplier_management_app():
                 with delete_col:
                     if st.button("선택한 거래처 삭제"):
                         # 거래처 삭제 프로세스
-                        suppliers = [s for s in suppliers if s['id'] != selected_supplier_data['id']]
-                        save_suppliers(suppliers)
+                        delete_records('suppliers', [selected_supplier_data['id']])
                         st.success(f"거래처 '{selected_supplier}'이(가) 삭제되었습니다.")
                         st.rerun()
         else:
@@ -91,12 +117,7 @@ def supplier_management_app():
                     
                     if is_valid:
                         # 거래처 정보 업데이트
-                        for i, s in enumerate(suppliers):
-                            if s['id'] == edit_data['id']:
-                                suppliers[i] = updated_supplier
-                                break
-                        
-                        save_suppliers(suppliers)
+                        upsert_records('suppliers', [updated_supplier])
                         st.success(f"거래처 '{name}'의 정보가 수정되었습니다.")
                         
                         # 세션 상태 초기화
@@ -126,7 +147,6 @@ def supplier_management_app():
             if submitted:
                 # 새 거래처 데이터 구성
                 new_supplier = {
-                    'id': generate_id(suppliers),
                     'name': name,
                     'business_number': business_number,
                     'address': address,
@@ -141,8 +161,8 @@ def supplier_management_app():
                 is_valid, message = validate_supplier_data(new_supplier)
                 
                 if is_valid:
-                    suppliers.append(new_supplier)
-                    save_suppliers(suppliers)
+                    new_supplier = {'id': allocate_ids('suppliers')[0], **new_supplier}
+                    upsert_records('suppliers', [new_supplier])
                     st.success(f"거래처 '{name}'이(가) 등록되었습니다.")
                     # 폼 초기화를 위한 페이지 리로드
                     st.rerun()
@@ -178,56 +198,16 @@ def supplier_management_app():
         
         if uploaded_file:
             try:
-                df = pd.read_csv(uploaded_file)
+                preview_df = pd.read_csv(uploaded_file, nrows=5, dtype=str)
                 st.write("업로드된 데이터 미리보기:")
-                st.dataframe(df.head())
+                st.dataframe(preview_df)
                 
-                if st.button("대량 등록 실행"):
-                    # 필수 컬럼 확인
-                    if '거래처명' not in df.columns:
-                        st.error("CSV 파일에 '거래처명' 컬럼이 없습니다.")
-                    else:
-                        # 데이터 변환 및 저장
-                        success_count = 0
-                        error_count = 0
-                        error_messages = []
-                        
-                        for _, row in df.iterrows():
-                            new_supplier = {
-                                'id': generate_id(suppliers),
-                                'name': row.get('거래처명', ''),
-                                'business_number': row.get('사업자등록번호', ''),
-                                'address': row.get('주소', ''),
-                                'phone': row.get('연락처', ''),
-                                'email': row.get('이메일', ''),
-                                'note': row.get('비고', ''),
-                                'created_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                                'updated_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                            }
-                            
-                            # 데이터 유효성 검사
-                            is_valid, message = validate_supplier_data(new_supplier)
-                            
-                            if is_valid:
-                                suppliers.append(new_supplier)
-                                success_count += 1
-                            else:
-                                error_count += 1
-                                error_messages.append(f"오류 (행 {_+2}): {message} - {row.get('거래처명', '')}")
-                        
-                        # 결과 저장 및 표시
-                        if success_count > 0:
-                            save_suppliers(suppliers)
-                            st.success(f"{success_count}개의 거래처가 성공적으로 등록되었습니다.")
-                        
-                        if error_count > 0:
-                            st.error(f"{error_count}개의 거래처 등록 중 오류가 발생했습니다.")
-                            for msg in error_messages:
-                                st.warning(msg)
-                        
-                        # 페이지 리로드
-                        if success_count > 0:
-                            st.rerun()
+                # 필수 컬럼 확인
+                if '거래처명' not in preview_df.columns:
+                    st.error("CSV 파일에 '거래처명' 컬럼이 없습니다.")
+                else:
+                    # 청크 단위로 검증/저장하며 진행률 표시
+                    chunked_import_ui(uploaded_file, 'suppliers', '거래처', import_supplier_chunk, {'dtype': str})
                             
             except Exception as e:
                 st.error(f"파일 처리 중 오류가 발생했습니다: {str(e)}") 
\ No newline at end of file
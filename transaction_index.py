@@ -0,0 +1,99 @@
+import threading
+from bisect import bisect_left, bisect_right
+import repository
+from storage import get_storage
+
+TRANSACTIONS_DATASET = 'inventory_transactions'
+
+
+def _sort_key(transaction):
+    return (transaction.get('transaction_date') or '', transaction.get('id') or 0)
+
+
+def _matches(transaction, transaction_type, item_id):
+    if transaction_type and transaction.get('transaction_type') != transaction_type:
+        return False
+    if item_id is not None and transaction.get('item_id') != item_id:
+        return False
+    return True
+
+
+class TransactionDateIndex:
+    """입출고 내역의 (거래일, id) 정렬 인덱스
+
+    기간 조회는 이진 탐색으로 범위의 시작/끝 위치를 찾으므로, 한 주 조회가
+    수년치 내역을 훑지 않습니다. 페이지는 최신순이며 커서는 직전 페이지의
+    마지막 행의 (거래일, id)입니다.
+    """
+
+    def __init__(self, transactions):
+        self.records = sorted(transactions, key=_sort_key)
+        self.keys = [_sort_key(t) for t in self.records]
+
+    def query(self, start_date=None, end_date=None, transaction_type=None, item_id=None,
+              cursor=None, limit=20):
+        """기간/유형/물품 조건의 한 페이지 조회 -> (페이지 행, 다음 커서, 전체 건수)"""
+        lo = bisect_left(self.keys, (start_date,)) if start_date else 0
+        hi = bisect_right(self.keys, (end_date, float('inf'))) if end_date else len(self.keys)
+        page_end = min(hi, bisect_left(self.keys, tuple(cursor))) if cursor else hi
+        filtered = bool(transaction_type) or item_id is not None
+
+        # 현재 페이지(+다음 페이지 존재 확인용 1건)만 뒤에서부터 채움
+        page = []
+        position = page_end
+        while position > lo and len(page) <= limit:
+            position -= 1
+            transaction = self.records[position]
+            if not filtered or _matches(transaction, transaction_type, item_id):
+                page.append(transaction)
+
+        next_cursor = None
+        if len(page) > limit:
+            page = page[:limit]
+            next_cursor = _sort_key(page[-1])
+
+        if filtered:
+            total = sum(1 for i in range(lo, hi) if _matches(self.records[i], transaction_type, item_id))
+        else:
+            total = hi - lo
+        return page, next_cursor, total
+
+
+# 프로세스 전역 인덱스 (기간별, 입출고 내역 버전이 바뀔 때만 다시 구성)
+_indexes = {}  # (start_date, end_date) -> (version, index)
+MAX_CACHED_INDEXES = 8
+_lock = threading.Lock()
+
+
+def get_transaction_index(start_date=None, end_date=None):
+    """기간 안의 입출고 내역 날짜 인덱스 반환 (기간을 주면 해당 월 파티션만 읽음)"""
+    key = (start_date, end_date)
+    version = get_storage().version(TRANSACTIONS_DATASET)
+    with _lock:
+        cached = _indexes.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        if start_date or end_date:
+            transactions = repository.load_transactions_between(start_date, end_date)
+        else:
+            transactions = repository.load(TRANSACTIONS_DATASET)
+        if len(_indexes) >= MAX_CACHED_INDEXES:
+            _indexes.clear()
+        index = TransactionDateIndex(transactions)
+        _indexes[key] = (version, index)
+        return index
+
+
+def query_transactions(start_date=None, end_date=None, transaction_type=None, item_id=None,
+                       cursor=None, limit=20):
+    """입출고 내역 기간 조회 (최신순 한 페이지) -> (페이지 행, 다음 커서, 전체 건수)
+
+    날짜는 'YYYY-MM-DD' 문자열이며 양 끝을 포함합니다. 저장소가 인덱스 조회를
+    지원하면(SQLite) 저장소에서 바로 조회하고, 아니면 기간에 해당하는 내역만으로
+    메모리 정렬 인덱스를 만들어 사용합니다.
+    """
+    storage = get_storage()
+    if hasattr(storage, 'query_transactions'):
+        return storage.query_transactions(start_date, end_date, transaction_type, item_id, cursor, limit)
+    index = get_transaction_index(start_date, end_date)
+    return index.query(start_date, end_date, transaction_type, item_id, cursor, limit)
@@ -1,153 +1,446 @@
-import os
-import json
+import threading
 import pandas as pd
 from datetime import datetime
+import repository
+import transaction_index
+import aggregates
+import ledger
+import bom_engine
+import reservations
+from catalog import get_catalog
 
-# 데이터 파일 경로 설정
-DATA_DIR = "data"
-SUPPLIERS_FILE = os.path.join(DATA_DIR, "suppliers.json")
-ITEMS_FILE = os.path.join(DATA_DIR, "items.json")
-BOM_FILE = os.path.join(DATA_DIR, "bom.json")
-INVENTORY_TRANSACTIONS_FILE = os.path.join(DATA_DIR, "inventory_transactions.json")
+# 재고 확인과 반영 사이에 다른 세션의 재고 변경이 끼어들지 않도록 하는 잠금
+_stock_lock = threading.RLock()
+
+def stock_lock():
+    """재고 확인과 반영 사이에 다른 재고 변경이 끼어들지 않도록 잡는 잠금 (with stock_lock(): ...)"""
+    return _stock_lock
 
 # 데이터 로드 함수들
 def load_suppliers():
     """거래처 데이터 로드"""
-    if os.path.exists(SUPPLIERS_FILE):
-        with open(SUPPLIERS_FILE, 'r') as f:
-            return json.load(f)
-    return []
+    return repository.load('suppliers')
 
 def load_items():
     """물품 데이터 로드"""
-    if os.path.exists(ITEMS_FILE):
-        with open(ITEMS_FILE, 'r') as f:
-            return json.load(f)
-    return []
+    return repository.load('items')
 
 def load_bom():
     """BOM 데이터 로드"""
-    if os.path.exists(BOM_FILE):
-        with open(BOM_FILE, 'r') as f:
-            return json.load(f)
-    return {}
+    return repository.load('bom')
 
 def load_inventory_transactions():
     """입출고 내역 로드"""
-    if os.path.exists(INVENTORY_TRANSACTIONS_FILE):
-        with open(INVENTORY_TRANSACTIONS_FILE, 'r') as f:
-            return json.load(f)
-    return []
+    return repository.load('inventory_transactions')
 
 # 데이터 저장 함수들
 def save_suppliers(suppliers):
     """거래처 데이터 저장"""
-    os.makedirs(DATA_DIR, exist_ok=True)
-    with open(SUPPLIERS_FILE, 'w') as f:
-        json.dump(suppliers, f, indent=4, ensure_ascii=False)
+    repository.save('suppliers', suppliers)
 
 def save_items(items):
     """물품 데이터 저장"""
-    os.makedirs(DATA_DIR, exist_ok=True)
-    with open(ITEMS_FILE, 'w') as f:
-        json.dump(items, f, indent=4, ensure_ascii=False)
+    repository.save('items', items)
 
 def save_bom(bom):
-    """BOM 데이터 저장"""
-    os.makedirs(DATA_DIR, exist_ok=True)
-    with open(BOM_FILE, 'w') as f:
-        json.dump(bom, f, indent=4, ensure_ascii=False)
+    """BOM 데이터 저장 (순환 참조가 생기면 저장하지 않음, 바뀐 제품의 전개 결과는 무효화)"""
+    cycle = bom_engine.BomEngine(bom).find_cycle()
+    if cycle:
+        catalog = get_catalog()
+        path = " -> ".join(catalog.item_name(int(product_id), product_id) for product_id in cycle)
+        return False, f"BOM 순환 참조가 발생하여 저장할 수 없습니다: {path}"
+    repository.save('bom', bom)
+    bom_engine.bom_saved(bom)
+    return True, "BOM이 저장되었습니다."
 
 def save_inventory_transactions(transactions):
-    """입출고 내역 저장"""
-    os.makedirs(DATA_DIR, exist_ok=True)
-    with open(INVENTORY_TRANSACTIONS_FILE, 'w') as f:
-        json.dump(transactions, f, indent=4, ensure_ascii=False)
+    """입출고 내역 저장 (전체를 바꾸므로 집계도 다시 계산)"""
+    repository.save('inventory_transactions', transactions)
+    rebuild_transaction_summaries()
+
+def rebuild_transaction_summaries():
+    """일별 집계를 원본 입출고 내역으로 다시 계산하고, 집계로 만든 월말 재고 체크포인트도 무효화"""
+    success, message = aggregates.rebuild_aggregates()
+    ledger.invalidate_checkpoints(None)
+    return success, message
+
+# 입출고 내역 저널 함수들
+def add_inventory_transactions(transactions):
+    """입출고 내역 추가 (기존 내역은 다시 기록하지 않음, 일별 집계도 함께 갱신)"""
+    repository.append('inventory_transactions', transactions)
+    _record_transaction_summaries(transactions)
+
+def _record_transaction_summaries(transactions):
+    """기록된 입출고 내역을 일별 집계와 월말 체크포인트에 반영"""
+    aggregates.record_transactions(transactions)
+    _invalidate_stock_checkpoints(transactions)
+
+def delete_inventory_transactions(transactions):
+    """입출고 내역 삭제 (삭제할 레코드를 받아 일별 집계에서도 차감)"""
+    repository.delete('inventory_transactions', [t['id'] for t in transactions])
+    _remove_transaction_summaries(transactions)
+
+def _remove_transaction_summaries(transactions):
+    """삭제된 입출고 내역을 일별 집계에서 차감하고 월말 체크포인트 무효화"""
+    aggregates.remove_transactions(transactions)
+    _invalidate_stock_checkpoints(transactions)
+
+def load_inventory_transactions_between(start_date=None, end_date=None):
+    """기간(양 끝 포함, 'YYYY-MM-DD') 안의 입출고 내역 로드 (해당 월 파티션만 읽음)"""
+    return repository.load_transactions_between(start_date, end_date)
+
+def _invalidate_stock_checkpoints(transactions):
+    """지난 월 날짜의 내역이 바뀌면 그 이후 월말 재고 체크포인트를 무효화"""
+    if transactions:
+        ledger.invalidate_checkpoints(min((t.get('transaction_date') or '') for t in transactions))
+
+def load_stock_as_of(as_of):
+    """기준일 마감 시점의 전체 물품 재고 (물품 ID -> 재고 Series)"""
+    return ledger.stock_as_of(as_of)
+
+def load_recent_inventory_transactions(limit=20):
+    """최근 입출고 내역 조회 (오래된 순)"""
+    return repository.tail('inventory_transactions', limit)
+
+def query_inventory_transactions(start_date=None, end_date=None, transaction_type=None, item_id=None,
+                                 cursor=None, limit=20):
+    """입출고 내역 기간 조회 (최신순 한 페이지) -> (페이지 행, 다음 커서, 전체 건수)"""
+    return transaction_index.query_transactions(start_date, end_date, transaction_type, item_id, cursor, limit)
+
+# 행 단위 저장 함수들
+def upsert_records(dataset, records):
+    """레코드 추가 또는 수정 (id 기준)"""
+    repository.upsert(dataset, records)
+
+def delete_records(dataset, ids):
+    """레코드 삭제 (id 기준)"""
+    repository.delete(dataset, ids)
 
 # 유틸리티 함수들
-def generate_id(data_list):
-    """새로운 ID 생성 (기존 ID 중 가장 큰 값 + 1)"""
-    if not data_list:
-        return 1
+def allocate_ids(dataset, count=1):
+    """새 ID를 count개 한 번에 예약 (영구 시퀀스 사용, 기존 ID를 훑지 않음)"""
+    if count <= 0:
+        return []
+    first_id = repository.allocate_ids(dataset, count)
+    return list(range(first_id, first_id + count))
+
+def stock_delta(quantity, transaction_type, reverse=False):
+    """거래 유형에 따른 재고 증감량 (입고 +, 출고 -, reverse면 반대)"""
+    sign = 1 if transaction_type == "입고" else -1
+    if reverse:
+        sign = -sign
+    return sign * quantity
+
+def apply_stock_deltas(deltas, reverse=False):
+    """여러 재고 증감을 한꺼번에 검증하고 한 번의 쓰기로 적용
+
+    deltas는 item_id, quantity, transaction_type을 가진 dict 목록이며 입출고 내역을
+    그대로 넘길 수 있습니다. reverse=True면 내역을 되돌리는 방향으로 적용합니다.
+    물품별 순증감을 합산한 뒤 하나라도 재고가 음수가 되면 아무것도 적용하지 않습니다.
+    """
+    net_changes = {}
+    for delta in deltas:
+        item_id = delta['item_id']
+        net_changes[item_id] = net_changes.get(item_id, 0) + stock_delta(
+            delta['quantity'], delta.get('transaction_type', "입고"), reverse
+        )
+    
+    if not net_changes:
+        return True, "재고 업데이트 완료"
+    
+    with _stock_lock:
+        catalog = get_catalog()
+        
+        updated_items = []
+        errors = []
+        for item_id, change in net_changes.items():
+            item = catalog.item(item_id)
+            if item is None:
+                continue  # 삭제된 물품은 건너뜀
+            new_stock = item.get('stock', 0) + change
+            if new_stock < 0:
+                errors.append(f"{item.get('name', item_id)} (현재 재고: {item.get('stock', 0)}, 변경 수량: {change})")
+                continue
+            updated_items.append(dict(item, stock=new_stock))
+        
+        if errors:
+            return False, "재고가 부족합니다: " + ", ".join(errors)
+        
+        if updated_items:
+            upsert_records('items', updated_items)
+    return True, "재고 업데이트 완료"
+
+def delete_transactions_with_reversal(transactions):
+    """입출고 내역 여러 건을 재고를 되돌리면서 한 번에 삭제
+
+    물품별 순증감을 한 번에 되돌리고(재고가 음수가 되면 아무것도 삭제하지 않음),
+    물품과 입출고 내역을 각각 한 번씩만 기록합니다. 내역 삭제에 실패하면 재고 변경을 되돌립니다.
+    """
+    if not transactions:
+        return False, "삭제할 거래 내역을 선택해주세요."
     
-    ids = [item.get('id', 0) for item in data_list]
-    return max(ids) + 1
+    success, message = apply_stock_deltas(transactions, reverse=True)
+    if not success:
+        return False, message
+    
+    try:
+        repository.delete('inventory_transactions', [t['id'] for t in transactions])
+    except Exception as e:
+        apply_stock_deltas(transactions)
+        return False, f"입출고 내역 삭제에 실패하여 재고 변경을 되돌렸습니다: {e}"
+    _remove_transaction_summaries(transactions)
+    return True, f"{len(transactions)}건의 거래 내역이 삭제되었습니다."
 
 def update_item_stock(item_id, quantity, transaction_type="입고"):
     """물품의 재고 수량 업데이트"""
-    items = load_items()
-    
-    for item in items:
-        if item['id'] == item_id:
-            if transaction_type == "입고":
-                item['stock'] = item.get('stock', 0) + quantity
-            elif transaction_type == "출고":
-                new_stock = item.get('stock', 0) - quantity
-                if new_stock < 0:
-                    return False, "재고가 부족합니다."
-                item['stock'] = new_stock
-            break
-    
-    save_items(items)
-    return True, "재고 업데이트 완료"
+    return apply_stock_deltas([{
+        'item_id': item_id,
+        'quantity': quantity,
+        'transaction_type': transaction_type
+    }])
 
-def calculate_materials_for_production(product_id, quantity):
-    """생산에 필요한 자재 수량 계산"""
-    bom_data = load_bom()
-    items = load_items()
+def calculate_materials_for_production(product_id, quantity, catalog=None, reservation_ledger=None, available=None):
+    """생산에 출고할 자재 수량 계산 (반제품은 재고를 먼저 쓰고 모자란 만큼만 하위 자재로 전개)
     
-    if str(product_id) not in bom_data:
+    재고 충분 여부는 다른 생산 오더가 예약한 수량을 뺀 가용 재고 기준입니다.
+    여러 번 호출하는 쪽은 카탈로그와 예약 원장을 한 번 불러와 넘겨주며, available(물품 ID)로
+    가용 재고 계산을 바꿀 수 있습니다 (일괄 실행에서 앞선 오더의 소비 반영).
+    """
+    engine = bom_engine.get_bom_engine()
+    if catalog is None:
+        catalog = get_catalog()
+    if reservation_ledger is None:
+        reservation_ledger = reservations.get_reservation_ledger()
+    if available is None:
+        available = lambda item_id: reservations.available_quantity(item_id, catalog, reservation_ledger)
+    
+    if not engine.is_assembly(product_id):
         return None, "해당 제품의 BOM 정보가 없습니다."
     
+    try:
+        requirements = engine.net_requirements(product_id, quantity, available)
+    except bom_engine.BomCycleError as e:
+        return None, str(e)
+    
     required_materials = []
-    for component in bom_data[str(product_id)]:
-        material_id = component['material_id']
-        required_qty = component['quantity'] * quantity
-        
+    for material_id, required_qty in requirements.items():
         # 자재 정보 찾기
-        material_name = "알 수 없음"
-        current_stock = 0
-        for item in items:
-            if item['id'] == material_id:
-                material_name = item['name']
-                current_stock = item.get('stock', 0)
-                break
+        material = catalog.item(material_id)
+        material_name = material['name'] if material else "알 수 없음"
+        current_stock = material.get('stock', 0) if material else 0
+        available_qty = available(material_id)
         
         required_materials.append({
             'id': material_id,
             'name': material_name,
+            'is_assembly': engine.is_assembly(material_id),
             'required_quantity': required_qty,
             'current_stock': current_stock,
-            'sufficient': current_stock >= required_qty
+            'reserved': reservation_ledger.reserved(material_id),
+            'available': available_qty,
+            'sufficient': available_qty >= required_qty
         })
     
     return required_materials, "계산 완료"
 
+def explode_bom_tree(product_id, quantity):
+    """들여쓰기 BOM 전개 표 (단계, 자재명, 단위당 수량, 총 소요량, 반제품 여부)"""
+    engine = bom_engine.get_bom_engine()
+    catalog = get_catalog()
+    try:
+        rows = engine.tree(product_id, quantity)
+    except bom_engine.BomCycleError as e:
+        return None, str(e)
+    
+    tree = pd.DataFrame([
+        {
+            '단계': row['level'],
+            '자재명': "    " * (row['level'] - 1) + catalog.item_name(row['material_id']),
+            '단위당 수량': row['unit_quantity'],
+            '총 소요량': row['quantity'],
+            '반제품': row['is_assembly']
+        } for row in rows
+    ], columns=['단계', '자재명', '단위당 수량', '총 소요량', '반제품'])
+    return tree, "전개 완료"
+
+def _production_transactions(product, quantity, materials, transaction_date, note, new_ids, now, order_id=None):
+    """생산 1건의 자재 출고 + 제품 입고 내역 (new_ids는 자재 수 + 1개, 생산 오더면 오더 ID를 함께 기록)"""
+    transactions = [
+        {
+            'id': new_id,
+            'transaction_type': "출고",
+            'item_id': material['id'],
+            'quantity': material['required_quantity'],
+            'supplier_id': None,
+            'transaction_date': transaction_date,
+            'note': f"{product['name']} 생산을 위한 자재 출고",
+            'created_at': now
+        }
+        for material, new_id in zip(materials, new_ids)
+    ]
+    transactions.append({
+        'id': new_ids[len(materials)],
+        'transaction_type': "입고",
+        'item_id': product['id'],
+        'quantity': quantity,
+        'supplier_id': None,
+        'transaction_date': transaction_date,
+        'note': f"생산 완료: {note}",
+        'created_at': now
+    })
+    if order_id is not None:
+        for transaction in transactions:
+            transaction['production_order_id'] = order_id
+    return transactions
+
+def _executed_order_ids(orders):
+    """입출고 내역이 이미 기록된 생산 오더 ID 집합 (오더 생산일 범위의 내역만 조회)
+
+    내역을 기록한 뒤 오더 상태를 저장하기 전에 실패하여 같은 오더가 다시 실행될 때 이중 차감을 막습니다.
+    """
+    order_ids = {order['id'] for order in orders if 'id' in order}
+    if not order_ids:
+        return set()
+    dates = [order['production_date'] for order in orders if 'id' in order]
+    return order_ids & {
+        t.get('production_order_id') for t in repository.load_transactions_between(min(dates), max(dates))
+    }
+
+def _commit_stock_transactions(transactions):
+    """재고 반영(물품 1회 기록) 후 입출고 내역 1회 기록, 내역 기록에 실패하면 재고 변경을 되돌림"""
+    success, message = apply_stock_deltas(transactions)
+    if not success:
+        return False, message
+    
+    try:
+        repository.append('inventory_transactions', transactions)
+    except Exception as e:
+        apply_stock_deltas(transactions, reverse=True)
+        return False, f"입출고 내역 기록에 실패하여 재고 변경을 되돌렸습니다: {e}"
+    return True, "기록 완료"
+
+def record_stock_transactions(transactions):
+    """입출고 내역을 재고와 함께 기록 (재고 반영 후 내역 추가, 내역 기록에 실패하면 재고를 되돌림)"""
+    success, message = _commit_stock_transactions(transactions)
+    if success:
+        _record_transaction_summaries(transactions)
+    return success, message
+
+def execute_production_batch(orders):
+    """생산 오더 여러 건을 한 번에 실행
+    
+    orders는 product_id, quantity, production_date('YYYY-MM-DD'), note를 가진 dict 목록입니다.
+    최신 BOM과 재고로 오더를 순서대로 확인하며 앞선 오더의 자재 소비를 반영하고, 실행 가능한
+    오더만 묶어 물품 한 번, 입출고 내역 한 번의 쓰기로 반영합니다.
+    가용 재고는 재고에서 예약 수량을 뺀 값이며, id가 있는 오더는 자신이 잡아 둔 예약분을 쓸 수 있습니다.
+    id가 있는 오더는 입출고 내역에 오더 ID를 남기고, 이미 내역이 있는 오더는 다시 차감하지 않고 완료로 봅니다.
+    반환값은 오더 순서대로의 (성공 여부, 메시지) 목록입니다.
+    """
+    results = [None] * len(orders)
+    accepted = []  # (순번, 제품, 오더, 자재 목록)
+    committed = []
+    
+    with _stock_lock:
+        catalog = get_catalog()
+        reservation_ledger = reservations.get_reservation_ledger()
+        own_reserved = reservation_ledger.reserved_for_orders([order['id'] for order in orders if 'id' in order])
+        available = {}  # 이번 묶음에서 앞선 오더를 반영한 물품별 가용 재고
+        
+        executed = _executed_order_ids(orders)
+        
+        def available_for(item_id):
+            if item_id in available:
+                return available[item_id]
+            return reservations.available_quantity(item_id, catalog, reservation_ledger) + own_reserved.get(item_id, 0)
+        
+        for position, order in enumerate(orders):
+            product = catalog.item(order['product_id'])
+            if product is None:
+                results[position] = (False, "제품 정보를 찾을 수 없습니다.")
+                continue
+            if order.get('id') in executed:
+                results[position] = (True, f"{product['name']} {order['quantity']}{product.get('unit', '')} 생산이 이미 기록되어 있습니다.")
+                continue
+            # 계획 이후 바뀌었을 수 있으므로 최신 데이터로 다시 계산
+            materials, message = calculate_materials_for_production(
+                order['product_id'], order['quantity'], catalog, reservation_ledger, available_for
+            )
+            if materials is None:
+                results[position] = (False, message)
+                continue
+            
+            insufficient = [m for m in materials if not m['sufficient']]
+            if insufficient:
+                results[position] = (False, "재고가 부족합니다: " + ", ".join(
+                    f"{m['name']} (필요: {m['required_quantity']}, 가용 재고: {m['available']})" for m in insufficient
+                ))
+                continue
+            
+            for m in materials:
+                available[m['id']] = m['available'] - m['required_quantity']
+            available[product['id']] = available_for(product['id']) + order['quantity']
+            accepted.append((position, product, order, materials))
+        
+        if accepted:
+            now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            # 자재 출고 + 제품 입고 내역 ID를 한 번에 예약
+            new_ids = allocate_ids('inventory_transactions', sum(len(materials) + 1 for *_, materials in accepted))
+            offset = 0
+            for position, product, order, materials in accepted:
+                committed.extend(_production_transactions(
+                    product, order['quantity'], materials, order['production_date'], order.get('note', ''),
+                    new_ids[offset:offset + len(materials) + 1], now, order.get('id')
+                ))
+                offset += len(materials) + 1
+            
+            success, message = _commit_stock_transactions(committed)
+            for position, product, order, _ in accepted:
+                if success:
+                    results[position] = (True, f"{product['name']} {order['quantity']}{product.get('unit', '')} 생산이 완료되었습니다.")
+                else:
+                    results[position] = (False, message)
+            if not success:
+                committed = []
+    
+    if committed:
+        _record_transaction_summaries(committed)
+    return results
+
+def execute_production(product_id, quantity, production_date, note=""):
+    """생산 실행을 하나의 작업 단위로 처리
+    
+    최신 BOM과 재고로 필요 자재를 다시 계산하여 확인한 뒤, 자재 출고와 제품 입고를
+    물품 한 번, 입출고 내역 한 번의 쓰기로 반영합니다. 내역 기록에 실패하면 재고 변경을 되돌립니다.
+    """
+    return execute_production_batch([{
+        'product_id': product_id,
+        'quantity': quantity,
+        'production_date': production_date.strftime("%Y-%m-%d"),
+        'note': note
+    }])[0]
+
 def validate_supplier_data(supplier):
     """거래처 데이터 유효성 검사"""
     if not supplier.get('name'):
         return False, "거래처명은 필수 입력 항목입니다."
     
-    suppliers = load_suppliers()
+    catalog = get_catalog()
     # 수정이 아닌 추가인 경우에만 중복 체크
     if 'id' not in supplier:
-        for existing_supplier in suppliers:
-            if existing_supplier['name'] == supplier['name']:
-                return False, "이미 존재하는 거래처명입니다."
+        if catalog.supplier_by_name(supplier['name']):
+            return False, "이미 존재하는 거래처명입니다."
     
     # 사업자등록번호 유효성 검사
-    business_number = supplier.get('business_number', '')
+    business_number = str(supplier.get('business_number') or '')
     if business_number:
         # 사업자번호 형식 검사 (숫자 10자리)
         if not business_number.isdigit() or len(business_number) != 10:
             return False, "사업자등록번호는 10자리 숫자여야 합니다."
         
-        # 사업자번호 중복 검사
-        for existing_supplier in suppliers:
-            if 'id' in supplier and existing_supplier['id'] == supplier['id']:
-                continue  # 자기 자신은 건너뜀
-            if existing_supplier.get('business_number') == business_number:
-                return False, "이미 등록된 사업자등록번호입니다."
+        # 사업자번호 중복 검사 (자기 자신은 제외)
+        existing_supplier = catalog.supplier_by_business_number(business_number)
+        if existing_supplier and existing_supplier['id'] != supplier.get('id'):
+            return False, "이미 등록된 사업자등록번호입니다."
     
     return True, "검증 완료"
 
@@ -156,21 +449,69 @@ def validate_item_data(item):
     if not item.get('name'):
         return False, "물품명은 필수 입력 항목입니다."
     
-    items = load_items()
+    catalog = get_catalog()
     # 수정이 아닌 추가인 경우에만 중복 체크
     if 'id' not in item:
-        for existing_item in items:
-            if existing_item['name'] == item['name']:
-                return False, "이미 존재하는 물품명입니다."
+        if catalog.item_by_name(item['name']):
+            return False, "이미 존재하는 물품명입니다."
     
     # 품번 유효성 검사
     item_code = item.get('item_code', '')
     if item_code:
-        # 품번 중복 검사
-        for existing_item in items:
-            if 'id' in item and existing_item['id'] == item['id']:
-                continue  # 자기 자신은 건너뜀
-            if existing_item.get('item_code') == item_code:
-                return False, "이미 등록된 품번입니다."
-    
-    return True, "검증 완료" 
\ No newline at end of file
+        # 품번 중복 검사 (자기 자신은 제외)
+        existing_item = catalog.item_by_code(item_code)
+        if existing_item and existing_item['id'] != item.get('id'):
+            return False, "이미 등록된 품번입니다."
+    
+    return True, "검증 완료"
+
+def text_column(df, column):
+    """문자열 컬럼 정리 (결측값과 없는 컬럼은 빈 문자열, 앞뒤 공백 제거)"""
+    if column not in df.columns:
+        return pd.Series('', index=df.index)
+    return df[column].fillna('').astype(str).str.strip()
+
+def _set_first_error(errors, condition, message):
+    """아직 오류가 없는 행에만 오류 메시지 기록 (행마다 첫 번째 오류만 보고)"""
+    return errors.mask(condition & errors.isna(), message)
+
+def validate_items_batch(candidates):
+    """신규 물품 후보 DataFrame을 한 번에 검증
+
+    candidates는 'name', 'item_code' 컬럼을 가진 DataFrame이며,
+    기존 물품과의 중복과 업로드 안에서의 중복을 함께 검사합니다.
+    반환값은 candidates와 같은 인덱스의 오류 메시지 Series이며, 유효한 행은 결측값입니다.
+    """
+    catalog = get_catalog()
+    names = text_column(candidates, 'name')
+    codes = text_column(candidates, 'item_code')
+    has_code = codes != ''
+    
+    errors = pd.Series(None, index=candidates.index, dtype=object)
+    errors = _set_first_error(errors, names == '', "물품명은 필수 입력 항목입니다.")
+    errors = _set_first_error(errors, names.isin(catalog.items_by_name.keys()), "이미 존재하는 물품명입니다.")
+    errors = _set_first_error(errors, names.duplicated() & (names != ''), "업로드 파일 안에서 중복된 물품명입니다.")
+    errors = _set_first_error(errors, has_code & codes.isin(catalog.items_by_code.keys()), "이미 등록된 품번입니다.")
+    errors = _set_first_error(errors, has_code & codes.duplicated(), "업로드 파일 안에서 중복된 품번입니다.")
+    return errors
+
+def validate_suppliers_batch(candidates):
+    """신규 거래처 후보 DataFrame을 한 번에 검증
+
+    candidates는 'name', 'business_number' 컬럼을 가진 DataFrame이며,
+    기존 거래처와의 중복과 업로드 안에서의 중복을 함께 검사합니다.
+    반환값은 candidates와 같은 인덱스의 오류 메시지 Series이며, 유효한 행은 결측값입니다.
+    """
+    catalog = get_catalog()
+    names = text_column(candidates, 'name')
+    numbers = text_column(candidates, 'business_number')
+    has_number = numbers != ''
+    
+    errors = pd.Series(None, index=candidates.index, dtype=object)
+    errors = _set_first_error(errors, names == '', "거래처명은 필수 입력 항목입니다.")
+    errors = _set_first_error(errors, names.isin(catalog.suppliers_by_name.keys()), "이미 존재하는 거래처명입니다.")
+    errors = _set_first_error(errors, names.duplicated() & (names != ''), "업로드 파일 안에서 중복된 거래처명입니다.")
+    errors = _set_first_error(errors, has_number & ~numbers.str.fullmatch(r'\d{10}'), "사업자등록번호는 10자리 숫자여야 합니다.")
+    errors = _set_first_error(errors, has_number & numbers.isin(catalog.suppliers_by_business_number.keys()), "이미 등록된 사업자등록번호입니다.")
+    errors = _set_first_error(errors, has_number & numbers.duplicated(), "업로드 파일 안에서 중복된 사업자등록번호입니다.")
+    return errors
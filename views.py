@@ -0,0 +1,62 @@
+import pandas as pd
+
+# 입출고 내역 표시용 컬럼 (원본 컬럼 -> 화면 컬럼)
+TRANSACTION_COLUMNS = {
+    'transaction_date': '날짜',
+    'transaction_type': '유형',
+    'item_name': '물품명',
+    'item_code': '품번',
+    'quantity': '수량',
+    'unit': '단위',
+    'supplier_name': '거래처',
+    'business_number': '사업자번호',
+    'note': '참고사항',
+}
+
+# 페이지별 표시 컬럼
+HISTORY_VIEW_COLUMNS = ['transaction_date', 'transaction_type', 'item_name', 'quantity', 'unit', 'supplier_name', 'note']
+DASHBOARD_VIEW_COLUMNS = ['transaction_date', 'transaction_type', 'item_name', 'item_code', 'quantity', 'unit',
+                          'supplier_name', 'business_number', 'note']
+
+TRANSACTION_FIELDS = ['id', 'transaction_date', 'transaction_type', 'item_id', 'quantity', 'supplier_id', 'note']
+
+
+def item_lookup_frame(items):
+    """물품 목록 -> 조인용 DataFrame (item_id, item_name, item_code, unit)"""
+    frame = pd.DataFrame(list(items), columns=['id', 'name', 'item_code', 'unit'])
+    return frame.rename(columns={'id': 'item_id', 'name': 'item_name'}).drop_duplicates('item_id')
+
+
+def supplier_lookup_frame(suppliers):
+    """거래처 목록 -> 조인용 DataFrame (supplier_id, supplier_name, business_number)"""
+    frame = pd.DataFrame(list(suppliers), columns=['id', 'name', 'business_number'])
+    return frame.rename(columns={'id': 'supplier_id', 'name': 'supplier_name'}).drop_duplicates('supplier_id')
+
+
+def build_transaction_view(transactions, item_frame, supplier_frame, columns=HISTORY_VIEW_COLUMNS,
+                           missing_supplier="알 수 없음"):
+    """입출고 내역을 물품/거래처와 조인하여 화면 표시용 DataFrame 생성
+
+    행을 하나씩 조회하지 않고 merge 두 번으로 이름을 붙입니다. 반환값의 인덱스는
+    transactions 순서(0부터)이며 'id' 컬럼은 화면 컬럼과 별도로 유지됩니다.
+    """
+    view = pd.DataFrame(list(transactions), columns=TRANSACTION_FIELDS)
+    if view.empty:
+        return pd.DataFrame(columns=['id'] + [TRANSACTION_COLUMNS[c] for c in columns])
+
+    # 조인 키 자료형 맞추기 (거래처가 없는 내역은 결측값)
+    view['item_id'] = pd.to_numeric(view['item_id'], errors='coerce').astype('Int64')
+    view['supplier_id'] = pd.to_numeric(view['supplier_id'], errors='coerce').astype('Int64')
+    items = item_frame.astype({'item_id': 'Int64'})
+    suppliers = supplier_frame.astype({'supplier_id': 'Int64'})
+
+    view = view.merge(items, on='item_id', how='left', validate='many_to_one')
+    view = view.merge(suppliers, on='supplier_id', how='left', validate='many_to_one')
+
+    view['item_name'] = view['item_name'].fillna("알 수 없음")
+    view['supplier_name'] = view['supplier_name'].fillna(missing_supplier)
+    for column in ('item_code', 'unit', 'business_number', 'note', 'transaction_date'):
+        view[column] = view[column].fillna('')
+
+    view = view[['id'] + list(columns)].rename(columns=TRANSACTION_COLUMNS)
+    return view.reset_index(drop=True)